@@ -6,13 +6,62 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
-import time
+import os
 import random
 import warnings
-import yfinance as yf
+
+from market_data import get_fetch_executor, get_provider, period_start
+from fundamentals import get_fundamentals_store
+from history_store import get_history_store
+from bar_pyramid import TIERS, get_bar_pyramid, resolution
+from data_cache import estimate_size, get_shared_cache
+from price_data import PriceMatrix, build_historical_frame, memory_footprint_mb
+from scheduler import get_refresh_scheduler
+from screener import FEATURE_COLUMNS, InvalidCondition, Screener, history_features
+from sector_index import SectorIndex
+from universe import Universe
+from downsampling import decimate, line_trace
+from figure_cache import frame_version, get_figure_cache
+from instrumentation import (get_metrics, instrument_provider, process_memory_bytes, serve_metrics,
+                             timed_section)
+from index_calculator import IndexCalculator, index_weights
+from indicators import compute_indicators, get_indicator_engine
+from quote_stream import QuoteState, get_quote_stream, replay_ticks, synthetic_ticks
 
 warnings.filterwarnings('ignore')
 
+# Cadence du rafraîchissement automatique des cotations (secondes)
+REFRESH_SECONDS = int(os.environ.get("CAC40_REFRESH_SECONDS", "60"))
+
+# Flux de cotations en continu : vide (désactivé), "synthetic" ou fichier de ticks à rejouer
+STREAM_SOURCE = os.environ.get("CAC40_STREAM", "")
+
+# Couleurs des variations dans les tableaux (mêmes teintes que .positive/.negative/.neutral)
+VARIATION_STYLES = {
+    'positive': 'background-color: #d4edda; color: #155724',
+    'negative': 'background-color: #f8d7da; color: #721c24',
+    'neutral': 'background-color: #e2e3e5; color: #383d41',
+}
+
+# Critères de tri du screener -> colonnes de la table des caractéristiques
+SCREENER_SORTS = {
+    'Momentum 3 mois': 'momentum_3m',
+    'Momentum 12 mois': 'momentum_12m',
+    'Variation %': 'variation_pct',
+    'Rendement': 'dividende_yield',
+    'Capitalisation': 'market_cap',
+    'Volatilité': 'volatilite',
+    'Bêta': 'beta',
+}
+
+# Indices mondiaux affichés dans la sidebar
+WORLD_INDICES = {
+    'S&P 500': '^GSPC',
+    'NASDAQ': '^IXIC',
+    'DAX': '^GDAXI',
+    'FTSE 100': '^FTSE'
+}
+
 # Configuration de la page
 st.set_page_config(
     page_title="Dashboard CAC 40 - Analyse en Temps Réel",
@@ -90,192 +139,91 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 class CAC40Dashboard:
-    def __init__(self):
+    def __init__(self, provider=None, universe=None):
+        # Requêtes au fournisseur chronométrées et comptées
+        self.provider = instrument_provider(provider if provider is not None else get_provider())
+        self.universe = universe if universe is not None else Universe.load()
+        self.fetcher = get_fetch_executor(len(self.universe))
+        self.history_store = get_history_store(self.provider)
+        self.fundamentals = get_fundamentals_store(self.provider, self.fetcher)
+        self.cache = get_shared_cache()
+        self.scheduler = get_refresh_scheduler(self.cache)
+        self.figures = get_figure_cache()
+        self.metrics = get_metrics()
+        self.metrics.add_collector('shared_cache', self.cache.stats)
+        self.metrics.add_collector('figure_cache', self.figures.stats)
+        self.show_performance = False
+        self.auto_refresh = False
+        # Période de la sidebar, qui sert de zoom aux graphiques de séries longues
+        self.period = (None, None)
         self.entreprises = self.define_entreprises()
-        self.historical_data = self.initialize_historical_data()
-        self.current_data = self.initialize_current_data()
-        self.sector_data = self.initialize_sector_data()
+        self.sector_index = SectorIndex.from_universe(self.entreprises)
+        # Préchargement groupé des fondamentaux : les rafraîchissements ne les attendent plus
+        self.fundamentals.get_many(list(self.entreprises))
+        self.historical_data = self.cache.get_or_compute(
+            self.cache_key('historical_data'), 'historique', self.initialize_historical_data)
+        self.price_matrix = self.cache.get_or_compute(
+            self.cache_key('price_matrix'), 'historique',
+            lambda: PriceMatrix.from_long(self.historical_data))
+        # Versions des données dont dérivent les figures mises en cache
+        self.history_version = self.cache_key('historique', frame_version(self.historical_data))
+        self.live_version = None
+        # Vrai une fois les métriques clés affichées : les exécutions suivantes du fragment relisent le cache
+        self.key_metrics_shown = False
         
+    def cache_key(self, *parts):
+        """Clé du cache partagé, propre au fournisseur et à l'univers de titres"""
+        return (self.provider.name, tuple(self.entreprises)) + parts
+    
     def define_entreprises(self):
-        """Définit les entreprises du CAC 40 avec leurs tickers Yahoo Finance"""
-        return {
-            'MC.PA': {
-                'nom_complet': 'LVMH Moët Hennessy Louis Vuitton',
-                'secteur': 'Luxe',
-                'sous_secteur': 'Articles de luxe',
-                'pays': 'France',
-                'couleur': '#8B4513',
-                'poids_cac40': 12.5,
-                'description': 'Leader mondial du luxe'
-            },
-            'TTE.PA': {
-                'nom_complet': 'TotalEnergies',
-                'secteur': 'Énergie',
-                'sous_secteur': 'Pétrole & Gaz',
-                'pays': 'France',
-                'couleur': '#FF6B00',
-                'poids_cac40': 8.2,
-                'description': 'Major énergétique intégré'
-            },
-            'SAN.PA': {
-                'nom_complet': 'Sanofi',
-                'secteur': 'Santé',
-                'sous_secteur': 'Pharmaceutique',
-                'pays': 'France',
-                'couleur': '#0066CC',
-                'poids_cac40': 7.8,
-                'description': 'Groupe pharmaceutique mondial'
-            },
-            'AIR.PA': {
-                'nom_complet': 'Airbus',
-                'secteur': 'Industrie',
-                'sous_secteur': 'Aérospatial',
-                'pays': 'France',
-                'couleur': '#003366',
-                'poids_cac40': 6.5,
-                'description': 'Constructeur aéronautique'
-            },
-            'OR.PA': {
-                'nom_complet': "L'Oréal",
-                'secteur': 'Consommation',
-                'sous_secteur': 'Cosmétiques',
-                'pays': 'France',
-                'couleur': '#FF69B4',
-                'poids_cac40': 5.9,
-                'description': 'Leader mondial des cosmétiques'
-            },
-            'BNP.PA': {
-                'nom_complet': 'BNP Paribas',
-                'secteur': 'Finance',
-                'sous_secteur': 'Banque',
-                'pays': 'France',
-                'couleur': '#004B87',
-                'poids_cac40': 5.2,
-                'description': 'Groupe bancaire international'
-            },
-            'AI.PA': {
-                'nom_complet': 'Air Liquide',
-                'secteur': 'Chimie',
-                'sous_secteur': 'Gaz industriels',
-                'pays': 'France',
-                'couleur': '#00A3E0',
-                'poids_cac40': 4.8,
-                'description': 'Leader des gaz industriels'
-            },
-            'STM.PA': {
-                'nom_complet': 'STMicroelectronics',
-                'secteur': 'Technologie',
-                'sous_secteur': 'Semi-conducteurs',
-                'pays': 'France',
-                'couleur': '#660099',
-                'poids_cac40': 4.3,
-                'description': 'Fabricant de semi-conducteurs'
-            },
-            'DG.PA': {
-                'nom_complet': 'Vinci',
-                'secteur': 'Industrie',
-                'sous_secteur': 'BTP & Concessions',
-                'pays': 'France',
-                'couleur': '#FFCC00',
-                'poids_cac40': 4.1,
-                'description': 'Groupe de construction et concessions'
-            },
-            'RI.PA': {
-                'nom_complet': 'Pernod Ricard',
-                'secteur': 'Consommation',
-                'sous_secteur': 'Spiritueux',
-                'pays': 'France',
-                'couleur': '#8B0000',
-                'poids_cac40': 3.9,
-                'description': 'Leader mondial des vins et spiritueux'
-            },
-            'SU.PA': {
-                'nom_complet': 'Schneider Electric',
-                'secteur': 'Industrie',
-                'sous_secteur': 'Équipements électriques',
-                'pays': 'France',
-                'couleur': '#00A3E0',
-                'poids_cac40': 3.7,
-                'description': 'Spécialiste de la gestion d\'énergie'
-            },
-            'CAP.PA': {
-                'nom_complet': 'Capgemini',
-                'secteur': 'Technologie',
-                'sous_secteur': 'Services informatiques',
-                'pays': 'France',
-                'couleur': '#F26522',
-                'poids_cac40': 3.5,
-                'description': 'Services conseil en technologies'
-            },
-            'ACA.PA': {
-                'nom_complet': 'Crédit Agricole',
-                'secteur': 'Finance',
-                'sous_secteur': 'Banque',
-                'pays': 'France',
-                'couleur': '#004B87',
-                'poids_cac40': 3.3,
-                'description': 'Groupe bancaire coopératif'
-            },
-            'ML.PA': {
-                'nom_complet': 'Michelin',
-                'secteur': 'Industrie',
-                'sous_secteur': 'Pneumatiques',
-                'pays': 'France',
-                'couleur': '#FF0000',
-                'poids_cac40': 3.1,
-                'description': 'Manufacturier de pneumatiques'
-            },
-            'ENGI.PA': {
-                'nom_complet': 'Engie',
-                'secteur': 'Énergie',
-                'sous_secteur': 'Électricité & Gaz',
-                'pays': 'France',
-                'couleur': '#00A3E0',
-                'poids_cac40': 2.9,
-                'description': 'Fournisseur d\'énergie'
-            }
-        }
+        """Définit les entreprises de l'univers suivi avec leurs tickers Yahoo Finance"""
+        # Membres à date lus dans le registre des univers (data/universes)
+        return self.universe.entreprises()
     
-    def get_yfinance_data(self, ticker, period="1y"):
-        """Récupère les données depuis Yahoo Finance"""
-        try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period=period)
-            info = stock.info
-            
-            return hist, info
-        except Exception as e:
-            st.error(f"Erreur lors de la récupération des données pour {ticker}: {e}")
-            return None, None
+    def get_quote(self, ticker):
+        """Récupère la dernière séance d'un titre auprès du fournisseur"""
+        return self.provider.history(ticker, period="1d")
     
+    def report_fetch_errors(self, errors):
+        """Signale les titres dont la récupération a échoué"""
+        if errors:
+            st.warning(f"Données indisponibles pour {len(errors)} titre(s): "
+                       f"{', '.join(errors)}")
+    
+    @timed_section
     def initialize_historical_data(self):
-        """Initialise les données historiques depuis Yahoo Finance"""
-        all_data = []
-        
-        for ticker, info in self.entreprises.items():
-            hist, _ = self.get_yfinance_data(ticker, period="3y")
-            
-            if hist is not None and not hist.empty:
-                for date, row in hist.iterrows():
-                    all_data.append({
-                        'date': date,
-                        'symbole': ticker,
-                        'prix': row['Close'],
-                        'volume': row['Volume'],
-                        'secteur': info['secteur'],
-                        'ouverture': row['Open'],
-                        'plus_haut': row['High'],
-                        'plus_bas': row['Low']
-                    })
+        """Initialise les données historiques depuis le fournisseur de données"""
+        # Historiques lus depuis le cache disque, complétés par un téléchargement groupé
+        try:
+            histories = self.history_store.get_many(list(self.entreprises.keys()), period="3y")
+            # Titres omis du téléchargement (symbole en échec chez le fournisseur)
+            self.report_fetch_errors([ticker for ticker in self.entreprises if ticker not in histories])
+        except Exception as e:
+            st.error(f"Erreur lors du téléchargement des historiques: {e}")
+            histories = {}
         
-        return pd.DataFrame(all_data)
+        # Construction colonne par colonne (concaténation des historiques par symbole)
+        return build_historical_frame(
+            {ticker: histories.get(ticker) for ticker in self.entreprises},
+            {ticker: info['secteur'] for ticker, info in self.entreprises.items()}
+        )
     
+    @timed_section
     def initialize_current_data(self):
-        """Initialise les données courantes depuis Yahoo Finance"""
+        """Initialise les données courantes depuis le fournisseur de données.
+        
+        Retourne les cotations et la liste des titres en échec.
+        """
         current_data = []
         
+        # Requêtes parallèles ; les titres en échec sont simplement omis
+        fetch = self.fetcher.map(self.get_quote, self.entreprises.keys())
+        # Fondamentaux servis par leur propre stockage (revalidés en arrière-plan)
+        fondamentaux = self.fundamentals.get_many(list(self.entreprises))
+        
         for ticker, info in self.entreprises.items():
-            hist, yf_info = self.get_yfinance_data(ticker, period="1d")
+            hist = fetch.results.get(ticker)
+            yf_info = fondamentaux.get(ticker, {})
             
             if hist is not None and not hist.empty:
                 latest = hist.iloc[-1]
@@ -287,8 +235,12 @@ class CAC40Dashboard:
                 variation_pct = (variation_abs / prix_ouverture) * 100
                 
                 # Récupération des informations supplémentaires
-                market_cap = yf_info.get('marketCap', 0) if yf_info else 0
-                dividend_yield = yf_info.get('dividendYield', 0) * 100 if yf_info and yf_info.get('dividendYield') else 0
+                # Capitalisation au cours courant si le nombre de titres est connu
+                if yf_info.get('sharesOutstanding'):
+                    market_cap = yf_info['sharesOutstanding'] * prix_actuel
+                else:
+                    market_cap = yf_info.get('marketCap') or 0
+                dividend_yield = yf_info['dividendYield'] * 100 if yf_info.get('dividendYield') else 0
                 
                 current_data.append({
                     'symbole': ticker,
@@ -306,42 +258,159 @@ class CAC40Dashboard:
                     'plus_bas': latest['Low']
                 })
         
-        return pd.DataFrame(current_data)
+        current_data = pd.DataFrame(current_data)
+        if not current_data.empty and current_data['poids_cac40'].isna().any():
+            # Poids absents du registre : capitalisations flottantes courantes, plafonnées
+            # (équipondération si aucune capitalisation n'est connue)
+            flottant = [self.entreprises[ticker]['flottant'] for ticker in current_data['symbole']]
+            current_data['poids_cac40'] = index_weights(current_data['market_cap'], flottant)
+        return current_data, sorted(fetch.errors)
     
-    def initialize_sector_data(self):
-        """Initialise les données par secteur"""
-        secteurs = list(set([info['secteur'] for info in self.entreprises.values()]))
-        data = []
+    def initialize_sector_data(self, current_data=None):
+        """Initialise les données par secteur (un seul passage groupé sur les cotations)"""
+        current_data = self.current_data if current_data is None else current_data
+        return self.sector_index.aggregate(current_data)
+    
+    def load_live_data(self):
+        """Calcule ensemble les données courantes, sectorielles et les indicateurs clés.
         
-        for secteur in secteurs:
-            entreprises_secteur = [s for s, info in self.entreprises.items() if info['secteur'] == secteur]
-            
-            # Calcul de la performance moyenne du secteur
-            entreprises_data = self.current_data[self.current_data['secteur'] == secteur]
-            performance_moyenne = entreprises_data['variation_pct'].mean() if not entreprises_data.empty else 0
-            
-            data.append({
-                'secteur': secteur,
-                'poids_cac40': sum([self.entreprises[s]['poids_cac40'] for s in entreprises_secteur]),
-                'market_cap_total': sum([self.current_data[self.current_data['symbole'] == s]['market_cap'].sum() for s in entreprises_secteur]),
-                'nombre_entreprises': len(entreprises_secteur),
-                'performance_moyenne': performance_moyenne
-            })
+        Sans appel Streamlit : exécutable par le planificateur en arrière-plan.
+        """
+        if STREAM_SOURCE:
+            return self.load_streamed_data()
         
-        return pd.DataFrame(data)
+        current_data, fetch_errors = self.initialize_current_data()
+        return {
+            'current_data': current_data,
+            'sector_data': self.initialize_sector_data(current_data),
+            'metrics': QuoteState(current_data, self.get_index_calculator(current_data)).metrics(),
+            'fetch_errors': fetch_errors,
+            'version': datetime.now().timestamp()
+        }
+    
+    def seed_quote_state(self):
+        """État initial du flux : cotations courantes du fournisseur"""
+        current_data, _ = self.initialize_current_data()
+        return QuoteState(current_data, self.get_index_calculator(current_data),
+                          self.initialize_sector_data(current_data))
     
-    def update_live_data(self):
-        """Met à jour les données en temps réel depuis Yahoo Finance"""
+    def stream_feed(self, state):
+        """Générateur de ticks de la source ``CAC40_STREAM``"""
+        if STREAM_SOURCE == "synthetic":
+            return synthetic_ticks(dict(zip(state.symbols, state.last)), interval=1.0)
+        return replay_ticks(STREAM_SOURCE, speed=1)
+    
+    def load_streamed_data(self):
+        """Instantané de l'état des cotations, tenu à jour tick par tick en arrière-plan"""
+        # Le flux est initialisé une fois par les cotations du fournisseur
+        stream = get_quote_stream(self.cache_key('quote_stream'),
+                                  self.seed_quote_state, self.stream_feed)
+        # Agrégats sectoriels tenus par l'état du flux, sans réagrégation à chaque tick
+        current_data, sector_data, metrics = stream.snapshot()
+        return {
+            'current_data': current_data,
+            'sector_data': sector_data,
+            'metrics': metrics,
+            'fetch_errors': [s for s in self.entreprises if s not in stream.state.position],
+            'version': (stream.state.updates, datetime.now().timestamp())
+        }
+    
+    def load_world_indices(self):
+        """Récupère en parallèle la dernière séance des indices mondiaux"""
+        fetch = self.fetcher.map(lambda ticker: self.provider.history(ticker, period='1d'),
+                                 WORLD_INDICES.values())
+        return fetch.results
+    
+    def schedule_live_refresh(self):
+        """Confie le rafraîchissement des cotations au planificateur de fond"""
+        self.scheduler.register(self.cache_key('live_data'), 'quotes',
+                                self.load_live_data, REFRESH_SECONDS)
+        self.scheduler.register(self.cache_key('world_indices'), 'quotes',
+                                self.load_world_indices, REFRESH_SECONDS)
+    
+    def run_live(self, render):
+        """Exécute ``render`` dans un fragment, réexécuté seul à chaque rafraîchissement automatique"""
+        st.fragment(render, run_every=REFRESH_SECONDS if self.auto_refresh else None)()
+    
+    @timed_section
+    def update_live_data(self, force=False):
+        """Met à jour les données en temps réel depuis le cache partagé ou le fournisseur.
+        
+        Retourne la liste des titres dont les cotations sont indisponibles.
+        """
         try:
-            # Recréer les données courantes pour obtenir les dernières valeurs
-            self.current_data = self.initialize_current_data()
+            key = self.cache_key('live_data')
+            if force:
+                self.cache.invalidate(key)
             
-            # Mettre à jour les données sectorielles
-            self.sector_data = self.initialize_sector_data()
+            # Les cotations sont partagées entre sessions pendant leur durée de vie
+            live = self.cache.get_or_compute(key, 'quotes', self.load_live_data)
+            self.current_data = live['current_data']
+            self.sector_data = live['sector_data']
+            self.live_metrics = live['metrics']
+            self.live_version = self.cache_key('live', live['version'])
+            return live['fetch_errors']
             
         except Exception as e:
             st.error(f"Erreur lors de la mise à jour des données: {e}")
+            return []
+    
+    def get_price_matrix(self, period):
+        """Matrice de prix couvrant ``period``.
+        
+        La fenêtre est extraite de la matrice déjà chargée ; le fournisseur
+        n'est sollicité que si la période dépasse l'historique disponible.
+        """
+        start = period_start(period)
+        matrix = self.price_matrix
+        # Tolérance pour les week-ends et jours fériés en début de période
+        if start is not None and not matrix.empty and matrix.dates[0] <= start + pd.Timedelta(days=5):
+            return matrix.window(start=start.normalize())
+        
+        def load():
+            histories = self.history_store.get_many(list(self.entreprises.keys()), period=period)
+            secteurs = {ticker: info['secteur'] for ticker, info in self.entreprises.items()}
+            return PriceMatrix.from_long(build_historical_frame(histories, secteurs))
+        
+        return self.cache.get_or_compute(self.cache_key('price_matrix', period), 'historique', load)
+    
+    def get_bar_pyramid(self):
+        """Barres hebdomadaires et mensuelles de l'univers, avancées avec la matrice de prix"""
+        pyramide = get_bar_pyramid(self.cache_key('pyramide'))
+        pyramide.advance(self.price_matrix)
+        return pyramide
+    
+    def get_history(self, symbol, period="3y"):
+        """Historique d'un symbole hors univers (indice), partagé entre sessions"""
+        return self.cache.get_or_compute(
+            self.cache_key('history', symbol, period), 'historique',
+            lambda: self.history_store.get(symbol, period=period))
+    
+    def chart_window(self, frame):
+        """Lignes de ``frame`` (indexé par date) comprises dans la période de la sidebar"""
+        debut, fin = self.period
+        jours = frame.index.normalize()
+        masque = np.ones(len(frame), dtype=bool)
+        if debut is not None:
+            masque &= jours >= pd.Timestamp(debut).tz_localize(jours.tz)
+        if fin is not None:
+            masque &= jours <= pd.Timestamp(fin).tz_localize(jours.tz)
+        return frame[masque]
     
+    def variation_styles(self, values):
+        """Styles des cellules de variation : vert en hausse, rouge en baisse, gris sinon"""
+        return np.select([values > 0, values < 0], [VARIATION_STYLES['positive'], VARIATION_STYLES['negative']],
+                         VARIATION_STYLES['neutral'])
+    
+    def select_view(self, labels, key):
+        """Sélecteur de vue remplaçant ``st.tabs``.
+        
+        Contrairement aux onglets, dont le contenu est entièrement calculé à
+        chaque exécution, seule la vue sélectionnée est calculée et rendue.
+        """
+        return st.radio("Vue", labels, horizontal=True, key=key, label_visibility="collapsed")
+    
+    @timed_section
     def display_header(self):
         """Affiche l'en-tête du dashboard"""
         st.markdown('<h1 class="main-header">📈 Dashboard CAC 40 - Analyse en Temps Réel</h1>', 
@@ -353,35 +422,52 @@ class CAC40Dashboard:
                        unsafe_allow_html=True)
             st.markdown("**Surveillance et analyse des performances du CAC 40 et de ses composantes**")
         
-        current_time = datetime.now().strftime('%H:%M:%S')
-        st.sidebar.markdown(f"**🕐 Dernière mise à jour: {current_time}**")
+        st.sidebar.caption(f"Source: {self.provider.label}")
+        st.sidebar.caption(f"Univers: {self.universe.label} ({len(self.entreprises)} titres, "
+                           f"version {self.universe.version})")
+        st.sidebar.caption(f"Historique: {len(self.historical_data):,} lignes, "
+                           f"{memory_footprint_mb(self.historical_data):.1f} Mo en mémoire")
     
+    @timed_section
     def display_key_metrics(self):
         """Affiche les métriques clés du CAC 40"""
         st.markdown('<h3 class="section-header">📊 INDICATEURS CLÉS DU CAC 40</h3>', 
                    unsafe_allow_html=True)
         
+        # Relecture du cache, alimenté en arrière-plan par le planificateur
+        if self.auto_refresh:
+            self.schedule_live_refresh()
+        if self.key_metrics_shown:
+            # Réexécution du seul fragment : cotations rafraîchies depuis l'exécution complète
+            self.update_live_data()
+        self.key_metrics_shown = True
+        
         # Calcul des métriques
+        metrics = self.live_metrics
         cac40_value = self.get_cac40_index_value()
-        variation_cac40 = self.current_data['variation_pct'].mean()
-        volume_total = self.current_data['volume'].sum()
-        entreprises_hausse = len(self.current_data[self.current_data['variation_pct'] > 0])
+        variation_cac40 = metrics['variation_indice']
+        volume_total = metrics['volume_total']
+        entreprises_hausse = metrics['hausses']
         
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
             st.metric(
                 "CAC 40",
-                f"{cac40_value:,.0f} pts",
+                f"{cac40_value:,.0f} pts" if np.isfinite(cac40_value) else "Indisponible",
                 f"{variation_cac40:+.2f}%",
                 delta_color="normal"
             )
+            calculateur = self.get_index_calculator()
+            if calculateur is not None and np.isfinite(calculateur.deviation):
+                st.caption(f"Recalculé depuis les composantes, écart vs ^FCHI publié: "
+                           f"{calculateur.deviation:+.2f}%")
         
         with col2:
             st.metric(
                 "Entreprises en Hausse",
-                f"{entreprises_hausse}/{len(self.current_data)}",
-                f"{entreprises_hausse - (len(self.current_data) - entreprises_hausse):+d} vs baisse"
+                f"{entreprises_hausse}/{metrics['nombre']}",
+                f"{entreprises_hausse - metrics['baisses']:+d} vs baisse"
             )
         
         with col3:
@@ -392,154 +478,233 @@ class CAC40Dashboard:
             )
         
         with col4:
-            capitalisation_totale = self.current_data['market_cap'].sum() / 1e12
+            capitalisation_totale = metrics['market_cap_total'] / 1e12
             st.metric(
                 "Capitalisation Totale",
                 f"{capitalisation_totale:.2f} T€",
                 f"{random.uniform(-0.1, 0.2):.2f} T€ vs hier"
             )
     
+    def calibrate_index(self, current_data):
+        """Cale le calcul de l'indice sur l'historique publié du CAC 40"""
+        try:
+            reference = self.get_history("^FCHI", period="3y")
+        except Exception:
+            return None
+        if reference is None or reference.empty:
+            return None
+        # Poids du registre, ou déduits des capitalisations courantes
+        poids = dict(zip(current_data['symbole'], current_data['poids_cac40']))
+        weights = [poids.get(s, np.nan) for s in self.price_matrix.symbols]
+        return IndexCalculator.calibrate(self.price_matrix, weights, reference['Close'])
+    
+    def get_index_calculator(self, current_data=None):
+        """Calcul de l'indice partagé entre sessions, recalé à chaque clôture"""
+        current_data = self.current_data if current_data is None else current_data
+        return self.cache.get_or_compute(self.cache_key('indice'), 'historique',
+                                         lambda: self.calibrate_index(current_data))
+    
+    def load_screener_features(self):
+        """Caractéristiques historiques du screener (volatilité, bêta vs ^FCHI, momentum)"""
+        try:
+            market = self.get_history("^FCHI", period="3y")['Close']
+        except Exception:
+            market = None
+        return history_features(self.price_matrix, market)
+    
+    def get_screener(self):
+        """Screener de l'instantané courant, caractéristiques historiques calculées une fois par séance"""
+        historical = self.cache.get_or_compute(self.cache_key('screener'), 'historique',
+                                               self.load_screener_features)
+        return Screener.from_snapshot(self.current_data, historical)
+    
     def get_cac40_index_value(self):
-        """Récupère la valeur actuelle du CAC 40 depuis Yahoo Finance"""
+        """Niveau du CAC 40 recalculé à partir des cotations des composantes.
+        
+        Sans historique publié pour caler le calcul, le dernier niveau est
+        demandé au fournisseur.
+        """
+        if self.get_index_calculator() is not None:
+            return self.live_metrics['niveau_indice']
         try:
-            cac40 = yf.Ticker("^FCHI")
-            hist = cac40.history(period="1d")
+            hist = self.provider.history("^FCHI", period="1d")
             if not hist.empty:
                 return hist['Close'].iloc[-1]
         except:
             pass
-        
-        # Fallback: calcul basé sur les composantes
-        return self.current_data['prix_actuel'].sum() / len(self.current_data) * 40
+        return np.nan
     
+    @timed_section
     def create_cac40_overview(self):
         """Crée la vue d'ensemble du CAC 40"""
         st.markdown('<h3 class="section-header">🏛️ VUE D\'ENSEMBLE DU CAC 40</h3>', 
                    unsafe_allow_html=True)
         
-        tab1, tab2, tab3, tab4 = st.tabs(["Performance Indices", "Répartition Secteurs", "Top Performers", "Analyse Technique"])
+        vue = self.select_view(["Performance Indices", "Répartition Secteurs", "Top Performers", "Analyse Technique"], key="vue_cac40")
         
-        with tab1:
+        if vue == "Performance Indices":
             col1, col2 = st.columns(2)
             
             with col1:
                 # Évolution du CAC 40
-                cac40_hist = yf.Ticker("^FCHI").history(period="3y")
+                cac40_hist = self.chart_window(self.get_history("^FCHI", period="3y"))
                 if not cac40_hist.empty:
-                    cac40_hist = cac40_hist.reset_index()
-                    fig = px.line(cac40_hist, 
-                                 x='Date', 
-                                 y='Close',
-                                 title='Évolution du CAC 40 (3 dernières années)',
-                                 color_discrete_sequence=['#0055A4'])
-                    fig.update_layout(yaxis_title="Points CAC 40")
+                    def build():
+                        # Série réduite au budget de points du graphique
+                        fig = go.Figure(line_trace(cac40_hist.index, cac40_hist['Close'],
+                                                   name='CAC 40', line=dict(color='#0055A4')))
+                        fig.update_layout(title='Évolution du CAC 40', xaxis_title="Date",
+                                          yaxis_title="Points CAC 40")
+                        return fig
+                    fig = self.figures.get_or_build('cac40_3y', frame_version(cac40_hist), build)
                     st.plotly_chart(fig, use_container_width=True)
             
             with col2:
                 # Performance par secteur
-                fig = px.bar(self.sector_data, 
-                            x='secteur', 
-                            y='performance_moyenne',
-                            title='Performance Moyenne par Secteur (%)',
-                            color='secteur',
-                            color_discrete_sequence=px.colors.qualitative.Set3)
-                fig.update_layout(yaxis_title="Performance (%)")
+                def build():
+                    fig = px.bar(self.sector_data, 
+                                x='secteur', 
+                                y='performance_moyenne',
+                                title='Performance Moyenne par Secteur (%)',
+                                color='secteur',
+                                color_discrete_sequence=px.colors.qualitative.Set3)
+                    fig.update_layout(yaxis_title="Performance (%)")
+                    return fig
+                fig = self.figures.get_or_build('secteurs_performance', self.live_version, build)
                 st.plotly_chart(fig, use_container_width=True)
         
-        with tab2:
+        elif vue == "Répartition Secteurs":
             col1, col2 = st.columns(2)
             
             with col1:
                 # Répartition par secteur
-                fig = px.pie(self.sector_data, 
-                            values='poids_cac40', 
-                            names='secteur',
-                            title='Répartition du CAC 40 par Secteur',
-                            color='secteur',
-                            color_discrete_sequence=px.colors.qualitative.Set3)
+                def build():
+                    fig = px.pie(self.sector_data, 
+                                values='poids_cac40', 
+                                names='secteur',
+                                title='Répartition du CAC 40 par Secteur',
+                                color='secteur',
+                                color_discrete_sequence=px.colors.qualitative.Set3)
+                    return fig
+                fig = self.figures.get_or_build('secteurs_repartition', self.live_version, build)
                 st.plotly_chart(fig, use_container_width=True)
             
             with col2:
                 # Capitalisation par secteur
-                fig = px.bar(self.sector_data, 
-                            x='secteur', 
-                            y='market_cap_total',
-                            title='Capitalisation Boursière par Secteur (Milliards €)',
-                            color='secteur',
-                            color_discrete_sequence=px.colors.qualitative.Set3)
-                fig.update_layout(yaxis_title="Capitalisation (Milliards €)")
+                def build():
+                    fig = px.bar(self.sector_data, 
+                                x='secteur', 
+                                y='market_cap_total',
+                                title='Capitalisation Boursière par Secteur (Milliards €)',
+                                color='secteur',
+                                color_discrete_sequence=px.colors.qualitative.Set3)
+                    fig.update_layout(yaxis_title="Capitalisation (Milliards €)")
+                    return fig
+                fig = self.figures.get_or_build('secteurs_capitalisation', self.live_version, build)
                 st.plotly_chart(fig, use_container_width=True)
         
-        with tab3:
+        elif vue == "Top Performers":
             col1, col2 = st.columns(2)
             
             with col1:
                 # Top gainers
-                top_gainers = self.current_data.nlargest(10, 'variation_pct')
-                fig = px.bar(top_gainers, 
-                            x='variation_pct', 
-                            y='symbole',
-                            orientation='h',
-                            title='Top 10 des Performances Positives (%)',
-                            color='variation_pct',
-                            color_continuous_scale='Greens')
+                def build():
+                    top_gainers = self.current_data.nlargest(10, 'variation_pct')
+                    fig = px.bar(top_gainers, 
+                                x='variation_pct', 
+                                y='symbole',
+                                orientation='h',
+                                title='Top 10 des Performances Positives (%)',
+                                color='variation_pct',
+                                color_continuous_scale='Greens')
+                    return fig
+                fig = self.figures.get_or_build('top_hausses', self.live_version, build)
                 st.plotly_chart(fig, use_container_width=True)
             
             with col2:
                 # Top losers
-                top_losers = self.current_data.nsmallest(10, 'variation_pct')
-                fig = px.bar(top_losers, 
-                            x='variation_pct', 
-                            y='symbole',
-                            orientation='h',
-                            title='Top 10 des Performances Négatives (%)',
-                            color='variation_pct',
-                            color_continuous_scale='Reds')
+                def build():
+                    top_losers = self.current_data.nsmallest(10, 'variation_pct')
+                    fig = px.bar(top_losers, 
+                                x='variation_pct', 
+                                y='symbole',
+                                orientation='h',
+                                title='Top 10 des Performances Négatives (%)',
+                                color='variation_pct',
+                                color_continuous_scale='Reds')
+                    return fig
+                fig = self.figures.get_or_build('top_baisses', self.live_version, build)
                 st.plotly_chart(fig, use_container_width=True)
         
-        with tab4:
+        elif vue == "Analyse Technique":
+            # Derniers indicateurs de toutes les valeurs, avancés au fil des nouvelles séances
+            moteur = get_indicator_engine(self.cache_key('indicateurs'))
+            moteur.advance(self.price_matrix)
+            st.dataframe(moteur.latest().round(2), use_container_width=True)
+            
             # Analyse technique d'une entreprise sélectionnée
             entreprise_selectionnee = st.selectbox("Sélectionnez une entreprise:", 
                                                  list(self.entreprises.keys()),
                                                  format_func=lambda x: f"{x} - {self.entreprises[x]['nom_complet']}")
             
-            if entreprise_selectionnee:
-                entreprise_data = self.historical_data[
-                    self.historical_data['symbole'] == entreprise_selectionnee
-                ].copy()
+            if entreprise_selectionnee in self.price_matrix.symbols:
+                def build():
+                    entreprise_data = self.historical_data[
+                        self.historical_data['symbole'] == entreprise_selectionnee
+                    ].copy()
                 
-                if not entreprise_data.empty:
                     # Calcul des indicateurs techniques
-                    entreprise_data['MA20'] = entreprise_data['prix'].rolling(window=20).mean()
-                    entreprise_data['MA50'] = entreprise_data['prix'].rolling(window=50).mean()
-                    
+                    indicateurs = compute_indicators(entreprise_data['prix'], entreprise_data['plus_haut'],
+                                                     entreprise_data['plus_bas'])
+                    entreprise_data['MA20'] = indicateurs['MA20']
+                    entreprise_data['MA50'] = indicateurs['MA50']
+                    # Indicateurs calculés sur tout l'historique, affichés sur la période choisie
+                    entreprise_data = self.chart_window(entreprise_data)
+                    # Période trop longue pour le budget de points : barres du niveau agrégé
+                    # adapté, moyennes mobiles journalières relevées en fin de période
+                    niveau = resolution(entreprise_data.index)
+                    if niveau != 'jour':
+                        periodes = entreprise_data.index.tz_localize(None).to_period(TIERS[niveau])
+                        moyennes = entreprise_data[['MA20', 'MA50']].groupby(periodes).last()
+                        barres = self.get_bar_pyramid().tier(niveau).select([entreprise_selectionnee])
+                        barres = pd.DataFrame({'prix': barres.close[:, 0], 'volume': barres.volume[:, 0]},
+                                              index=barres.dates.tz_localize(None).to_period(TIERS[niveau]))
+                        fuseau = entreprise_data.index.tz
+                        entreprise_data = barres.join(moyennes, how='inner')
+                        entreprise_data.index = entreprise_data.index.to_timestamp().tz_localize(fuseau)
+                
                     fig = make_subplots(rows=2, cols=1, shared_xaxes=True, 
                                       vertical_spacing=0.1, 
                                       subplot_titles=('Prix et Moyennes Mobiles', 'Volume'))
-                    
+                
                     # Prix et moyennes mobiles
-                    fig.add_trace(go.Scatter(x=entreprise_data['date'], y=entreprise_data['prix'],
-                                           name='Prix', line=dict(color='#0055A4')), row=1, col=1)
-                    fig.add_trace(go.Scatter(x=entreprise_data['date'], y=entreprise_data['MA20'],
-                                           name='MM20', line=dict(color='orange')), row=1, col=1)
-                    fig.add_trace(go.Scatter(x=entreprise_data['date'], y=entreprise_data['MA50'],
-                                           name='MM50', line=dict(color='red')), row=1, col=1)
-                    
+                    fig.add_trace(line_trace(entreprise_data.index, entreprise_data['prix'],
+                                             name='Prix', line=dict(color='#0055A4')), row=1, col=1)
+                    fig.add_trace(line_trace(entreprise_data.index, entreprise_data['MA20'],
+                                             name='MM20', line=dict(color='orange')), row=1, col=1)
+                    fig.add_trace(line_trace(entreprise_data.index, entreprise_data['MA50'],
+                                             name='MM50', line=dict(color='red')), row=1, col=1)
+                
                     # Volume
-                    fig.add_trace(go.Bar(x=entreprise_data['date'], y=entreprise_data['volume'],
+                    dates, volumes = decimate(entreprise_data.index, entreprise_data['volume'])
+                    fig.add_trace(go.Bar(x=dates, y=volumes,
                                        name='Volume', marker_color='lightblue'), row=2, col=1)
-                    
+                
                     fig.update_layout(height=600, title_text=f"Analyse Technique - {entreprise_selectionnee}")
-                    st.plotly_chart(fig, use_container_width=True)
+                    return fig
+                fig = self.figures.get_or_build('analyse_technique', self.history_version, build,
+                                                symbole=entreprise_selectionnee, periode=self.period)
+                st.plotly_chart(fig, use_container_width=True)
     
+    @timed_section
     def create_entreprises_live(self):
         """Affiche les entreprises en temps réel"""
         st.markdown('<h3 class="section-header">🏢 ENTREPRISES EN TEMPS RÉEL</h3>', 
                    unsafe_allow_html=True)
         
-        tab1, tab2, tab3 = st.tabs(["Tableau des Cours", "Analyse Secteur", "Screener"])
+        vue = self.select_view(["Tableau des Cours", "Analyse Secteur", "Screener"], key="vue_entreprises")
         
-        with tab1:
+        if vue == "Tableau des Cours":
             # Filtres pour les entreprises
             col1, col2, col3 = st.columns(3)
             with col1:
@@ -573,69 +738,67 @@ class CAC40Dashboard:
             elif tri_filtre == 'Poids CAC 40':
                 entreprises_filtrees = entreprises_filtrees.sort_values('poids_cac40', ascending=False)
             
-            # Affichage des entreprises
-            for _, entreprise in entreprises_filtrees.iterrows():
-                change_class = ""
-                if entreprise['variation_pct'] > 0:
-                    change_class = "positive"
-                elif entreprise['variation_pct'] < 0:
-                    change_class = "negative"
-                else:
-                    change_class = "neutral"
-                
-                col1, col2, col3, col4, col5 = st.columns([1, 2, 1, 1, 1])
-                with col1:
-                    st.markdown(f"**{entreprise['symbole']}**")
-                    st.markdown(f"*{entreprise['secteur']}*")
-                with col2:
-                    st.markdown(f"**{entreprise['nom_complet']}**")
-                    st.markdown(f"Market Cap: {entreprise['market_cap']/1e9:.1f} Md€")
-                with col3:
-                    st.markdown(f"**{entreprise['prix_actuel']:.2f}€**")
-                    st.markdown(f"Div. Yield: {entreprise['dividende_yield']:.2f}%")
-                with col4:
-                    variation_str = f"{entreprise['variation_pct']:+.2f}%"
-                    st.markdown(f"**{variation_str}**")
-                    st.markdown(f"{entreprise['variation_abs']:+.2f}€")
-                with col5:
-                    st.markdown(f"<div class='price-change {change_class}'>{variation_str}</div>", 
-                               unsafe_allow_html=True)
-                    st.markdown(f"Vol: {entreprise['volume']:,.0f}")
-                
-                st.markdown("---")
+            # Affichage des entreprises : un seul tableau, variations colorées côté serveur
+            tableau = pd.DataFrame({
+                'Symbole': entreprises_filtrees['symbole'],
+                'Entreprise': entreprises_filtrees['nom_complet'],
+                'Secteur': entreprises_filtrees['secteur'],
+                'Cours (€)': entreprises_filtrees['prix_actuel'],
+                'Variation %': entreprises_filtrees['variation_pct'],
+                'Variation €': entreprises_filtrees['variation_abs'],
+                'Volume': entreprises_filtrees['volume'],
+                'Market Cap (Md€)': entreprises_filtrees['market_cap'] / 1e9,
+                'Div. Yield %': entreprises_filtrees['dividende_yield'],
+                'Poids CAC 40 %': entreprises_filtrees['poids_cac40'],
+            })
+            styled = tableau.style.apply(self.variation_styles, subset=['Variation %', 'Variation €']).format({
+                'Cours (€)': '{:.2f}',
+                'Variation %': '{:+.2f}%',
+                'Variation €': '{:+.2f}',
+                'Volume': '{:,.0f}',
+                'Market Cap (Md€)': '{:.1f}',
+                'Div. Yield %': '{:.2f}',
+                'Poids CAC 40 %': '{:.1f}',
+            })
+            st.dataframe(styled, hide_index=True, use_container_width=True,
+                         height=min(38 + 35 * len(tableau), 800))
         
-        with tab2:
+        elif vue == "Analyse Secteur":
             # Analyse détaillée par secteur
             secteur_selectionne = st.selectbox("Sélectionnez un secteur:", 
                                              self.sector_data['secteur'].unique(),
                                              key="sector_analysis")
             
             if secteur_selectionne:
-                entreprises_secteur = self.current_data[
-                    self.current_data['secteur'] == secteur_selectionne
-                ]
+                entreprises_secteur = self.sector_index.select(self.current_data, secteur_selectionne)
                 
                 col1, col2 = st.columns(2)
                 
                 with col1:
                     # Performance des entreprises du secteur
-                    fig = px.bar(entreprises_secteur, 
-                                x='symbole', 
-                                y='variation_pct',
-                                title=f'Performance des Entreprises - {secteur_selectionne}',
-                                color='variation_pct',
-                                color_continuous_scale='RdYlGn')
+                    def build():
+                        fig = px.bar(entreprises_secteur, 
+                                    x='symbole', 
+                                    y='variation_pct',
+                                    title=f'Performance des Entreprises - {secteur_selectionne}',
+                                    color='variation_pct',
+                                    color_continuous_scale='RdYlGn')
+                        return fig
+                    fig = self.figures.get_or_build('secteur_performances', self.live_version, build, secteur=secteur_selectionne)
                     st.plotly_chart(fig, use_container_width=True)
                 
                 with col2:
                     # Répartition des poids dans le secteur
-                    fig = px.pie(entreprises_secteur, 
-                                values='poids_cac40', 
-                                names='symbole',
-                                title=f'Répartition des Poids - {secteur_selectionne}')
+                    def build():
+                        fig = px.pie(entreprises_secteur, 
+                                    values='poids_cac40', 
+                                    names='symbole',
+                                    title=f'Répartition des Poids - {secteur_selectionne}')
+                        return fig
+                    fig = self.figures.get_or_build('secteur_poids', self.live_version, build, secteur=secteur_selectionne)
                     st.plotly_chart(fig, use_container_width=True)
         
-        with tab3:
+        elif vue == "Screener":
             # Screener d'entreprises
             st.subheader("Screener d'Investissement")
             
@@ -657,84 +820,92 @@ class CAC40Dashboard:
             with col3:
                 min_performance = st.number_input("Performance Min (%)", 
                                                 min_value=-50.0, max_value=50.0, value=0.0)
-                appliquer_filtres = st.button("Appliquer les Filtres")
+                tri = st.selectbox("Trier par:", list(SCREENER_SORTS))
             
-            if appliquer_filtres:
-                entreprises_filtrees = self.current_data.copy()
-                entreprises_filtrees = entreprises_filtrees[
-                    entreprises_filtrees['market_cap'] >= min_market_cap * 1e9
-                ]
-                entreprises_filtrees = entreprises_filtrees[
-                    entreprises_filtrees['dividende_yield'] >= min_dividende
-                ]
-                entreprises_filtrees = entreprises_filtrees[
-                    entreprises_filtrees['variation_pct'] >= min_performance
-                ]
-                
-                if secteur_screener:
-                    entreprises_filtrees = entreprises_filtrees[
-                        entreprises_filtrees['secteur'].isin(secteur_screener)
-                    ]
-                
-                st.write(f"**{len(entreprises_filtrees)} entreprises correspondent aux critères**")
-                st.dataframe(entreprises_filtrees[['symbole', 'nom_complet', 'secteur', 'prix_actuel', 
-                                                 'variation_pct', 'dividende_yield', 'market_cap']], 
-                           use_container_width=True)
+            condition_libre = st.text_input(
+                "Condition supplémentaire",
+                placeholder="ex: beta < 1 and momentum_12m > 10",
+                help="Colonnes disponibles: " + ", ".join(FEATURE_COLUMNS))
+            
+            # Toutes les conditions sont évaluées en un seul passage sur la table des caractéristiques
+            conditions = [
+                "market_cap >= @cap_min",
+                "dividende_yield >= @dividende_min",
+                "volatilite <= @volatilite_max",
+                "variation_pct >= @performance_min",
+                "secteur in @secteurs" if secteur_screener else None,
+            ]
+            try:
+                entreprises_filtrees = self.get_screener().screen(
+                    conditions, sort_by=SCREENER_SORTS[tri], query=condition_libre,
+                    cap_min=min_market_cap * 1e9, dividende_min=min_dividende,
+                    volatilite_max=max_volatilite, performance_min=min_performance,
+                    secteurs=list(secteur_screener))
+            except InvalidCondition as e:
+                st.error(f"Condition refusée: {e}")
+                return
+            except Exception as e:
+                st.error(f"Condition invalide: {e}")
+                return
+            
+            st.write(f"**{len(entreprises_filtrees)} entreprises correspondent aux critères**")
+            st.dataframe(entreprises_filtrees.round(2), use_container_width=True)
 
+    @timed_section
     def create_sector_analysis(self):
         """Analyse sectorielle détaillée"""
         st.markdown('<h3 class="section-header">📊 ANALYSE SECTORIELLE DÉTAILLÉE</h3>', 
                    unsafe_allow_html=True)
         
-        tab1, tab2, tab3 = st.tabs(["Performance Sectorielle", "Comparaison Secteurs", "Tendances"])
+        vue = self.select_view(["Performance Sectorielle", "Comparaison Secteurs", "Tendances"], key="vue_secteurs")
         
-        with tab1:
-            # Performance détaillée par secteur
-            sector_performance = self.current_data.groupby('secteur').agg({
-                'variation_pct': 'mean',
-                'volume': 'sum',
-                'market_cap': 'sum',
-                'symbole': 'count'
-            }).reset_index()
+        if vue == "Performance Sectorielle":
+            # Performance détaillée par secteur (agrégats calculés avec les cotations)
+            sector_performance = self.sector_data
             
             col1, col2 = st.columns(2)
             
             with col1:
-                fig = px.bar(sector_performance, 
-                            x='secteur', 
-                            y='variation_pct',
-                            title='Performance Moyenne par Secteur (%)',
-                            color='variation_pct',
-                            color_continuous_scale='RdYlGn')
+                def build():
+                    fig = px.bar(sector_performance, 
+                                x='secteur', 
+                                y='performance_moyenne',
+                                title='Performance Moyenne par Secteur (%)',
+                                color='performance_moyenne',
+                                color_continuous_scale='RdYlGn')
+                    return fig
+                fig = self.figures.get_or_build('secteurs_performance_detail', self.live_version, build)
                 st.plotly_chart(fig, use_container_width=True)
             
             with col2:
-                fig = px.scatter(sector_performance, 
-                               x='market_cap', 
-                               y='variation_pct',
-                               size='volume',
-                               color='secteur',
-                               title='Performance vs Capitalisation par Secteur',
-                               hover_name='secteur',
-                               size_max=60)
+                def build():
+                    fig = px.scatter(sector_performance, 
+                                   x='market_cap_total', 
+                                   y='performance_moyenne',
+                                   size='volume_total',
+                                   color='secteur',
+                                   title='Performance vs Capitalisation par Secteur',
+                                   hover_name='secteur',
+                                   size_max=60)
+                    return fig
+                fig = self.figures.get_or_build('secteurs_performance_capitalisation', self.live_version, build)
                 st.plotly_chart(fig, use_container_width=True)
         
-        with tab2:
-            # Comparaison historique des secteurs
-            sector_evolution = self.historical_data.groupby([
-                self.historical_data['date'].dt.to_period('M').dt.to_timestamp(),
-                'secteur'
-            ])['prix'].mean().reset_index()
-            
-            fig = px.line(sector_evolution, 
-                         x='date', 
-                         y='prix',
-                         color='secteur',
-                         title='Évolution Comparative des Secteurs',
-                         color_discrete_sequence=px.colors.qualitative.Set3)
+        elif vue == "Comparaison Secteurs":
+            # Comparaison historique des secteurs (moyennes mensuelles du niveau mensuel de la pyramide)
+            def build():
+                sector_evolution = self.get_bar_pyramid().sector_mean('mois').rename(columns={'close': 'prix'})
+                fig = px.line(sector_evolution, 
+                             x='date', 
+                             y='prix',
+                             color='secteur',
+                             title='Évolution Comparative des Secteurs',
+                             color_discrete_sequence=px.colors.qualitative.Set3)
+                return fig
+            fig = self.figures.get_or_build('secteurs_evolution', self.history_version, build)
             st.plotly_chart(fig, use_container_width=True)
         
-        with tab3:
+        elif vue == "Tendances":
             # Analyse des tendances sectorielles
             st.subheader("Tendances et Perspectives Sectorielles")
             
@@ -780,122 +951,96 @@ class CAC40Dashboard:
                 - Changement des habitudes de consommation
                 """)
 
+    @timed_section
     def create_evolution_analysis(self):
         """Analyse de l'évolution des marchés"""
         st.markdown('<h3 class="section-header">📈 ÉVOLUTION DES MARCHÉS</h3>', 
                    unsafe_allow_html=True)
         
-        tab1, tab2, tab3 = st.tabs(["Analyse Historique", "Volatilité", "Corrélations"])
+        vue = self.select_view(["Analyse Historique", "Volatilité", "Corrélations"], key="vue_evolution")
         
-        with tab1:
+        if vue == "Analyse Historique":
             col1, col2 = st.columns(2)
             
             with col1:
                 # Performance cumulative du CAC 40
-                cac40 = yf.Ticker("^FCHI")
-                cac40_hist = cac40.history(period="3y")
+                cac40_hist = self.chart_window(self.get_history("^FCHI", period="3y"))
                 if not cac40_hist.empty:
-                    cac40_hist = cac40_hist.reset_index()
-                    cac40_hist['Return'] = cac40_hist['Close'].pct_change().cumsum() * 100
-                    
-                    fig = px.line(cac40_hist, 
-                                 x='Date', 
-                                 y='Return',
-                                 title='Performance Cumulative du CAC 40 (%)')
+                    def build():
+                        rendement = cac40_hist['Close'].pct_change().cumsum() * 100
+                        fig = go.Figure(line_trace(rendement.index, rendement, name='Return'))
+                        fig.update_layout(title='Performance Cumulative du CAC 40 (%)',
+                                          xaxis_title="Date", yaxis_title="Return")
+                        return fig
+                    fig = self.figures.get_or_build('cac40_cumul', frame_version(cac40_hist), build)
                     st.plotly_chart(fig, use_container_width=True)
             
             with col2:
                 # Heatmap des rendements
                 try:
-                    # Récupérer les données mensuelles pour plusieurs entreprises
-                    symbols_sample = list(self.entreprises.keys())[:10]  # Limiter pour performance
-                    monthly_returns = []
-                    
-                    for symbol in symbols_sample:
-                        stock = yf.Ticker(symbol)
-                        hist = stock.history(period="2y", interval="1mo")
-                        if not hist.empty:
-                            hist['Monthly_Return'] = hist['Close'].pct_change() * 100
-                            hist['Symbol'] = symbol
-                            hist['Year'] = hist.index.year
-                            hist['Month'] = hist.index.month
-                            monthly_returns.append(hist[['Symbol', 'Year', 'Month', 'Monthly_Return']].dropna())
+                    # Rendements mensuels des 2 dernières années, lus dans les barres mensuelles
+                    matrice = self.get_bar_pyramid().tier('mois').last(pd.DateOffset(years=2))
                     
-                    if monthly_returns:
-                        returns_df = pd.concat(monthly_returns)
-                        heatmap_data = returns_df.pivot_table(
-                            index='Year',
-                            columns='Month',
-                            values='Monthly_Return',
-                            aggfunc='mean'
-                        )
+                    if not matrice.empty:
+                        # Moyenne des entreprises pour chaque mois
+                        def build():
+                            monthly_returns = matrice.monthly_returns()
+                            moyenne = monthly_returns.mean(axis=1)
+                            heatmap_data = pd.DataFrame({
+                                'Year': moyenne.index.year,
+                                'Month': moyenne.index.month,
+                                'Monthly_Return': moyenne.to_numpy()
+                            }).pivot(index='Year', columns='Month', values='Monthly_Return')
                         
-                        fig = px.imshow(heatmap_data,
-                                       title='Rendements Mensuels Moyens par Année (%)',
-                                       color_continuous_scale='RdYlGn',
-                                       aspect="auto")
+                            fig = px.imshow(heatmap_data,
+                                           title='Rendements Mensuels Moyens par Année (%)',
+                                           color_continuous_scale='RdYlGn',
+                                           aspect="auto")
+                            return fig
+                        fig = self.figures.get_or_build('rendements_mensuels', self.history_version, build)
                         st.plotly_chart(fig, use_container_width=True)
                 except Exception as e:
                     st.info("Données de heatmap temporairement indisponibles")
         
-        with tab2:
-            # Analyse de volatilité
-            volatilite_data = []
-            for ticker, info in self.entreprises.items():
-                try:
-                    stock = yf.Ticker(ticker)
-                    hist = stock.history(period="6mo")
-                    if not hist.empty:
-                        volatilite = hist['Close'].std()
-                        prix_actuel = hist['Close'].iloc[-1]
-                        volume_moyen = hist['Volume'].mean()
-                        
-                        volatilite_data.append({
-                            'symbole': ticker,
-                            'prix_actuel': prix_actuel,
-                            'volatilite': volatilite,
-                            'volatilite_pct': (volatilite / prix_actuel) * 100,
-                            'volume_moyen': volume_moyen
-                        })
-                except:
-                    continue
+        elif vue == "Volatilité":
+            # Analyse de volatilité sur les 6 derniers mois
+            volatilite_df = self.get_price_matrix("6mo").volatility_summary()
             
-            if volatilite_data:
-                volatilite_df = pd.DataFrame(volatilite_data)
-                fig = px.scatter(volatilite_df, 
-                               x='volume_moyen', 
-                               y='volatilite_pct',
-                               size='prix_actuel',
-                               color='volatilite_pct',
-                               title='Volatilité vs Volume des Entreprises',
-                               hover_name='symbole',
-                               size_max=40)
+            if not volatilite_df.empty:
+                def build():
+                    fig = px.scatter(volatilite_df, 
+                                   x='volume_moyen', 
+                                   y='volatilite_pct',
+                                   size='prix_actuel',
+                                   color='volatilite_pct',
+                                   title='Volatilité vs Volume des Entreprises',
+                                   hover_name='symbole',
+                                   size_max=40)
+                    return fig
+                fig = self.figures.get_or_build('volatilite', self.history_version, build)
                 st.plotly_chart(fig, use_container_width=True)
         
-        with tab3:
+        elif vue == "Corrélations":
             # Matrice de corrélation
             try:
-                # Récupérer les données de clôture pour les 3 derniers mois
-                corr_data = []
-                for ticker in list(self.entreprises.keys())[:15]:  # Limiter pour performance
-                    stock = yf.Ticker(ticker)
-                    hist = stock.history(period="3mo")
-                    if not hist.empty:
-                        corr_data.append(hist['Close'].rename(ticker))
+                # Clôtures des 3 derniers mois, lues dans la matrice de prix
+                fenetre = self.get_price_matrix("3mo")
                 
-                if corr_data:
-                    corr_df = pd.concat(corr_data, axis=1)
-                    correlation_matrix = corr_df.corr()
-                    
-                    fig = px.imshow(correlation_matrix,
-                                   title='Matrice de Corrélation entre les Entreprises',
-                                   color_continuous_scale='RdBu',
-                                   zmin=-1, zmax=1,
-                                   aspect="auto")
+                if not fenetre.empty:
+                    def build():
+                        correlation_matrix = fenetre.correlation()
+                        fig = px.imshow(correlation_matrix,
+                                       title='Matrice de Corrélation entre les Entreprises',
+                                       color_continuous_scale='RdBu',
+                                       zmin=-1, zmax=1,
+                                       aspect="auto")
+                        return fig
+                    fig = self.figures.get_or_build('correlations', self.history_version, build)
                     st.plotly_chart(fig, use_container_width=True)
             except Exception as e:
                 st.info("Matrice de corrélation temporairement indisponible")
 
+    @timed_section
     def create_sidebar(self):
         """Crée la sidebar avec les contrôles"""
         st.sidebar.markdown("## 🎛️ CONTRÔLES D'ANALYSE")
@@ -903,9 +1048,11 @@ class CAC40Dashboard:
         # Filtres temporels
         st.sidebar.markdown("### 📅 Période d'analyse")
         date_debut = st.sidebar.date_input("Date de début", 
-                                         value=datetime.now() - timedelta(days=365))
+                                         value=datetime.now() - timedelta(days=3 * 365))
         date_fin = st.sidebar.date_input("Date de fin", 
                                        value=datetime.now())
+        # Zoom des séries longues : une période courte est tracée en pleine résolution
+        self.period = (date_debut, date_fin)
         
         # Filtres secteurs
         st.sidebar.markdown("### 🏢 Sélection des secteurs")
@@ -919,86 +1066,118 @@ class CAC40Dashboard:
         st.sidebar.markdown("### ⚙️ Options")
         auto_refresh = st.sidebar.checkbox("Rafraîchissement automatique", value=True)
         show_technical = st.sidebar.checkbox("Afficher indicateurs techniques", value=True)
+        self.show_performance = st.sidebar.checkbox("Panneau de performance", value=False)
         
         # Bouton de rafraîchissement manuel
         if st.sidebar.button("🔄 Rafraîchir les données"):
-            self.update_live_data()
+            self.update_live_data(force=True)
             st.rerun()
         
         # Informations marché
         st.sidebar.markdown("---")
         st.sidebar.markdown("### 💹 INFOS MARCHÉ")
         
-        # Indices mondiaux via yfinance
-        indices = {
-            'S&P 500': '^GSPC',
-            'NASDAQ': '^IXIC',
-            'DAX': '^GDAXI',
-            'FTSE 100': '^FTSE'
+        # Indices mondiaux, rafraîchis avec les cotations
+        self.auto_refresh = auto_refresh
+        with st.sidebar:
+            self.run_live(self.display_world_indices)
+        
+        return {
+            'date_debut': date_debut,
+            'date_fin': date_fin,
+            'secteurs_selectionnes': secteurs_selectionnes,
+            'auto_refresh': auto_refresh,
+            'show_technical': show_technical
         }
+
+    @timed_section
+    def display_world_indices(self):
+        """Affiche les indices mondiaux et l'heure de mise à jour"""
+        if self.auto_refresh:
+            self.schedule_live_refresh()
+        indices = self.cache.get_or_compute(self.cache_key('world_indices'), 'quotes',
+                                            self.load_world_indices)
         
-        for indice_name, indice_ticker in indices.items():
+        for indice_name, indice_ticker in WORLD_INDICES.items():
             try:
-                indice_data = yf.Ticker(indice_ticker)
-                hist = indice_data.history(period='1d')
+                hist = indices[indice_ticker]
                 if not hist.empty:
                     valeur = hist['Close'].iloc[-1]
                     ouverture = hist['Open'].iloc[-1]
                     variation = ((valeur - ouverture) / ouverture) * 100
                     
-                    st.sidebar.metric(
+                    st.metric(
                         indice_name,
                         f"{valeur:,.0f}",
                         f"{variation:+.2f}%"
                     )
             except:
-                st.sidebar.write(f"{indice_name}: Données indisponibles")
+                st.write(f"{indice_name}: Données indisponibles")
         
-        return {
-            'date_debut': date_debut,
-            'date_fin': date_fin,
-            'secteurs_selectionnes': secteurs_selectionnes,
-            'auto_refresh': auto_refresh,
-            'show_technical': show_technical
-        }
+        current_time = datetime.now().strftime('%H:%M:%S')
+        st.markdown(f"**🕐 Dernière mise à jour: {current_time}**")
 
+    def record_metrics(self):
+        """Relève la mémoire et exporte les mesures (fichier ``CAC40_METRICS_FILE``, port ``CAC40_METRICS_PORT``)"""
+        self.metrics.gauge('process_memory_bytes', process_memory_bytes())
+        self.session_bytes = estimate_size(dict(st.session_state)) + sum(
+            estimate_size(getattr(self, name)) for name in ('current_data', 'sector_data'))
+        self.metrics.gauge('session_memory_bytes', self.session_bytes)
+        serve_metrics()
+        chemin = os.environ.get("CAC40_METRICS_FILE")
+        if chemin:
+            self.metrics.write_prometheus(chemin)
+    
+    def display_performance_panel(self):
+        """Panneau de la sidebar : durées des sections, requêtes au fournisseur, caches, mémoire"""
+        with st.sidebar.expander("⏱️ Performance", expanded=True):
+            st.caption(f"Mémoire processus: {process_memory_bytes() / 1024 ** 2:,.0f} Mo · "
+                       f"session: {self.session_bytes / 1024:,.0f} Ko")
+            st.dataframe(self.metrics.timers()[['mesure', 'etiquettes', 'nombre', 'moyenne_ms', 'max_ms']].round(1),
+                         hide_index=True, use_container_width=True)
+            compteurs = pd.DataFrame(
+                [{'mesure': name, 'etiquettes': ", ".join(f"{k}={v}" for k, v in labels), 'valeur': value}
+                 for (name, labels), value in sorted(self.metrics.values().items())])
+            st.dataframe(compteurs, hide_index=True, use_container_width=True)
+    
+    @timed_section
     def run_dashboard(self):
         """Exécute le dashboard complet"""
-        # Mise à jour des données live
-        self.update_live_data()
+        # Mise à jour des données live (une seule fois par exécution)
+        self.report_fetch_errors(self.update_live_data())
         
         # Sidebar
-        controls = self.create_sidebar()
+        self.create_sidebar()
         
         # Header
         self.display_header()
         
-        # Métriques clés
-        self.display_key_metrics()
+        # Métriques clés (seule partie réexécutée lors des rafraîchissements automatiques)
+        self.run_live(self.display_key_metrics)
         
-        # Navigation par onglets
-        tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-            "📈 CAC 40", 
-            "🏢 Entreprises", 
-            "📊 Secteurs", 
-            "📈 Évolution", 
+        # Navigation entre les vues : seule la vue affichée est calculée
+        vue = self.select_view([
+            "📈 CAC 40",
+            "🏢 Entreprises",
+            "📊 Secteurs",
+            "📈 Évolution",
             "💡 Insights",
             "ℹ️ À Propos"
-        ])
+        ], key="vue_principale")
         
-        with tab1:
+        if vue == "📈 CAC 40":
             self.create_cac40_overview()
         
-        with tab2:
+        elif vue == "🏢 Entreprises":
             self.create_entreprises_live()
         
-        with tab3:
+        elif vue == "📊 Secteurs":
             self.create_sector_analysis()
         
-        with tab4:
+        elif vue == "📈 Évolution":
             self.create_evolution_analysis()
         
-        with tab5:
+        elif vue == "💡 Insights":
             st.markdown("## 💡 INSIGHTS STRATÉGIQUES")
             
             col1, col2 = st.columns(2)
@@ -1053,7 +1232,7 @@ class CAC40Dashboard:
             5. **Surveillance Active:** Adaptation aux conditions de marché
             """)
         
-        with tab6:
+        elif vue == "ℹ️ À Propos":
             st.markdown("## 📋 À propos de ce dashboard")
             st.markdown("""
             Ce dashboard présente une analyse en temps réel des performances du CAC 40 
@@ -1066,7 +1245,7 @@ class CAC40Dashboard:
             - Indicateurs de performance en temps réel
             
             **Sources des données:**
-            - Yahoo Finance (yfinance)
+            - Yahoo Finance (yfinance), ou fournisseur hors ligne
             - Données fondamentales des entreprises
             
             **⚠️ Avertissement:** 
@@ -1085,10 +1264,10 @@ class CAC40Dashboard:
             - Pandas
             """)
         
-        # Rafraîchissement automatique
-        if controls['auto_refresh']:
-            time.sleep(60)  # Rafraîchissement toutes les 60 secondes
-            st.rerun()
+        # Mesures de performance de cette exécution
+        self.record_metrics()
+        if self.show_performance:
+            self.display_performance_panel()
 
 # Lancement du dashboard
 if __name__ == "__main__":
@@ -0,0 +1,176 @@
+# bar_pyramid.py
+"""Pyramide de barres agrégées : journalières → hebdomadaires → mensuelles.
+
+Chaque niveau agrège les barres journalières de la matrice de prix par
+période calendaire (clôture de fin de période, plus haut, plus bas,
+volume cumulé, ainsi que la somme et le nombre des clôtures pour les
+moyennes). Les niveaux sont construits une fois, puis avancés au fil des
+nouvelles séances : seule la période en cours est réagrégée, avec les
+séances suivantes, sa dernière séance ayant pu être révisée depuis.
+
+``resolution`` choisit, pour une plage de séances, le niveau le plus fin
+dont les barres tiennent dans le budget de points d'un graphique.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from downsampling import POINT_BUDGET
+from price_data import PriceMatrix
+
+# Niveaux agrégés (code de période pandas), du plus fin au plus grossier
+TIERS = {'semaine': 'W', 'mois': 'M'}
+
+
+def resolution(dates, budget=None):
+    """Niveau (``jour``, ``semaine``, ``mois``) à tracer pour les séances ``dates``.
+
+    Le niveau le plus fin dont le nombre de barres sur la plage tient dans
+    ``budget`` points (``POINT_BUDGET`` par défaut) ; à défaut, le plus grossier.
+    """
+    budget = POINT_BUDGET if budget is None else budget
+    if len(dates) <= budget:
+        return 'jour'
+    dates = pd.DatetimeIndex(dates).tz_localize(None)
+    for name, freq in TIERS.items():
+        if dates.to_period(freq).nunique() <= budget:
+            return name
+    return name
+
+
+def _last_valid(values, starts, rows):
+    """Dernière valeur non manquante de chaque période et de chaque colonne"""
+    valid = ~np.isnan(values)
+    index = np.where(valid, np.arange(rows)[:, None], -1)
+    last = np.maximum.reduceat(index, starts, axis=0)
+    gathered = values[np.maximum(last, 0), np.arange(values.shape[1])]
+    return np.where(last >= 0, gathered, np.nan)
+
+
+class Tier:
+    """Barres d'un niveau de la pyramide (périodes × symboles)"""
+
+    def __init__(self, freq):
+        self.freq = freq
+        self.periods = None
+        self.close = self.high = self.low = self.volume = None
+        self.close_sum = self.close_count = None
+
+    def _aggregate(self, matrix, rows):
+        """Barres des lignes ``rows`` de la matrice journalière, par période"""
+        dates = matrix.dates[rows]
+        periods = dates.tz_localize(None).to_period(self.freq)
+        starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+        close = matrix.close[rows].astype('float64')
+        valid = ~np.isnan(close)
+        return periods[starts], {
+            'close': _last_valid(close, starts, len(close)),
+            'high': np.fmax.reduceat(matrix.high[rows].astype('float64'), starts, axis=0),
+            'low': np.fmin.reduceat(matrix.low[rows].astype('float64'), starts, axis=0),
+            'volume': np.add.reduceat(np.nan_to_num(matrix.volume[rows]), starts, axis=0),
+            'close_sum': np.add.reduceat(np.where(valid, close, 0.0), starts, axis=0),
+            'close_count': np.add.reduceat(valid.astype('float64'), starts, axis=0),
+        }
+
+    def advance(self, matrix):
+        """Agrège les séances de ``matrix`` à partir du début de la période en cours.
+
+        La barre de la période en cours est recalculée plutôt que complétée :
+        sa dernière séance, éventuellement incomplète lors de son
+        intégration, a pu être révisée. Retourne la première ligne agrégée.
+        """
+        start = 0
+        if self.periods is not None:
+            start = matrix.dates.tz_localize(None).searchsorted(self.periods[-1].start_time)
+            self.periods = self.periods[:-1]
+            for name in ('close', 'high', 'low', 'volume', 'close_sum', 'close_count'):
+                setattr(self, name, getattr(self, name)[:-1])
+
+        periods, bars = self._aggregate(matrix, slice(start, len(matrix.dates)))
+        if self.periods is None:
+            self.periods = periods
+            for name, values in bars.items():
+                setattr(self, name, values)
+        else:
+            self.periods = self.periods.append(periods)
+            for name, values in bars.items():
+                setattr(self, name, np.concatenate([getattr(self, name), values]))
+        return start
+
+    def __len__(self):
+        return 0 if self.periods is None else len(self.periods)
+
+    def dates(self):
+        """Date de début de chaque période"""
+        return self.periods.to_timestamp().rename('date')
+
+
+class BarPyramid:
+    """Niveaux agrégés de la matrice de prix, avancés au fil des nouvelles séances"""
+
+    def __init__(self):
+        self.daily = None
+        self.tiers = {}
+        self.last_date = None
+        self._lock = threading.Lock()
+
+    def advance(self, matrix):
+        """Intègre les séances de ``matrix`` depuis le début de la période en cours.
+
+        Les niveaux sont reconstruits si l'univers de symboles a changé.
+        Retourne le nombre de séances agrégées.
+        """
+        with self._lock:
+            if matrix.empty or matrix is self.daily:
+                return 0
+            if self.daily is None or list(matrix.symbols) != list(self.daily.symbols):
+                self.tiers = {name: Tier(freq) for name, freq in TIERS.items()}
+                self.last_date = None
+            if self.last_date is not None and matrix.dates[-1] < self.last_date:
+                return 0
+            self.daily = matrix
+            start = min(tier.advance(matrix) for tier in self.tiers.values())
+            self.last_date = matrix.dates[-1]
+            return len(matrix.dates) - start
+
+    def tier(self, name):
+        """Niveau ``name`` (``jour``, ``semaine``, ``mois``) sous forme de matrice de prix"""
+        with self._lock:
+            if name == 'jour':
+                return self.daily
+            tier = self.tiers[name]
+            dates = tier.dates().tz_localize(self.daily.dates.tz)
+            return PriceMatrix(dates, self.daily.symbols, self.daily.sectors,
+                               tier.close, tier.volume, tier.high, tier.low)
+
+    def sector_mean(self, name='mois'):
+        """Clôture moyenne par secteur et par période du niveau ``name``.
+
+        Table longue (``date``, ``secteur``, ``close``) : moyenne de toutes
+        les clôtures journalières des titres du secteur sur la période.
+        """
+        with self._lock:
+            daily = self.daily
+            tier = self.tiers[name]
+            if daily is None or daily.empty or not len(tier):
+                return pd.DataFrame(columns=['date', 'secteur', 'close'])
+            indicator = daily._sector_indicator()
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means = (tier.close_sum @ indicator) / (tier.close_count @ indicator)
+            result = pd.DataFrame(means, index=tier.dates(),
+                                  columns=pd.Index(daily.sector_names, name='secteur'))
+        return result.stack().rename('close').reset_index()
+
+
+_pyramids = {}
+_pyramids_lock = threading.Lock()
+
+
+def get_bar_pyramid(key):
+    """Retourne la pyramide de barres partagée associée à ``key``"""
+    with _pyramids_lock:
+        pyramid = _pyramids.get(key)
+        if pyramid is None:
+            pyramid = _pyramids[key] = BarPyramid()
+        return pyramid
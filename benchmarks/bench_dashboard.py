@@ -0,0 +1,203 @@
+# bench_dashboard.py
+"""Démarrage, réexécutions, vues et mémoire du dashboard, hors ligne.
+
+``Dashboard.py`` est exécuté sans navigateur par le pilote de test de
+Streamlit (``AppTest``), servi par le fournisseur synthétique avec une
+latence simulée par requête, sur des univers synthétiques. Chaque taille
+est mesurée dans un processus distinct (caches vides, pic mémoire propre) :
+
+- démarrage à froid : première exécution, caches mémoire et disque vides ;
+- démarrage à chaud : nouvelle session, caches déjà remplis ;
+- réexécution : même session, sans changement ;
+- vues : affichage de chaque vue et sous-vue ;
+- rafraîchissement : bouton « Rafraîchir les données » (cotations forcées) ;
+- pic de mémoire résidente du processus et requêtes au fournisseur.
+
+Les résultats JSON (``--output``) se comparent d'un commit à l'autre
+avec ``--baseline``. Exemple :
+
+    python benchmarks/bench_dashboard.py --sizes 15 40 120 500 --output resultats.json
+    python benchmarks/bench_dashboard.py --baseline resultats.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Vues principales et sélecteurs de leurs sous-vues
+VIEWS = {
+    "📈 CAC 40": "vue_cac40",
+    "🏢 Entreprises": "vue_entreprises",
+    "📊 Secteurs": "vue_secteurs",
+    "📈 Évolution": "vue_evolution",
+    "💡 Insights": None,
+    "ℹ️ À Propos": None,
+}
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def upstream_requests():
+    from instrumentation import get_metrics
+    return sum(value for (name, _), value in get_metrics().values().items() if name == 'upstream_requests')
+
+
+def measure(size):
+    """Mesures d'un univers de ``size`` titres, dans le processus courant (configuré par l'appelant)"""
+    # Bibliothèques importées hors mesure : seul le travail du dashboard est chronométré
+    import plotly.express  # noqa: F401
+    from streamlit.testing.v1 import AppTest
+
+    script = os.path.join(ROOT, "Dashboard.py")
+
+    def session():
+        return AppTest.from_file(script, default_timeout=600)
+
+    def check(app):
+        if app.exception:
+            raise RuntimeError(app.exception[0].value)
+        return app
+
+    app = session()
+    cold = timed(lambda: check(app.run()))
+    cold_requests = upstream_requests()
+    warm = timed(lambda: check(session().run()))
+    rerun = timed(lambda: check(app.run()))
+
+    views = {}
+    for view, key in VIEWS.items():
+        app.radio(key="vue_principale").set_value(view)
+        views[view] = timed(lambda: check(app.run()))
+        if key is not None:
+            for sub in app.radio(key=key).options:
+                app.radio(key=key).set_value(sub)
+                views[f"{view} / {sub}"] = timed(lambda: check(app.run()))
+
+    requests_before = upstream_requests()
+    refresh = timed(lambda: check(app.sidebar.button[0].click().run()))
+    refresh_requests = upstream_requests() - requests_before
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        'symbols': size,
+        'cold_start_s': cold,
+        'warm_start_s': warm,
+        'rerun_s': rerun,
+        'refresh_s': refresh,
+        'views_s': views,
+        'peak_rss_mb': (peak if sys.platform == 'darwin' else peak * 1024) / 1024 ** 2,
+        'upstream_requests_cold': cold_requests,
+        'upstream_requests_refresh': refresh_requests,
+    }
+
+
+def run_child(size, latency, root, verbose):
+    """Mesure ``size`` dans un sous-processus : caches et pic mémoire propres à chaque taille"""
+    from universe import synthetic_universe
+
+    universe = synthetic_universe(size)
+    path = os.path.join(root, f"univers{size}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'nom': universe.name, 'libelle': universe.label, 'version': universe.version,
+                   'membres': universe.members}, f, ensure_ascii=False)
+
+    env = dict(os.environ,
+               CAC40_PROVIDER="synthetic",
+               CAC40_SYNTH_LATENCY=str(latency),
+               CAC40_UNIVERSE=path,
+               CAC40_CACHE_DIR=os.path.join(root, f"cache{size}"))
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', str(size)],
+                         env=env, check=True, stdout=subprocess.PIPE,
+                         stderr=None if verbose else subprocess.DEVNULL, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, check=True,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(result):
+    """Mesures numériques d'un résultat, vues comprises (``views_s/<vue>``)"""
+    values = {k: v for k, v in result.items() if k not in ('symbols', 'views_s')}
+    values.update({f"views_s/{view}": v for view, v in result['views_s'].items()})
+    return values
+
+
+def compare(report, baseline):
+    """Affiche l'écart relatif de chaque mesure par rapport à ``baseline``"""
+    reference = {r['symbols']: flatten(r) for r in baseline['results']}
+    print(f"référence: {baseline.get('revision')} → courant: {report.get('revision')}")
+    for result in report['results']:
+        before = reference.get(result['symbols'])
+        if before is None:
+            continue
+        print(f"\n{result['symbols']} titres")
+        for name, value in flatten(result).items():
+            if before.get(name):
+                print(f"  {name:<55} {before[name]:>9.2f} → {value:>9.2f}  ({(value / before[name] - 1) * 100:+.0f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[15, 40, 120, 500])
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help="latence simulée par requête (s)")
+    parser.add_argument('--output', help="fichier JSON des résultats")
+    parser.add_argument('--baseline', help="résultats JSON d'un autre commit, à comparer")
+    parser.add_argument('--verbose', action='store_true', help="affiche les messages des exécutions")
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        print(json.dumps(measure(args.child)))
+        return
+
+    with tempfile.TemporaryDirectory() as root:
+        results = [run_child(size, args.latency, root, args.verbose) for size in args.sizes]
+
+    import pandas as pd
+    import streamlit
+    report = {
+        'revision': git_revision(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'streamlit': streamlit.__version__,
+        'latency': args.latency,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print(f"latence simulée: {args.latency * 1000:.0f} ms par requête")
+    print(f"{'titres':>6} {'froid (s)':>10} {'chaud (s)':>10} {'réexéc. (s)':>12} {'rafraîch. (s)':>14} "
+          f"{'vues (s)':>9} {'pic RSS (Mo)':>13} {'requêtes':>9}")
+    for r in results:
+        print(f"{r['symbols']:>6} {r['cold_start_s']:>10.2f} {r['warm_start_s']:>10.2f} {r['rerun_s']:>12.2f} "
+              f"{r['refresh_s']:>14.2f} {sum(r['views_s'].values()):>9.2f} {r['peak_rss_mb']:>13.0f} "
+              f"{r['upstream_requests_cold']:>9}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            compare(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+# bench_historical_build.py
+"""Compare la construction de la table historique : ligne à ligne vs colonnes.
+
+Les historiques sont générés par le fournisseur synthétique (aucun accès
+réseau). Exemple :
+
+    python benchmarks/bench_historical_build.py --symbols 40 --period 10y
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_data import SyntheticProvider  # noqa: E402
+from price_data import build_historical_frame  # noqa: E402
+
+SECTEURS = ['Luxe', 'Énergie', 'Santé', 'Industrie', 'Consommation',
+            'Finance', 'Chimie', 'Technologie']
+
+
+def build_with_iterrows(histories, secteurs):
+    """Construction historique du dashboard : un dictionnaire par ligne"""
+    all_data = []
+    for ticker, hist in histories.items():
+        for date, row in hist.iterrows():
+            all_data.append({
+                'date': date,
+                'symbole': ticker,
+                'prix': row['Close'],
+                'volume': row['Volume'],
+                'secteur': secteurs[ticker],
+                'ouverture': row['Open'],
+                'plus_haut': row['High'],
+                'plus_bas': row['Low']
+            })
+    return pd.DataFrame(all_data)
+
+
+def measure(builder, histories, secteurs, repeat):
+    """Retourne le meilleur temps, le pic d'allocation et la taille du résultat"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        builder(histories, secteurs)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    frame = builder(histories, secteurs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'seconds': min(timings),
+        'peak_alloc_mb': peak / 1024 ** 2,
+        'frame_mb': frame.memory_usage(deep=True).sum() / 1024 ** 2,
+        'rows': len(frame),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=40)
+    parser.add_argument('--period', default='10y')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help="sortie JSON")
+    args = parser.parse_args()
+
+    provider = SyntheticProvider()
+    symbols = [f"SYM{i:03d}.PA" for i in range(args.symbols)]
+    histories = provider.download(symbols, period=args.period)
+    secteurs = {symbol: SECTEURS[i % len(SECTEURS)] for i, symbol in enumerate(symbols)}
+
+    results = {
+        'symbols': args.symbols,
+        'period': args.period,
+        'iterrows': measure(build_with_iterrows, histories, secteurs, args.repeat),
+        'columnar': measure(build_historical_frame, histories, secteurs, args.repeat),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{args.symbols} symboles x {args.period} ({results['columnar']['rows']} lignes)")
+    print(f"{'méthode':<10} {'temps (s)':>10} {'pic alloc (Mo)':>15} {'table (Mo)':>11}")
+    for name in ('iterrows', 'columnar'):
+        r = results[name]
+        print(f"{name:<10} {r['seconds']:>10.3f} {r['peak_alloc_mb']:>15.1f} {r['frame_mb']:>11.1f}")
+    speedup = results['iterrows']['seconds'] / results['columnar']['seconds']
+    print(f"accélération: x{speedup:.0f}")
+
+
+if __name__ == '__main__':
+    main()
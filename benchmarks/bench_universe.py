@@ -0,0 +1,100 @@
+# bench_universe.py
+"""Chargement et rafraîchissement du dashboard selon la taille de l'univers.
+
+Le dashboard est instancié sur des univers synthétiques servis par le
+fournisseur synthétique, avec une latence réseau simulée par requête.
+Trois temps sont mesurés pour chaque taille :
+
+- chargement à froid : historiques téléchargés, cache disque vide ;
+- chargement à chaud : historiques relus depuis le cache disque ;
+- rafraîchissement : nouvelles cotations de tout l'univers.
+
+Exemple :
+
+    python benchmarks/bench_universe.py --sizes 40 120 500 --latency 0.05
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import market_data  # noqa: E402
+from data_cache import get_shared_cache  # noqa: E402
+from market_data import SyntheticProvider  # noqa: E402
+from price_data import memory_footprint_mb  # noqa: E402
+from universe import synthetic_universe  # noqa: E402
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def measure(size, latency, period_root):
+    """Temps de chargement et de rafraîchissement pour un univers de ``size`` titres"""
+    from Dashboard import CAC40Dashboard
+
+    os.environ["CAC40_CACHE_DIR"] = os.path.join(period_root, str(size))
+    # L'exécuteur partagé est dimensionné par le premier univers qui le demande
+    market_data._executor = None
+    provider = SyntheticProvider(latency=latency)
+    universe = synthetic_universe(size)
+    cache = get_shared_cache()
+
+    def load():
+        dashboard = CAC40Dashboard(provider, universe)
+        dashboard.update_live_data()
+        return dashboard
+
+    cache.clear()
+    _, cold = timed(load)
+    cache.clear()
+    dashboard, warm = timed(load)
+    _, refresh = timed(lambda: dashboard.update_live_data(force=True))
+
+    return {
+        'symbols': size,
+        'fetch_workers': dashboard.fetcher.max_workers,
+        'cold_load_s': cold,
+        'warm_load_s': warm,
+        'refresh_s': refresh,
+        'history_rows': len(dashboard.historical_data),
+        'history_mb': memory_footprint_mb(dashboard.historical_data),
+        'matrix_mb': (dashboard.price_matrix.close.nbytes + dashboard.price_matrix.volume.nbytes +
+                      dashboard.price_matrix.high.nbytes + dashboard.price_matrix.low.nbytes) / 1024 ** 2,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[40, 120, 500])
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help="latence simulée par requête (s)")
+    parser.add_argument('--json', action='store_true', help="sortie JSON")
+    args = parser.parse_args()
+
+    # Le dashboard est importé hors de « streamlit run » : messages sans intérêt ici
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    with tempfile.TemporaryDirectory() as root:
+        results = [measure(size, args.latency, root) for size in args.sizes]
+
+    if args.json:
+        print(json.dumps({'latency': args.latency, 'results': results}, indent=2))
+        return
+
+    print(f"latence simulée: {args.latency * 1000:.0f} ms par requête")
+    print(f"{'titres':>6} {'workers':>8} {'froid (s)':>10} {'chaud (s)':>10} {'rafraîch. (s)':>14} "
+          f"{'lignes':>9} {'table (Mo)':>11} {'matrice (Mo)':>13}")
+    for r in results:
+        print(f"{r['symbols']:>6} {r['fetch_workers']:>8} {r['cold_load_s']:>10.2f} {r['warm_load_s']:>10.2f} "
+              f"{r['refresh_s']:>14.2f} {r['history_rows']:>9,} {r['history_mb']:>11.1f} {r['matrix_mb']:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
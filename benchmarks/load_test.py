@@ -0,0 +1,243 @@
+# load_test.py
+"""Test de charge : sessions concurrentes du dashboard, hors ligne.
+
+Chaque session est un ``AppTest`` exécutant ``Dashboard.py`` dans son
+propre thread, comme un analyste gardant le dashboard ouvert avec le
+rafraîchissement automatique : après un temps de réflexion, la session
+se réexécute, en changeant parfois de vue. Toutes les sessions partagent
+le processus, donc les caches et le planificateur de rafraîchissement,
+et sont servies par le fournisseur synthétique (latence simulée).
+
+Pour chaque nombre de sessions (un processus chacun) sont mesurés :
+
+- le débit (réexécutions par seconde) et les latences p50 / p99 ;
+- le nombre de threads du processus (moyen et maximal) ;
+- l'amplification des requêtes au fournisseur : requêtes émises pendant
+  la charge rapportées à celles d'un seul rafraîchissement de l'univers
+  par période de rafraîchissement. 1 signifie que les sessions se
+  partagent parfaitement chaque rafraîchissement ; N, qu'aucune ne
+  profite du cache des autres.
+
+Limites : les réexécutions sont complètes ; les rafraîchissements par
+fragment (``st.fragment(run_every=...)``) du navigateur ne sont pas
+exercés, ``AppTest`` ne les déclenchant pas. Le partage de l'état serveur
+entre sessions repose sur des éléments internes de Streamlit, vérifiés au
+démarrage (version testée : ``STREAMLIT_TESTED``).
+
+Exemple :
+
+    python benchmarks/load_test.py --sessions 1 5 10 20 --duration 30 --refresh 5
+"""
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_dashboard import VIEWS, upstream_requests  # noqa: E402
+
+# Version de Streamlit dont les éléments internes remplacés par share_server_state ont été vérifiés
+STREAMLIT_TESTED = "1.65"
+NOTE = ("réexécutions complètes uniquement : les rafraîchissements par fragment "
+        "(st.fragment run_every) ne sont pas exercés")
+
+
+def check_streamlit():
+    """Vérifie la présence des éléments internes de Streamlit remplacés par ``share_server_state``"""
+    import streamlit
+    from streamlit.runtime import Runtime
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    missing = [name for module, name in ((app_test, 'Runtime'), (app_test, 'ScriptCache'),
+                                         (local_script_runner, 'ScriptCache'), (Runtime, '_instance'))
+               if not hasattr(module, name)]
+    if missing:
+        raise SystemExit(f"Streamlit {streamlit.__version__} non pris en charge par le test de charge "
+                         f"(testé avec {STREAMLIT_TESTED}) : {', '.join(missing)} introuvable(s)")
+    if not streamlit.__version__.startswith(STREAMLIT_TESTED + "."):
+        print(f"attention : Streamlit {streamlit.__version__}, test de charge vérifié avec "
+              f"{STREAMLIT_TESTED}", file=sys.stderr)
+    return streamlit.__version__
+
+
+def share_server_state():
+    """État de serveur unique pour toutes les sessions du processus.
+
+    ``AppTest`` crée à chaque exécution un runtime global, un cache de
+    scripts compilés et l'option ``global.appTest``, puis les retire à la
+    fin, ce qui interromprait les exécutions concurrentes. Comme sur un vrai
+    serveur, toutes les sessions partagent ici le premier runtime installé
+    et un cache de scripts unique, et l'option reste active.
+    """
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    class SharedRuntimeType(type):
+        def __setattr__(cls, name, value):
+            if name != '_instance':
+                super().__setattr__(name, value)
+            elif value is not None and Runtime._instance is None:
+                Runtime._instance = value
+
+    app_test.Runtime = SharedRuntimeType('SharedRuntime', (Runtime,), {})
+    # Script compilé une fois, avant les sessions (ast n'est pas sûr entre threads en 3.11)
+    script_cache = ScriptCache()
+    script_cache.get_bytecode(os.path.join(ROOT, "Dashboard.py"))
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+    config.set_option("global.appTest", True)
+
+
+def session_loop(index, think, barrier, stop, latencies, errors):
+    """Une session : exécution initiale puis réexécutions jusqu'à ``stop``"""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(index)
+    app = AppTest.from_file(os.path.join(ROOT, "Dashboard.py"), default_timeout=600)
+    app.run()
+    barrier.wait()
+    while not stop.wait(rng.uniform(0.5, 1.5) * think):
+        if rng.random() < 0.2:
+            app.radio(key="vue_principale").set_value(rng.choice(list(VIEWS)))
+        start = time.perf_counter()
+        app.run()
+        latencies.append(time.perf_counter() - start)
+        if app.exception:
+            errors.append(app.exception[0].value)
+
+
+def measure(sessions, duration, think, refresh):
+    """Charge de ``sessions`` sessions concurrentes dans le processus courant"""
+    import plotly.express  # noqa: F401
+    from streamlit.testing.v1 import AppTest
+
+    import market_data
+
+    check_streamlit()
+    share_server_state()
+    # Coût de référence : un rafraîchissement forcé de l'univers, hors charge
+    app = AppTest.from_file(os.path.join(ROOT, "Dashboard.py"), default_timeout=600)
+    app.run()
+    before = upstream_requests()
+    app.sidebar.button[0].click().run()
+    per_refresh = upstream_requests() - before
+
+    latencies, errors = [], []
+    barrier = threading.Barrier(sessions + 1)
+    stop = threading.Event()
+    threads = [threading.Thread(target=session_loop, daemon=True,
+                                args=(i, think, barrier, stop, latencies, errors))
+               for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    # Les sessions démarrent ensemble, une fois leur première exécution terminée
+    barrier.wait()
+    start = time.monotonic()
+    requests_start = upstream_requests()
+
+    counts = []
+    while time.monotonic() < start + duration:
+        counts.append(threading.active_count())
+        time.sleep(0.2)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+    requests = upstream_requests() - requests_start
+
+    periods = max(1, math.ceil(elapsed / refresh))
+    ms = np.array(latencies) * 1000
+    return {
+        'sessions': sessions,
+        'duration_s': elapsed,
+        'reruns': len(latencies),
+        'errors': len(errors),
+        'throughput_rps': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(ms, 50)) if len(ms) else math.nan,
+        'p99_ms': float(np.percentile(ms, 99)) if len(ms) else math.nan,
+        'threads_mean': float(np.mean(counts)),
+        'threads_max': int(max(counts)),
+        'fetch_workers': market_data._executor.max_workers if market_data._executor else None,
+        'upstream_requests': requests,
+        'requests_per_refresh': per_refresh,
+        'amplification': requests / (periods * per_refresh) if per_refresh else math.nan,
+    }
+
+
+def run_child(sessions, args, root):
+    """Mesure ``sessions`` dans un sous-processus : caches et threads propres à chaque niveau"""
+    from universe import synthetic_universe
+
+    universe = synthetic_universe(args.symbols)
+    path = os.path.join(root, "univers.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'nom': universe.name, 'libelle': universe.label, 'version': universe.version,
+                   'membres': universe.members}, f, ensure_ascii=False)
+
+    env = dict(os.environ,
+               CAC40_PROVIDER="synthetic",
+               CAC40_SYNTH_LATENCY=str(args.latency),
+               CAC40_UNIVERSE=path,
+               CAC40_REFRESH_SECONDS=str(args.refresh),
+               CAC40_CACHE_DIR=os.path.join(root, f"cache{sessions}"))
+    command = [sys.executable, os.path.abspath(__file__), '--child', str(sessions),
+               '--duration', str(args.duration), '--think', str(args.think), '--refresh', str(args.refresh)]
+    out = subprocess.run(command, env=env, check=True, stdout=subprocess.PIPE,
+                         stderr=None if args.verbose else subprocess.DEVNULL, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 5, 10, 20])
+    parser.add_argument('--symbols', type=int, default=40)
+    parser.add_argument('--duration', type=float, default=30, help="durée de la charge (s)")
+    parser.add_argument('--think', type=float, default=1.0,
+                        help="temps moyen entre deux réexécutions d'une session (s)")
+    parser.add_argument('--refresh', type=int, default=5,
+                        help="période de rafraîchissement des cotations (s)")
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help="latence simulée par requête (s)")
+    parser.add_argument('--output', help="fichier JSON des résultats")
+    parser.add_argument('--verbose', action='store_true', help="affiche les messages des exécutions")
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        print(json.dumps(measure(args.child, args.duration, args.think, args.refresh)))
+        return
+
+    version = check_streamlit()
+    with tempfile.TemporaryDirectory() as root:
+        results = [run_child(sessions, args, root) for sessions in args.sessions]
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'symbols': args.symbols, 'latency': args.latency, 'refresh': args.refresh,
+                       'think': args.think, 'streamlit': version, 'note': NOTE,
+                       'results': results}, f, indent=2, ensure_ascii=False)
+
+    print(f"{args.symbols} titres, latence simulée {args.latency * 1000:.0f} ms, "
+          f"rafraîchissement toutes les {args.refresh} s, réflexion {args.think} s")
+    print(f"{'sessions':>8} {'réexéc.':>8} {'débit (/s)':>11} {'p50 (ms)':>9} {'p99 (ms)':>9} "
+          f"{'threads':>8} {'requêtes':>9} {'amplif.':>8} {'erreurs':>8}")
+    for r in results:
+        print(f"{r['sessions']:>8} {r['reruns']:>8} {r['throughput_rps']:>11.1f} {r['p50_ms']:>9.0f} "
+              f"{r['p99_ms']:>9.0f} {r['threads_max']:>8} {r['upstream_requests']:>9} "
+              f"{r['amplification']:>8.2f} {r['errors']:>8}")
+    print(f"Streamlit {version} ; {NOTE}")
+
+
+if __name__ == '__main__':
+    main()
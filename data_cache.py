@@ -0,0 +1,188 @@
+# data_cache.py
+"""Cache mémoire partagé entre toutes les sessions Streamlit du processus.
+
+Les DataFrames coûteux (historiques, cotations, agrégats sectoriels) sont
+calculés une seule fois puis servis à toutes les sessions jusqu'à leur
+expiration. La durée de vie dépend de la classe de données :
+
+- ``quotes`` : cotations, 60 secondes ;
+- ``fondamentaux`` : informations fondamentales, 24 heures ;
+- ``historique`` : barres journalières, jusqu'à la prochaine clôture.
+
+Les entrées les moins récemment utilisées sont évincées lorsque le nombre
+d'entrées ou la mémoire occupée dépasse les limites configurées.
+"""
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from market_data import MARKET_TZ
+
+MARKET_CLOSE = (17, 35)
+
+
+def seconds_until_next_close(now=None):
+    """Nombre de secondes jusqu'à la prochaine clôture d'Euronext Paris"""
+    now = pd.Timestamp.now(tz=MARKET_TZ) if now is None else now
+    close = now.normalize() + pd.Timedelta(hours=MARKET_CLOSE[0], minutes=MARKET_CLOSE[1])
+    if close <= now:
+        close += pd.Timedelta(days=1)
+    while close.weekday() >= 5:
+        close += pd.Timedelta(days=1)
+    return (close - now).total_seconds()
+
+
+DEFAULT_TTLS = {
+    'quotes': 60,
+    'fondamentaux': 24 * 3600,
+    'historique': seconds_until_next_close,
+}
+
+
+def estimate_size(value):
+    """Estime l'empreinte mémoire d'une valeur mise en cache, en octets"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    nbytes = getattr(value, 'nbytes', None)
+    if nbytes is not None:
+        return int(nbytes)
+    return sys.getsizeof(value)
+
+
+class _Entry:
+    __slots__ = ('value', 'expires', 'size')
+
+    def __init__(self, value, expires, size):
+        self.value = value
+        self.expires = expires
+        self.size = size
+
+
+class SharedDataCache:
+    """Cache LRU thread-safe avec durée de vie par classe de données.
+
+    ``get_or_compute`` garantit qu'une seule session calcule une clé donnée
+    à la fois : les sessions concurrentes attendent le résultat au lieu de
+    multiplier les requêtes vers le fournisseur.
+    """
+
+    def __init__(self, max_bytes=512 * 1024 ** 2, max_entries=256, ttls=None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._key_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _ttl(self, data_class):
+        ttl = self.ttls[data_class]
+        return ttl() if callable(ttl) else ttl
+
+    def get(self, key, default=None):
+        """Retourne la valeur associée à ``key`` si elle n'a pas expiré"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if entry.expires <= time.monotonic():
+                self._remove(key)
+                return default
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def set(self, key, value, data_class, ttl=None):
+        """Stocke ``value`` avec la durée de vie de ``data_class`` (ou ``ttl`` secondes)"""
+        ttl = self._ttl(data_class) if ttl is None else ttl
+        entry = _Entry(value, time.monotonic() + ttl, estimate_size(value))
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self._evict()
+
+    def get_or_compute(self, key, data_class, compute):
+        """Retourne la valeur en cache ou la calcule une seule fois pour toutes les sessions"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            self._count_hit()
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # Une autre session a pu calculer la valeur pendant l'attente
+            value = self.get(key, missing)
+            if value is not missing:
+                self._count_hit()
+                return value
+            with self._lock:
+                self.misses += 1
+            value = compute()
+            self.set(key, value, data_class)
+            return value
+
+    def _count_hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _evict(self):
+        while self._entries and (self._bytes > self.max_bytes or
+                                 len(self._entries) > self.max_entries):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_shared_cache():
+    """Retourne le cache partagé par toutes les sessions du processus"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SharedDataCache(
+                max_bytes=int(float(os.environ.get("CAC40_CACHE_MAX_MB", "512")) * 1024 ** 2),
+            )
+        return _cache
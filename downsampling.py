@@ -0,0 +1,76 @@
+# downsampling.py
+"""Réduction des séries de prix au budget de points d'un graphique.
+
+Un graphique de quelques centaines de pixels de large ne peut afficher
+qu'autant de points distincts : au-delà, chaque point supplémentaire
+alourdit la page et le rendu sans rien montrer de plus. Les séries longues
+sont donc décimées côté serveur par l'algorithme *largest-triangle-three-
+buckets* (LTTB), qui conserve les points saillants (pics, creux) de
+chaque segment, puis tracées en WebGL (``Scattergl``).
+
+Le budget est donné par ``CAC40_CHART_POINTS`` (1000 par défaut).
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+POINT_BUDGET = int(os.environ.get("CAC40_CHART_POINTS", "1000"))
+
+
+def lttb(x, y, threshold):
+    """Positions des ``threshold`` points retenus par LTTB (toutes si la série est plus courte).
+
+    Le premier et le dernier point sont toujours conservés ; entre les
+    deux, chaque segment retient le point formant le plus grand triangle
+    avec le point retenu précédent et la moyenne du segment suivant.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype('int64')
+    selected = np.empty(threshold, dtype='int64')
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for k in range(threshold - 2):
+        start, end = edges[k], edges[k + 1]
+        following = slice(end, edges[k + 2]) if k + 2 < len(edges) else slice(n - 1, n)
+        next_x, next_y = x[following].mean(), y[following].mean()
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a]) -
+                      (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[k + 1] = a
+    return selected
+
+
+def _positions(x):
+    """Abscisses numériques (nanosecondes pour des dates)"""
+    if isinstance(x, pd.Series):
+        x = x.to_numpy()
+    if isinstance(x, pd.DatetimeIndex) or np.issubdtype(np.asarray(x).dtype, np.datetime64):
+        return pd.DatetimeIndex(x).asi8.astype('float64')
+    return np.asarray(x, dtype='float64')
+
+
+def decimate(x, y, budget=None):
+    """Points ``(x, y)`` de la série réduits à ``budget`` points, valeurs manquantes écartées"""
+    budget = POINT_BUDGET if budget is None else budget
+    x = pd.Index(x)
+    y = np.asarray(y, dtype='float64')
+    finite = np.isfinite(y)
+    x, y = x[finite], y[finite]
+    keep = lttb(_positions(x), y, budget)
+    return x[keep], y[keep]
+
+
+def line_trace(x, y, budget=None, **kwargs):
+    """Trace linéaire d'une série, décimée et en WebGL au-delà du budget de points"""
+    budget = POINT_BUDGET if budget is None else budget
+    length = np.count_nonzero(np.isfinite(np.asarray(y, dtype='float64')))
+    x, y = decimate(x, y, budget)
+    trace = go.Scattergl if length > budget else go.Scatter
+    return trace(x=x, y=y, mode='lines', **kwargs)
@@ -0,0 +1,113 @@
+# figure_cache.py
+"""Cache des figures Plotly partagé entre sessions.
+
+Une figure est identifiée par son identifiant, la version des données dont
+elle dérive et les paramètres des widgets qui la pilotent : tant qu'aucun
+des trois ne change, la figure construite est réutilisée telle quelle au
+lieu d'être reconstruite à chaque réexécution.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from instrumentation import get_metrics
+
+
+def frame_version(data):
+    """Version d'un DataFrame indexé par date : nombre de lignes et bornes de l'index"""
+    if data is None or len(data) == 0:
+        return (0,)
+    return (len(data), str(data.index[0]), str(data.index[-1]))
+
+
+class SerializedFigure(go.Figure):
+    """Figure figée dans sa forme sérialisée, destinée au seul affichage.
+
+    ``st.plotly_chart`` convertit la figure par ``to_dict()`` à chaque
+    réexécution, ce qui recopie et revalide toutes les traces. Ici le
+    dictionnaire et son JSON sont calculés une fois, à la construction, et
+    ``to_dict()`` renvoie ce dictionnaire sans copie : il ne reste à
+    Streamlit que l'encodage. Les propriétés Plotly de l'objet restent vides ;
+    la figure ne doit plus être modifiée.
+    """
+
+    def __init__(self, fig):
+        super().__init__()
+        self._payload = fig.to_dict()
+        self._json = pio.to_json(self._payload, validate=False)
+
+    def to_dict(self):
+        return self._payload
+
+    @property
+    def nbytes(self):
+        return len(self._json)
+
+
+class FigureCache:
+    """Cache LRU de figures, borné en nombre d'entrées et en taille sérialisée.
+
+    Les figures sont conservées sous forme sérialisée (``SerializedFigure``) ;
+    leur taille est celle de ce JSON, calculé une fois à l'insertion.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 ** 2):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, fig_id, version, build, **params):
+        """Retourne la figure en cache ou la construit avec ``build()``"""
+        key = (fig_id, version, tuple(sorted(params.items())))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        start = time.perf_counter()
+        fig = SerializedFigure(build())
+        get_metrics().observe('figure_build', time.perf_counter() - start, figure=fig_id)
+        size = fig.nbytes
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (fig, size)
+                self._bytes += size
+                while self._entries and (self._bytes > self.max_bytes or
+                                         len(self._entries) > self.max_entries):
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._bytes -= evicted
+        return fig
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+_figures = None
+_figures_lock = threading.Lock()
+
+
+def get_figure_cache():
+    """Retourne le cache de figures partagé par toutes les sessions du processus"""
+    global _figures
+    with _figures_lock:
+        if _figures is None:
+            _figures = FigureCache(
+                max_bytes=int(float(os.environ.get("CAC40_FIGURE_CACHE_MB", "64")) * 1024 ** 2),
+            )
+        return _figures
@@ -0,0 +1,136 @@
+# fundamentals.py
+"""Stockage des données fondamentales (``Ticker.info``).
+
+``info`` est de loin la requête la plus lente du fournisseur alors que ses
+valeurs (nombre de titres, capitalisation, rendement) ne changent qu'une
+fois par jour au plus. Elles sont donc tenues à part des cotations :
+
+- préchargement groupé de tout l'univers au démarrage ;
+- durée de vie d'une journée, persistée sur disque (``fondamentaux.json``)
+  pour survivre aux redémarrages ;
+- au-delà, la valeur périmée est servie immédiatement et revalidée en
+  arrière-plan (*stale-while-revalidate*) : un rafraîchissement des
+  cotations n'attend jamais ``info`` ;
+- un symbole dont la requête a échoué n'est redemandé qu'après
+  ``RETRY_SECONDS``.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+from data_cache import DEFAULT_TTLS
+from history_store import DEFAULT_ROOT, replace_file
+
+logger = logging.getLogger(__name__)
+
+# Champs de ``Ticker.info`` conservés
+FUNDAMENTAL_FIELDS = ('marketCap', 'sharesOutstanding', 'dividendYield', 'beta', 'currency')
+
+# Délai avant de redemander un symbole dont la requête a échoué (secondes)
+RETRY_SECONDS = 300
+
+
+class FundamentalsStore:
+    """Données fondamentales par symbole, avec durée de vie et revalidation en arrière-plan"""
+
+    def __init__(self, provider, fetcher, root=None, ttl=None):
+        self.provider = provider
+        self.fetcher = fetcher
+        root = root or os.environ.get("CAC40_CACHE_DIR", DEFAULT_ROOT)
+        self.path = os.path.join(root, provider.name, "fondamentaux.json")
+        self.ttl = DEFAULT_TTLS['fondamentaux'] if ttl is None else ttl
+        self._lock = threading.Lock()
+        # Un seul lot de symboles manquants à la fois : les sessions concurrentes l'attendent
+        self._fetch_lock = threading.Lock()
+        # Écritures du fichier sérialisées entre get_many et les revalidations
+        self._save_lock = threading.Lock()
+        self._entries = self._load()
+        self._refreshing = set()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        def write(tmp):
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, indent=1, sort_keys=True)
+
+        with self._save_lock:
+            with self._lock:
+                entries = dict(self._entries)
+            try:
+                replace_file(self.path, write)
+            except OSError:
+                logger.exception("Échec de l'écriture de %s", self.path)
+
+    def _fresh(self, entry):
+        now = time.time()
+        return now - entry['date'] < self.ttl or now - entry.get('echec', 0) < RETRY_SECONDS
+
+    def fetch(self, symbols):
+        """Interroge le fournisseur pour ``symbols`` en parallèle et enregistre les résultats"""
+        fetch = self.fetcher.map(self.provider.info, symbols)
+        now = time.time()
+        with self._lock:
+            for symbol, info in fetch.results.items():
+                values = {field: (info or {}).get(field) for field in FUNDAMENTAL_FIELDS}
+                self._entries[symbol] = {'date': now, 'valeurs': values}
+            for symbol in fetch.errors:
+                # Échec : dernières valeurs connues (ou aucune) conservées, nouvel essai après RETRY_SECONDS
+                entry = self._entries.get(symbol, {'date': 0, 'valeurs': {}})
+                self._entries[symbol] = dict(entry, echec=now)
+        if fetch.results:
+            self._save()
+        return fetch
+
+    def get_many(self, symbols):
+        """Fondamentaux de ``symbols`` (``{symbole: {champ: valeur}}``).
+
+        Seuls les symboles jamais chargés sont attendus, en un seul lot ;
+        les valeurs périmées sont retournées telles quelles et revalidées
+        en arrière-plan. Appelée au démarrage, elle précharge l'univers.
+        """
+        with self._fetch_lock:
+            with self._lock:
+                missing = [s for s in symbols if s not in self._entries]
+            if missing:
+                self.fetch(missing)
+
+        with self._lock:
+            stale = [s for s in symbols if s in self._entries and not self._fresh(self._entries[s])
+                     and s not in self._refreshing]
+            self._refreshing.update(stale)
+            values = {s: self._entries[s]['valeurs'] for s in symbols if s in self._entries}
+        if stale:
+            threading.Thread(target=self._revalidate, args=(stale,),
+                             name="cac40-fondamentaux", daemon=True).start()
+        return values
+
+    def _revalidate(self, symbols):
+        try:
+            self.fetch(symbols)
+        except Exception:
+            logger.exception("Échec de la revalidation des fondamentaux")
+        finally:
+            with self._lock:
+                self._refreshing.difference_update(symbols)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_fundamentals_store(provider, fetcher):
+    """Retourne le stockage des fondamentaux partagé par les sessions, par fournisseur"""
+    root = os.environ.get("CAC40_CACHE_DIR", DEFAULT_ROOT)
+    with _stores_lock:
+        store = _stores.get((provider.name, root))
+        if store is None:
+            store = _stores[(provider.name, root)] = FundamentalsStore(provider, fetcher, root)
+        return store
@@ -0,0 +1,218 @@
+# history_store.py
+"""Stockage persistant des historiques OHLCV.
+
+Chaque série (symbole, intervalle) est écrite une fois sur disque au format
+Parquet (ou pickle si aucun moteur Parquet n'est installé). Les
+rafraîchissements ne téléchargent ensuite que les barres postérieures à la
+dernière barre stockée, en une seule requête groupée pour tous les symboles.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+
+import pandas as pd
+
+from market_data import market_timestamp, period_start
+
+try:
+    import pyarrow  # noqa: F401
+    DEFAULT_FORMAT = 'parquet'
+except ImportError:
+    DEFAULT_FORMAT = 'pickle'
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROOT = os.path.join(os.path.expanduser("~"), ".cache", "dashboard_cac40")
+
+# Délai minimal entre deux rafraîchissements incrémentaux d'une même série
+REFRESH_INTERVALS = {
+    '1d': pd.Timedelta(minutes=15),
+    '1wk': pd.Timedelta(hours=1),
+    '1mo': pd.Timedelta(hours=6),
+}
+
+
+def replace_file(path, write):
+    """Écrit ``path`` de façon atomique : ``write(tmp)`` dans un fichier temporaire unique, puis renommage"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class HistoryStore:
+    """Cache disque des historiques, indexé par symbole et intervalle.
+
+    Un manifeste (``manifest.json``) mémorise pour chaque série la date de
+    début demandée et l'heure de la dernière mise à jour : une série est
+    considérée couverte si elle a été téléchargée depuis une date antérieure
+    ou égale au début de la période demandée.
+
+    Les sessions d'un processus partagent une même instance
+    (``get_history_store``), dont le verrou protège le manifeste.
+    """
+
+    def __init__(self, provider, root=None, fmt=None):
+        self.provider = provider
+        root = root or os.environ.get("CAC40_CACHE_DIR", DEFAULT_ROOT)
+        # Un répertoire par fournisseur : on ne mélange pas données réelles et synthétiques
+        self.root = os.path.join(root, provider.name)
+        self.fmt = fmt or DEFAULT_FORMAT
+        self._lock = threading.RLock()
+        self._manifest = None
+
+    # -- Fichiers -------------------------------------------------------
+
+    def path(self, symbol, interval):
+        extension = 'parquet' if self.fmt == 'parquet' else 'pkl'
+        filename = symbol.replace('/', '_')
+        return os.path.join(self.root, interval, f"{filename}.{extension}")
+
+    def _manifest_path(self):
+        return os.path.join(self.root, "manifest.json")
+
+    def _load_manifest(self):
+        if self._manifest is None:
+            try:
+                with open(self._manifest_path(), encoding='utf-8') as f:
+                    self._manifest = json.load(f)
+            except (OSError, ValueError):
+                self._manifest = {}
+        return self._manifest
+
+    def _save_manifest(self):
+        def write(tmp):
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._manifest, f, indent=1, sort_keys=True)
+        replace_file(self._manifest_path(), write)
+
+    def load(self, symbol, interval="1d"):
+        """Lit la série stockée, ou ``None`` si elle est absente ou illisible"""
+        path = self.path(symbol, interval)
+        if not os.path.exists(path):
+            return None
+        try:
+            if self.fmt == 'parquet':
+                return pd.read_parquet(path)
+            return pd.read_pickle(path)
+        except Exception:
+            return None
+
+    def save(self, symbol, interval, hist):
+        """Écrit la série de façon atomique (fichier temporaire puis renommage)"""
+        replace_file(self.path(symbol, interval),
+                     hist.to_parquet if self.fmt == 'parquet' else hist.to_pickle)
+
+    # -- Lecture avec rafraîchissement ----------------------------------
+
+    def get(self, symbol, period="1y", interval="1d"):
+        """Retourne l'historique d'un symbole sur la période demandée"""
+        return self.get_many([symbol], period=period, interval=interval).get(
+            symbol, pd.DataFrame())
+
+    def get_many(self, symbols, period="1y", interval="1d"):
+        """Retourne les historiques de plusieurs symboles sur la période demandée.
+
+        Les séries absentes ou ne couvrant pas la période sont téléchargées
+        entièrement ; les autres ne reçoivent que les barres manquantes.
+        Si ce complément échoue, les séries stockées sont servies telles
+        quelles et restent à rafraîchir à l'appel suivant ; les symboles dont
+        le téléchargement complet échoue sont omis.
+        """
+        now = pd.Timestamp.now(tz="UTC")
+        start = period_start(period)
+        refresh_interval = REFRESH_INTERVALS.get(interval, pd.Timedelta(minutes=15))
+
+        with self._lock:
+            manifest = self._load_manifest()
+            frames = {}
+            full, delta = [], []
+
+            for symbol in symbols:
+                entry = manifest.get(f"{symbol}|{interval}")
+                stored = self.load(symbol, interval) if entry and self._covers(entry, start) else None
+                if stored is None or stored.empty:
+                    full.append(symbol)
+                    continue
+
+                frames[symbol] = stored
+                if now - pd.Timestamp(entry['maj']) >= refresh_interval:
+                    delta.append(symbol)
+
+            if full:
+                try:
+                    fetched = self.provider.download(full, period=period, interval=interval)
+                except Exception:
+                    logger.warning("Échec du téléchargement de %d historique(s)", len(full), exc_info=True)
+                    fetched = {}
+                for symbol, hist in fetched.items():
+                    if hist is None or hist.empty:
+                        continue
+                    frames[symbol] = hist
+                    self._record(symbol, interval, hist, start, now)
+
+            if delta:
+                # Une seule requête depuis la plus ancienne dernière barre ;
+                # la dernière barre stockée est rechargée car elle pouvait être incomplète
+                since = min(frames[symbol].index[-1] for symbol in delta)
+                try:
+                    fetched = self.provider.download(delta, interval=interval,
+                                                     start=since.strftime('%Y-%m-%d'))
+                except Exception:
+                    # Séries stockées servies en l'état ; leur date de mise à jour est conservée
+                    logger.warning("Échec du rafraîchissement de %d historique(s)", len(delta), exc_info=True)
+                    fetched, delta = {}, []
+                for symbol in delta:
+                    hist = fetched.get(symbol)
+                    if hist is not None and not hist.empty:
+                        merged = pd.concat([frames[symbol], hist])
+                        merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+                        frames[symbol] = merged
+                    entry = manifest[f"{symbol}|{interval}"]
+                    self._record(symbol, interval, frames[symbol],
+                                 market_timestamp(entry['debut']) if entry.get('debut') else None,
+                                 now)
+
+            if full or delta:
+                self._save_manifest()
+
+        if start is not None:
+            frames = {symbol: hist[hist.index >= start.normalize()]
+                      for symbol, hist in frames.items()}
+        return frames
+
+    @staticmethod
+    def _covers(entry, start):
+        """Indique si la série stockée remonte au moins jusqu'à ``start``"""
+        if entry.get('debut') is None:
+            return True
+        return start is not None and market_timestamp(entry['debut']) <= start
+
+    def _record(self, symbol, interval, hist, start, now):
+        self.save(symbol, interval, hist)
+        self._manifest[f"{symbol}|{interval}"] = {
+            'debut': start.isoformat() if start is not None else None,
+            'maj': now.isoformat(),
+        }
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_history_store(provider):
+    """Retourne le stockage des historiques partagé par les sessions, par fournisseur"""
+    root = os.environ.get("CAC40_CACHE_DIR", DEFAULT_ROOT)
+    with _stores_lock:
+        store = _stores.get((provider.name, root))
+        if store is None:
+            store = _stores[(provider.name, root)] = HistoryStore(provider, root)
+        return store
@@ -0,0 +1,132 @@
+# index_calculator.py
+"""Recalcul du niveau de l'indice à partir de ses composantes.
+
+Le CAC 40 est un indice pondéré par les capitalisations flottantes
+plafonnées : son niveau est ``Σ nᵢ·pᵢ / diviseur``, où ``nᵢ`` est le
+nombre de titres retenu (flottant, plafonnement) de chaque composante.
+Les poids ``poids_cac40`` étant exprimés dans cette pondération, les
+nombres de titres s'en déduisent à une date de calage : ``nᵢ = wᵢ / pᵢ``,
+et le diviseur ramène le niveau à celui de l'indice publié ce jour-là.
+
+Le niveau courant s'obtient alors en un seul produit scalaire, et chaque
+nouvelle cotation ne le modifie que de ``nᵢ·Δpᵢ / diviseur``.
+
+Sans poids publiés, ``index_weights`` les déduit des capitalisations :
+corrigées du flottant, plafonnées à ``WEIGHT_CAP`` % chacune.
+"""
+import math
+
+import numpy as np
+
+from price_data import normalize_dates
+
+# Poids maximal d'une composante (%), comme pour le CAC 40
+WEIGHT_CAP = 15.0
+
+
+def index_weights(market_caps, float_factors=None, cap=WEIGHT_CAP):
+    """Poids d'indice (%) déduits des capitalisations flottantes, plafonnés à ``cap``.
+
+    L'excédent d'une composante plafonnée est réparti entre les autres au
+    prorata de leur capitalisation. Sans capitalisation exploitable (toutes
+    nulles ou manquantes), les composantes sont équipondérées.
+    """
+    caps = np.asarray(market_caps, dtype='float64')
+    if float_factors is not None:
+        caps = caps * np.asarray(float_factors, dtype='float64')
+    caps = np.where(np.isfinite(caps) & (caps > 0), caps, 0.0)
+    if not len(caps):
+        return caps
+    if caps.sum() == 0:
+        return np.full(len(caps), 100.0 / len(caps))
+
+    weights = caps / caps.sum() * 100
+    capped = np.zeros(len(caps), dtype=bool)
+    # Plafond inapplicable si les composantes cotées sont trop peu nombreuses
+    while cap * np.count_nonzero(caps) > 100 and (weights > cap + 1e-9).any():
+        capped |= weights > cap
+        free = caps * ~capped
+        weights = np.where(capped, cap, free / free.sum() * (100 - cap * capped.sum()))
+    return weights
+
+
+class IndexCalculator:
+    """Niveau d'indice pondéré, calé sur une date de référence.
+
+    ``units`` donne le nombre de titres retenu de chaque symbole et
+    ``prices`` les cours de la date de calage, utilisés pour une
+    composante dont le cours courant manque. ``deviation`` est l'écart
+    (%) constaté avec l'indice publié hors de la date de calage.
+    """
+
+    def __init__(self, symbols, units, prices, divisor, calibration_date=None, deviation=np.nan):
+        self.symbols = list(symbols)
+        self.position = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.units = np.asarray(units, dtype='float64')
+        self.prices = np.asarray(prices, dtype='float64')
+        self.divisor = float(divisor)
+        self.calibration_date = calibration_date
+        self.deviation = deviation
+
+    @classmethod
+    def from_weights(cls, symbols, weights, prices, level, **kwargs):
+        """Calage sur des poids d'indice et les cours de la même date, au niveau ``level``.
+
+        Lève ``ValueError`` si aucune composante n'a à la fois un cours et
+        un poids non nul.
+        """
+        weights = np.asarray(weights, dtype='float64')
+        prices = np.asarray(prices, dtype='float64')
+        valid = np.isfinite(prices) & (prices > 0) & np.isfinite(weights)
+        total = weights[valid].sum()
+        if not total > 0:
+            raise ValueError("Calage de l'indice impossible : aucune composante avec un cours et un poids")
+        units = np.where(valid, weights / np.where(valid, prices, 1.0), 0.0)
+        return cls(symbols, units, np.where(valid, prices, 0.0), total / level, **kwargs)
+
+    @classmethod
+    def calibrate(cls, matrix, weights, reference):
+        """Calage sur la dernière séance commune à ``matrix`` et à l'indice publié ``reference``.
+
+        La séance commune précédente sert de contrôle : ``deviation``
+        mesure l'écart entre le niveau recalculé et le niveau publié.
+        Retourne ``None`` sans séance commune ou sans poids exploitables.
+        """
+        reference = reference.dropna()
+        if matrix.empty or reference.empty:
+            return None
+        closes = matrix.frame('close').astype('float64')
+        closes.index = closes.index.normalize()
+        reference = reference.groupby(normalize_dates(reference.index).normalize()).last()
+        common = closes.index.intersection(reference.index)
+        complete = common[closes.loc[common].notna().all(axis=1).to_numpy()]
+        dates = complete if len(complete) else common
+        if not len(dates):
+            return None
+
+        date = dates[-1]
+        try:
+            calculator = cls.from_weights(matrix.symbols, weights, closes.loc[date].to_numpy(),
+                                          reference.loc[date], calibration_date=date)
+        except ValueError:
+            return None
+        if len(dates) > 1:
+            previous = dates[-2]
+            level = calculator.level(closes.loc[previous].to_numpy())
+            calculator.deviation = (level / reference.loc[previous] - 1) * 100
+        return calculator
+
+    def aligned(self, symbols):
+        """Nombres de titres et cours de calage dans l'ordre de ``symbols``"""
+        index = np.array([self.position.get(symbol, -1) for symbol in symbols], dtype='int64')
+        known = index >= 0
+        units = np.where(known, self.units[index], 0.0)
+        prices = np.where(known, self.prices[index], 0.0)
+        return units, prices
+
+    def level(self, prices):
+        """Niveau de l'indice pour des cours alignés sur ``symbols`` (NaN sans diviseur)"""
+        if not self.divisor:
+            return math.nan
+        prices = np.asarray(prices, dtype='float64')
+        return float(self.units @ np.where(np.isfinite(prices), prices, self.prices)) / self.divisor
@@ -0,0 +1,383 @@
+# indicators.py
+"""Indicateurs techniques : calcul vectorisé et mise à jour incrémentale.
+
+Les mêmes indicateurs sont disponibles sous deux formes équivalentes :
+
+- ``compute_indicators`` les calcule d'un coup pour tous les symboles de
+  la matrice de prix (séries dates × symboles) ;
+- ``IndicatorSet`` en tient l'état pour un symbole et l'avance barre par
+  barre en temps constant (fenêtres glissantes à sommes courantes,
+  moyennes exponentielles récursives). ``IndicatorEngine`` regroupe ces
+  états pour tout l'univers et n'intègre que les barres nouvelles, la
+  dernière barre intégrée (séance en cours) étant révisée.
+
+Moyennes exponentielles, RSI et ATR suivent la convention récursive
+(``ewm(adjust=False)``), initialisée sur la première valeur.
+"""
+import math
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+SMA_WINDOWS = (20, 50)
+EMA_SPAN = 20
+RSI_PERIOD = 14
+BOLLINGER_WINDOW = 20
+BOLLINGER_WIDTH = 2
+ATR_PERIOD = 14
+VOLATILITY_WINDOW = 20
+TRADING_DAYS = 252
+
+INDICATORS = ['MA20', 'MA50', 'EMA20', 'RSI14', 'bollinger_haut', 'bollinger_bas',
+              'ATR14', 'volatilite_20j']
+
+
+# --- Calcul vectorisé (Series ou DataFrame dates × symboles) ---
+
+def sma(close, window):
+    return close.rolling(window).mean()
+
+
+def ema(close, span):
+    return close.ewm(span=span, adjust=False, min_periods=span).mean()
+
+
+def wilder(values, period):
+    """Moyenne lissée de Wilder (exponentielle de coefficient 1 / ``period``)"""
+    return values.ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
+
+
+def rsi(close, period=RSI_PERIOD):
+    delta = close.diff()
+    gain = wilder(delta.clip(lower=0), period)
+    loss = wilder((-delta).clip(lower=0), period)
+    return 100 - 100 / (1 + gain / loss)
+
+
+def bollinger(close, window=BOLLINGER_WINDOW, width=BOLLINGER_WIDTH):
+    """Bandes de Bollinger (haute, basse)"""
+    mean = close.rolling(window).mean()
+    std = close.rolling(window).std()
+    return mean + width * std, mean - width * std
+
+
+def true_range(high, low, close):
+    previous = close.shift()
+    # fmax ignore les NaN : la première barre vaut plus haut - plus bas
+    return np.fmax(np.fmax(high - low, (high - previous).abs()), (low - previous).abs())
+
+
+def atr(high, low, close, period=ATR_PERIOD):
+    return wilder(true_range(high, low, close), period)
+
+
+def rolling_volatility(close, window=VOLATILITY_WINDOW):
+    """Volatilité annualisée (%) des rendements logarithmiques sur ``window`` séances"""
+    return np.log(close).diff().rolling(window).std() * math.sqrt(TRADING_DAYS) * 100
+
+
+def compute_indicators(close, high=None, low=None):
+    """Tous les indicateurs, chacun au format de ``close`` (Series ou DataFrame)"""
+    close = close.astype('float64')
+    high = close if high is None else high.astype('float64')
+    low = close if low is None else low.astype('float64')
+    bande_haute, bande_basse = bollinger(close)
+    return {
+        'MA20': sma(close, SMA_WINDOWS[0]),
+        'MA50': sma(close, SMA_WINDOWS[1]),
+        'EMA20': ema(close, EMA_SPAN),
+        'RSI14': rsi(close),
+        'bollinger_haut': bande_haute,
+        'bollinger_bas': bande_basse,
+        'ATR14': atr(high, low, close),
+        'volatilite_20j': rolling_volatility(close),
+    }
+
+
+def matrix_indicators(matrix):
+    """Indicateurs de tous les symboles d'une ``PriceMatrix`` (DataFrames dates × symboles)"""
+    return compute_indicators(matrix.frame('close'), matrix.frame('high'), matrix.frame('low'))
+
+
+# --- Mise à jour incrémentale ---
+
+class RollingWindow:
+    """Fenêtre glissante avec somme et somme des carrés courantes"""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self._evicted = None
+
+    def push(self, value):
+        self._evicted = None
+        if len(self.values) == self.window:
+            old = self._evicted = self.values[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+
+    def pop(self):
+        """Annule le dernier ``push``"""
+        value = self.values.pop()
+        self.total -= value
+        self.total_sq -= value * value
+        if self._evicted is not None:
+            self.values.appendleft(self._evicted)
+            self.total += self._evicted
+            self.total_sq += self._evicted * self._evicted
+            self._evicted = None
+
+    def mean(self):
+        if len(self.values) < self.window:
+            return math.nan
+        return self.total / self.window
+
+    def std(self):
+        """Écart-type (ddof=1) de la fenêtre complète"""
+        n = self.window
+        if len(self.values) < n or n < 2:
+            return math.nan
+        variance = (self.total_sq - self.total * self.total / n) / (n - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+class ExponentialAverage:
+    """Moyenne exponentielle récursive, définie après ``min_periods`` valeurs"""
+
+    def __init__(self, alpha, min_periods):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value = None
+        self.count = 0
+        self._previous = (None, 0)
+
+    def update(self, value):
+        self._previous = (self.value, self.count)
+        self.value = value if self.value is None else self.value + self.alpha * (value - self.value)
+        self.count += 1
+
+    def undo(self):
+        """Annule le dernier ``update``"""
+        self.value, self.count = self._previous
+
+    def seed(self, value, count):
+        """Initialise l'état sur la moyenne de ``count`` valeurs déjà calculée"""
+        if count:
+            self.value, self.count = float(value), int(count)
+
+    def current(self):
+        return self.value if self.count >= self.min_periods else math.nan
+
+
+class IndicatorSet:
+    """État des indicateurs d'un symbole, avancé en temps constant à chaque barre"""
+
+    def __init__(self):
+        self.previous_close = None
+        self.sma = {window: RollingWindow(window) for window in SMA_WINDOWS}
+        self.bands = RollingWindow(BOLLINGER_WINDOW)
+        self.returns = RollingWindow(VOLATILITY_WINDOW)
+        self.ema = ExponentialAverage(2 / (EMA_SPAN + 1), EMA_SPAN)
+        self.gain = ExponentialAverage(1 / RSI_PERIOD, RSI_PERIOD)
+        self.loss = ExponentialAverage(1 / RSI_PERIOD, RSI_PERIOD)
+        self.true_range = ExponentialAverage(1 / ATR_PERIOD, ATR_PERIOD)
+        # Clôture précédant la dernière barre intégrée, pour l'annuler
+        self._before = None
+
+    def update(self, high, low, close):
+        """Intègre une nouvelle barre"""
+        high = close if not math.isfinite(high) else high
+        low = close if not math.isfinite(low) else low
+        previous = self.previous_close
+        self._before = (previous,)
+        if previous is None:
+            self.true_range.update(high - low)
+        else:
+            delta = close - previous
+            self.gain.update(max(delta, 0.0))
+            self.loss.update(max(-delta, 0.0))
+            self.true_range.update(max(high - low, abs(high - previous), abs(low - previous)))
+            self.returns.push(math.log(close / previous))
+        for window in self.sma.values():
+            window.push(close)
+        self.bands.push(close)
+        self.ema.update(close)
+        self.previous_close = close
+
+    def undo(self):
+        """Retire la dernière barre intégrée (une seule fois après chaque ``update``)"""
+        (previous,), self._before = self._before, None
+        if previous is not None:
+            self.gain.undo()
+            self.loss.undo()
+            self.returns.pop()
+        self.true_range.undo()
+        for window in self.sma.values():
+            window.pop()
+        self.bands.pop()
+        self.ema.undo()
+        self.previous_close = previous
+
+    def revise(self, high, low, close):
+        """Remplace la dernière barre intégrée (séance en cours)"""
+        self.undo()
+        self.update(high, low, close)
+
+    def values(self):
+        """Valeurs courantes, dans l'ordre de ``INDICATORS``"""
+        mean, std = self.bands.mean(), self.bands.std()
+        gain, loss = self.gain.current(), self.loss.current()
+        if math.isnan(gain) or math.isnan(loss):
+            relative_strength = math.nan
+        else:
+            relative_strength = 100.0 if loss == 0 else 100 - 100 / (1 + gain / loss)
+        return [
+            self.sma[SMA_WINDOWS[0]].mean(),
+            self.sma[SMA_WINDOWS[1]].mean(),
+            self.ema.current(),
+            relative_strength,
+            mean + BOLLINGER_WIDTH * std,
+            mean - BOLLINGER_WIDTH * std,
+            self.true_range.current(),
+            self.returns.std() * math.sqrt(TRADING_DAYS) * 100,
+        ]
+
+
+def _ewm_last(values, alpha):
+    """Dernière moyenne exponentielle récursive et nombre de valeurs de chaque colonne"""
+    frame = pd.DataFrame(values)
+    means = frame.ewm(alpha=alpha, adjust=False, ignore_na=True).mean().ffill()
+    return means.iloc[-1].to_numpy(), frame.notna().sum().to_numpy()
+
+
+def seed_states(high, low, close):
+    """États des indicateurs de plusieurs symboles (tableaux dates × symboles).
+
+    Équivaut à appeler ``update`` sur chaque barre cotée de chaque symbole :
+    les moyennes exponentielles sont calculées pour tous les symboles en un
+    passage vectorisé, les fenêtres glissantes ne lisent que leurs
+    dernières valeurs. La dernière barre de chaque symbole est intégrée par
+    ``update``, pour pouvoir être révisée.
+    """
+    close = np.asarray(close, dtype='float64')
+    rows = np.arange(len(close))[:, None]
+    last = np.where(np.isfinite(close), rows, -1).max(axis=0, initial=-1)
+    quoted = np.flatnonzero(last >= 0)
+    # Historique sans la dernière barre de chaque symbole
+    body = close.copy()
+    body[last[quoted], quoted] = np.nan
+    valid = np.isfinite(body)
+    high = np.where(np.isfinite(high), high, close)
+    low = np.where(np.isfinite(low), low, close)
+
+    previous = pd.DataFrame(body).ffill().shift().to_numpy()
+    delta = body - previous
+    with np.errstate(invalid='ignore'):
+        true_range = np.fmax(np.fmax(high - low, np.abs(high - previous)), np.abs(low - previous))
+        returns = np.log(body / previous)
+    true_range[~valid] = np.nan
+
+    state = IndicatorSet()
+    seeds = {
+        'ema': _ewm_last(body, state.ema.alpha),
+        'gain': _ewm_last(np.clip(delta, 0.0, None), state.gain.alpha),
+        'loss': _ewm_last(np.clip(-delta, 0.0, None), state.loss.alpha),
+        'true_range': _ewm_last(true_range, state.true_range.alpha),
+    }
+
+    states = []
+    for j in range(close.shape[1]):
+        state = IndicatorSet()
+        history = body[valid[:, j], j]
+        if history.size:
+            for name, (values, counts) in seeds.items():
+                getattr(state, name).seed(values[j], counts[j])
+            for window in list(state.sma.values()) + [state.bands]:
+                for value in history[-window.window:]:
+                    window.push(value)
+            for value in returns[np.isfinite(returns[:, j]), j][-state.returns.window:]:
+                state.returns.push(value)
+            state.previous_close = history[-1]
+        if last[j] >= 0:
+            i = last[j]
+            state.update(float(high[i, j]), float(low[i, j]), float(close[i, j]))
+        states.append(state)
+    return states
+
+
+class IndicatorEngine:
+    """États des indicateurs de tout l'univers, avancés au fil des nouvelles barres"""
+
+    def __init__(self):
+        self.states = {}
+        # Date de la dernière barre intégrée de chaque symbole
+        self.bar_dates = {}
+        self.last_date = None
+        self._lock = threading.Lock()
+
+    def advance(self, matrix):
+        """Intègre les barres de ``matrix`` à partir de la dernière date traitée.
+
+        La barre de cette date, éventuellement incomplète lors de son
+        intégration, est révisée ; les suivantes sont ajoutées. Les symboles
+        sans état sont initialisés sur tout leur historique, ensemble.
+        Retourne le nombre de barres intégrées ou révisées.
+        """
+        with self._lock:
+            if matrix.empty or (self.last_date is not None and matrix.dates[-1] < self.last_date):
+                return 0
+            close = matrix.close.astype('float64')
+            new = [j for j, symbol in enumerate(matrix.symbols) if symbol not in self.states]
+            if new:
+                states = seed_states(matrix.high[:, new], matrix.low[:, new], close[:, new])
+                for j, state in zip(new, states):
+                    quoted = np.flatnonzero(np.isfinite(close[:, j]))
+                    self.states[matrix.symbols[j]] = state
+                    self.bar_dates[matrix.symbols[j]] = matrix.dates[quoted[-1]] if quoted.size else None
+
+            start = 0 if self.last_date is None else matrix.dates.searchsorted(self.last_date, side='left')
+            seeded = set(new)
+            updates = 0
+            for j, symbol in enumerate(matrix.symbols):
+                if j in seeded:
+                    continue
+                state = self.states[symbol]
+                for i in range(start, len(matrix.dates)):
+                    if not math.isfinite(close[i, j]):
+                        continue
+                    bar = (float(matrix.high[i, j]), float(matrix.low[i, j]), close[i, j])
+                    if self.bar_dates.get(symbol) == matrix.dates[i]:
+                        state.revise(*bar)
+                    else:
+                        state.update(*bar)
+                    self.bar_dates[symbol] = matrix.dates[i]
+                    updates += 1
+            self.last_date = matrix.dates[-1]
+            return updates
+
+    def latest(self):
+        """Valeurs courantes des indicateurs : une ligne par symbole"""
+        with self._lock:
+            return pd.DataFrame([state.values() for state in self.states.values()],
+                                index=pd.Index(list(self.states), name='symbole'),
+                                columns=INDICATORS)
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_indicator_engine(key):
+    """Retourne le moteur d'indicateurs partagé associé à ``key``"""
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = _engines[key] = IndicatorEngine()
+        return engine
@@ -0,0 +1,299 @@
+# instrumentation.py
+"""Mesures de performance du dashboard.
+
+Un registre par processus collecte :
+
+- des chronomètres (nombre, durée cumulée, dernière et plus longue durée)
+  autour des sections affichées, des appels au fournisseur et des
+  constructions de figures ;
+- des compteurs (requêtes vers le fournisseur, échecs, octets reçus) ;
+- des jauges (mémoire de la session, du processus) ;
+- les statistiques des caches, relevées au moment de l'export.
+
+Les mesures sont affichées dans un panneau optionnel de la sidebar et
+exportées au format texte de Prometheus : dans le fichier
+``CAC40_METRICS_FILE`` (collecteur *textfile* de node_exporter) après
+chaque exécution, et sur ``http://<hôte>:<CAC40_METRICS_PORT>/metrics``
+si ce port est défini.
+"""
+import functools
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from data_cache import estimate_size
+from history_store import replace_file
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "cac40"
+
+
+class _Timer:
+    __slots__ = ('count', 'total', 'last', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        self.max = max(self.max, seconds)
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+class Metrics:
+    """Registre thread-safe de chronomètres, compteurs et jauges"""
+
+    def __init__(self):
+        self._timers = {}
+        self._counters = {}
+        self._gauges = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, **labels):
+        """Enregistre une durée (secondes) pour le chronomètre ``name``"""
+        with self._lock:
+            timer = self._timers.setdefault((name, _labels(labels)), _Timer())
+            timer.observe(seconds)
+
+    @contextmanager
+    def timed(self, name, **labels):
+        """Chronomètre le bloc ``with``, y compris s'il lève une exception"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def count(self, name, value=1, **labels):
+        """Incrémente le compteur ``name``"""
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def gauge(self, name, value, **labels):
+        """Fixe la valeur courante de la jauge ``name``"""
+        with self._lock:
+            self._gauges[(name, _labels(labels))] = value
+
+    def add_collector(self, name, collect):
+        """Déclare une source de jauges relevée à chaque export (``collect()`` → dict)"""
+        with self._lock:
+            self._collectors[name] = collect
+
+    def _collected(self):
+        with self._lock:
+            collectors = dict(self._collectors)
+        gauges = {}
+        for name, collect in collectors.items():
+            for key, value in collect().items():
+                gauges[(f"{name}_{key}", ())] = value
+        return gauges
+
+    def timers(self):
+        """Chronomètres : une ligne par (mesure, étiquettes), durées en millisecondes"""
+        with self._lock:
+            rows = [{'mesure': name, 'etiquettes': ", ".join(f"{k}={v}" for k, v in labels),
+                     'nombre': t.count, 'moyenne_ms': t.total / t.count * 1000,
+                     'derniere_ms': t.last * 1000, 'max_ms': t.max * 1000,
+                     'total_s': t.total}
+                    for (name, labels), t in self._timers.items()]
+        columns = ['mesure', 'etiquettes', 'nombre', 'moyenne_ms', 'derniere_ms', 'max_ms', 'total_s']
+        return pd.DataFrame(rows, columns=columns).sort_values('total_s', ascending=False)
+
+    def values(self):
+        """Compteurs et jauges (y compris celles des collecteurs) : ``{(nom, étiquettes): valeur}``"""
+        with self._lock:
+            values = dict(self._counters)
+            values.update(self._gauges)
+        values.update(self._collected())
+        return values
+
+    def prometheus(self):
+        """Export au format texte de Prometheus"""
+        lines = []
+        with self._lock:
+            timers = {key: (t.count, t.total, t.max) for key, t in self._timers.items()}
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+        gauges.update(self._collected())
+
+        def sample(name, labels, value):
+            tags = ",".join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"{PREFIX}_{name}{{{tags}}} {value}" if tags else f"{PREFIX}_{name} {value}")
+
+        for kind, series in (('counter', counters), ('gauge', gauges)):
+            for name in sorted({name for name, _ in series}):
+                suffix = '_total' if kind == 'counter' else ''
+                lines.append(f"# TYPE {PREFIX}_{name}{suffix} {kind}")
+                for (n, labels), value in sorted(series.items()):
+                    if n == name:
+                        sample(name + suffix, labels, value)
+        for name in sorted({name for name, _ in timers}):
+            lines.append(f"# TYPE {PREFIX}_{name}_seconds summary")
+            for (n, labels), (count, total, _) in sorted(timers.items()):
+                if n == name:
+                    sample(f"{name}_seconds_count", labels, count)
+                    sample(f"{name}_seconds_sum", labels, f"{total:.6f}")
+            lines.append(f"# TYPE {PREFIX}_{name}_seconds_max gauge")
+            for (n, labels), (_, _, longest) in sorted(timers.items()):
+                if n == name:
+                    sample(f"{name}_seconds_max", labels, f"{longest:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Écrit l'export dans ``path`` (fichier temporaire unique puis renommage).
+
+        Les écritures des sessions concurrentes sont sérialisées ; un échec
+        est journalisé et n'interrompt pas la page, l'export suivant réessaie.
+        Retourne ``True`` si le fichier a été écrit.
+        """
+        text = self.prometheus()
+
+        def write(tmp):
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(text)
+
+        try:
+            with self._lock:
+                replace_file(path, write)
+        except OSError:
+            logger.exception("Échec de l'export des mesures dans %s", path)
+            return False
+        return True
+
+    def reset(self):
+        with self._lock:
+            self._timers.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+
+def process_memory_bytes():
+    """Mémoire résidente du processus (pic, à défaut de /proc ; NaN sous Windows)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return math.nan
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class InstrumentedProvider:
+    """Fournisseur chronométré : durée, nombre, échecs et volume des requêtes"""
+
+    def __init__(self, provider, metrics):
+        self.provider = provider
+        self.metrics = metrics
+
+    def __getattr__(self, name):
+        return getattr(self.provider, name)
+
+    def _call(self, method, *args, **kwargs):
+        labels = {'provider': self.provider.name, 'method': method}
+        self.metrics.count('upstream_requests', **labels)
+        try:
+            with self.metrics.timed('upstream', **labels):
+                result = getattr(self.provider, method)(*args, **kwargs)
+        except Exception:
+            self.metrics.count('upstream_errors', **labels)
+            raise
+        self.metrics.count('upstream_bytes', estimate_size(result), **labels)
+        return result
+
+    def history(self, symbol, period="1y", interval="1d", start=None):
+        return self._call('history', symbol, period=period, interval=interval, start=start)
+
+    def info(self, symbol):
+        return self._call('info', symbol)
+
+    def download(self, symbols, period="1y", interval="1d", start=None):
+        return self._call('download', symbols, period=period, interval=interval, start=start)
+
+
+def timed_section(method):
+    """Chronomètre chaque appel de la méthode (mesure ``section``, étiquette : son nom)"""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with get_metrics().timed('section', section=method.__name__):
+            return method(*args, **kwargs)
+    return wrapper
+
+
+def instrument_provider(provider):
+    """Enveloppe ``provider`` pour en mesurer les requêtes (une seule fois)"""
+    if isinstance(provider, InstrumentedProvider):
+        return provider
+    return InstrumentedProvider(provider, get_metrics())
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip('/') != '/metrics':
+            self.send_error(404)
+            return
+        body = get_metrics().prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_metrics = None
+# Serveur /metrics : None tant qu'il n'est pas démarré, False si son démarrage a échoué
+_server = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """Retourne le registre de mesures partagé par toutes les sessions du processus"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+        return _metrics
+
+
+def serve_metrics(port=None):
+    """Démarre (une fois) le point d'accès ``/metrics`` sur ``port`` ou ``CAC40_METRICS_PORT``.
+
+    Si le port est invalide ou déjà pris, l'échec est journalisé une fois
+    et le démarrage n'est plus retenté ; retourne alors ``None``.
+    """
+    global _server
+    port = port or os.environ.get("CAC40_METRICS_PORT")
+    with _metrics_lock:
+        if _server is None and port:
+            try:
+                _server = ThreadingHTTPServer(('', int(port)), _Handler)
+            except (OSError, ValueError) as e:
+                logger.error("Point d'accès /metrics indisponible sur le port %s: %s", port, e)
+                _server = False
+                return None
+            threading.Thread(target=_server.serve_forever, name="cac40-metrics", daemon=True).start()
+        return _server or None
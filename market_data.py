@@ -0,0 +1,462 @@
+# market_data.py
+"""Couche d'accès aux données de marché.
+
+Toutes les requêtes de cotations du dashboard passent par un fournisseur
+(``MarketDataProvider``). Trois implémentations sont disponibles :
+
+- ``YFinanceProvider`` : données réelles depuis Yahoo Finance ;
+- ``SyntheticProvider`` : séries déterministes générées localement, sans réseau ;
+- ``FileProvider`` : séries lues depuis un répertoire de fichiers CSV/JSON.
+
+Le fournisseur est choisi par ``get_provider()`` à partir de la variable
+d'environnement ``CAC40_PROVIDER`` (``yfinance`` par défaut).
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MARKET_TZ = "Europe/Paris"
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Durées des périodes au format yfinance
+PERIOD_OFFSETS = {
+    '1d': pd.DateOffset(days=1),
+    '5d': pd.DateOffset(days=5),
+    '1mo': pd.DateOffset(months=1),
+    '3mo': pd.DateOffset(months=3),
+    '6mo': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '2y': pd.DateOffset(years=2),
+    '3y': pd.DateOffset(years=3),
+    '5y': pd.DateOffset(years=5),
+    '10y': pd.DateOffset(years=10),
+}
+
+
+def market_timestamp(value):
+    """Convertit une date (naïve ou non) dans le fuseau de la place de Paris"""
+    ts = pd.Timestamp(value)
+    return ts.tz_localize(MARKET_TZ) if ts.tzinfo is None else ts.tz_convert(MARKET_TZ)
+
+
+def period_start(period, end=None):
+    """Retourne la date de début correspondant à une période yfinance"""
+    end = pd.Timestamp.now(tz=MARKET_TZ) if end is None else end
+    if period == 'ytd':
+        return end.normalize().replace(month=1, day=1)
+    if period == 'max' or period not in PERIOD_OFFSETS:
+        return None
+    return end - PERIOD_OFFSETS[period]
+
+
+def resample_ohlcv(hist, interval):
+    """Agrège des barres journalières en barres hebdomadaires ou mensuelles"""
+    rules = {'1wk': 'W-MON', '1mo': 'MS', '3mo': 'QS'}
+    if interval not in rules or hist.empty:
+        return hist
+    agg = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+    agg.update({col: 'sum' for col in hist.columns if col not in agg})
+    resampled = hist.resample(rules[interval], label='left', closed='left').agg(agg)
+    return resampled.dropna(subset=['Close'])
+
+
+def split_download(data, symbols):
+    """Découpe le résultat de ``yf.download`` en un DataFrame OHLCV par symbole"""
+    frames = {}
+    if data is None or data.empty:
+        return frames
+
+    for symbol in symbols:
+        if isinstance(data.columns, pd.MultiIndex):
+            if symbol not in data.columns.get_level_values(0):
+                continue
+            hist = data[symbol]
+        else:
+            hist = data
+        # Les calendriers diffèrent entre places : on retire les lignes vides
+        hist = hist.dropna(how='all')
+        if hist.empty:
+            continue
+
+        index = pd.DatetimeIndex(hist.index, name='Date')
+        if index.tz is None:
+            index = index.tz_localize(MARKET_TZ)
+        else:
+            index = index.tz_convert(MARKET_TZ)
+        hist = hist.copy()
+        hist.index = index
+        hist.columns.name = None
+        frames[symbol] = hist
+    return frames
+
+
+class MarketDataProvider:
+    """Interface commune des fournisseurs de données de marché.
+
+    ``history`` retourne un DataFrame OHLCV indexé par un DatetimeIndex
+    nommé ``Date`` (colonnes ``Open``, ``High``, ``Low``, ``Close``,
+    ``Volume``), et ``info`` un dictionnaire au format ``Ticker.info``.
+    ``download`` retourne ces mêmes DataFrames pour plusieurs symboles,
+    dans un dictionnaire indexé par symbole. Lorsque ``start`` est fourni,
+    il remplace ``period`` et seules les barres à partir de cette date sont
+    retournées.
+    """
+
+    name = "base"
+    label = "Fournisseur"
+
+    def history(self, symbol, period="1y", interval="1d", start=None):
+        raise NotImplementedError
+
+    def info(self, symbol):
+        raise NotImplementedError
+
+    def download(self, symbols, period="1y", interval="1d", start=None):
+        """Récupère l'historique de plusieurs symboles (une requête par symbole par défaut).
+
+        Un symbole en échec est omis du résultat sans interrompre le lot.
+        """
+        results = {}
+        for symbol in symbols:
+            try:
+                results[symbol] = self.history(symbol, period=period, interval=interval, start=start)
+            except Exception:
+                logger.warning("Historique indisponible pour %s", symbol, exc_info=True)
+        return results
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Fournisseur Yahoo Finance (nécessite un accès réseau)"""
+
+    name = "yfinance"
+    label = "Yahoo Finance (yfinance)"
+
+    def __init__(self):
+        import yfinance as yf
+        self._yf = yf
+
+    def history(self, symbol, period="1y", interval="1d", start=None):
+        if start is not None:
+            return self._yf.Ticker(symbol).history(start=start, interval=interval)
+        return self._yf.Ticker(symbol).history(period=period, interval=interval)
+
+    def info(self, symbol):
+        return self._yf.Ticker(symbol).info
+
+    def download(self, symbols, period="1y", interval="1d", start=None):
+        """Télécharge tous les symboles en une seule requête multi-tickers"""
+        symbols = list(symbols)
+        if not symbols:
+            return {}
+
+        span = {'start': start} if start is not None else {'period': period}
+        data = self._yf.download(symbols, interval=interval, group_by='ticker',
+                                 auto_adjust=True, threads=True, progress=False, **span)
+        return split_download(data, symbols)
+
+
+class SyntheticProvider(MarketDataProvider):
+    """Fournisseur hors ligne générant des séries déterministes.
+
+    Chaque symbole suit une marche aléatoire géométrique dont la graine est
+    dérivée du symbole : deux appels (ou deux machines) obtiennent les mêmes
+    valeurs pour une même date. ``latency`` simule le temps d'aller-retour
+    d'une requête réseau, en secondes.
+    """
+
+    name = "synthetic"
+    label = "Données synthétiques (hors ligne)"
+    ORIGIN = pd.Timestamp("2005-01-03")
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    @staticmethod
+    def _seed(symbol):
+        return zlib.crc32(symbol.encode('utf-8'))
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _daily_series(symbol, end_date):
+        """Génère toutes les barres journalières du symbole jusqu'à ``end_date``"""
+        seed = SyntheticProvider._seed(symbol)
+        rng = np.random.default_rng(seed)
+        # Jours ouvrés (équivalent vectorisé de pd.bdate_range, bien plus rapide)
+        dates = pd.date_range(SyntheticProvider.ORIGIN, end_date, freq='D')
+        dates = dates[dates.dayofweek < 5]
+        n = len(dates)
+
+        if symbol.startswith('^'):
+            # Indices : niveau en milliers de points, volatilité plus faible
+            base_price = 3000.0 + seed % 3000
+            base_volume = 5e7
+            drift, vol = 0.00015, 0.009
+        else:
+            base_price = float(np.exp(rng.uniform(np.log(8), np.log(600))))
+            base_volume = float(np.exp(rng.uniform(np.log(2e5), np.log(8e6))))
+            drift = rng.normal(0.0002, 0.0002)
+            vol = rng.uniform(0.009, 0.022)
+        log_returns = rng.normal(drift, vol, n)
+        close = base_price * np.exp(np.cumsum(log_returns))
+        open_ = close * np.exp(rng.normal(0, vol / 3, n))
+        spread = np.abs(rng.normal(0, vol / 2, n))
+        high = np.maximum(open_, close) * (1 + spread)
+        low = np.minimum(open_, close) * (1 - spread)
+        volume = np.round(base_volume * rng.lognormal(0, 0.35, n))
+
+        index = pd.DatetimeIndex(dates, name='Date').tz_localize(MARKET_TZ)
+        return pd.DataFrame({
+            'Open': open_,
+            'High': high,
+            'Low': low,
+            'Close': close,
+            'Volume': volume.astype('int64'),
+            'Dividends': 0.0,
+            'Stock Splits': 0.0,
+        }, index=index)
+
+    def history(self, symbol, period="1y", interval="1d", start=None):
+        self._wait()
+        return self._history(symbol, period, interval, start)
+
+    def download(self, symbols, period="1y", interval="1d", start=None):
+        # Une seule requête simulée pour l'ensemble des symboles
+        self._wait()
+        return {symbol: self._history(symbol, period, interval, start) for symbol in symbols}
+
+    def _history(self, symbol, period, interval, start=None):
+        end = pd.Timestamp.now(tz=MARKET_TZ)
+        hist = self._daily_series(symbol, end.date().isoformat())
+        if start is not None:
+            hist = hist[hist.index >= market_timestamp(start).normalize()]
+        elif period == '1d':
+            hist = hist.iloc[-1:]
+        else:
+            start = period_start(period, end)
+            if start is not None:
+                hist = hist[hist.index >= start.normalize()]
+        return resample_ohlcv(hist.copy(), interval)
+
+    def info(self, symbol):
+        self._wait()
+        seed = self._seed(symbol)
+        rng = np.random.default_rng(seed + 1)
+        last_close = self._daily_series(symbol, pd.Timestamp.now(tz=MARKET_TZ).date().isoformat())['Close'].iloc[-1]
+        shares = float(np.exp(rng.uniform(np.log(1e8), np.log(2.5e9))))
+        return {
+            'symbol': symbol,
+            'shortName': symbol.split('.')[0],
+            'longName': symbol,
+            'currency': 'EUR',
+            'sharesOutstanding': int(shares),
+            'marketCap': int(shares * last_close),
+            'dividendYield': round(float(rng.uniform(0.0, 0.06)), 4),
+            'beta': round(float(rng.uniform(0.5, 1.6)), 2),
+        }
+
+
+class FileProvider(MarketDataProvider):
+    """Fournisseur lisant des fichiers locaux.
+
+    Le répertoire contient un fichier ``<SYMBOLE>.csv`` par symbole
+    (colonnes ``Date,Open,High,Low,Close,Volume``) et un fichier optionnel
+    ``infos.json`` associant chaque symbole à son dictionnaire d'informations.
+    """
+
+    name = "file"
+    label = "Fichiers locaux"
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self._infos = None
+
+    def history(self, symbol, period="1y", interval="1d", start=None):
+        path = os.path.join(self.data_dir, f"{symbol}.csv")
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+
+        hist = pd.read_csv(path, index_col='Date')
+        index = pd.to_datetime(hist.index, utc=True).tz_convert(MARKET_TZ)
+        hist.index = pd.DatetimeIndex(index, name='Date')
+        hist = hist.sort_index()
+
+        if start is not None:
+            hist = hist[hist.index >= market_timestamp(start).normalize()]
+        elif period == '1d':
+            hist = hist.iloc[-1:]
+        else:
+            # Les périodes sont relatives à la dernière barre disponible
+            start = period_start(period, hist.index[-1]) if not hist.empty else None
+            if start is not None:
+                hist = hist[hist.index >= start.normalize()]
+        return resample_ohlcv(hist, interval)
+
+    def info(self, symbol):
+        if self._infos is None:
+            path = os.path.join(self.data_dir, "infos.json")
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    self._infos = json.load(f)
+            else:
+                self._infos = {}
+        return dict(self._infos.get(symbol, {}))
+
+
+class FetchResult:
+    """Résultat d'un lot de requêtes : valeurs obtenues et erreurs par clé"""
+
+    def __init__(self):
+        self.results = {}
+        self.errors = {}
+
+    @property
+    def complete(self):
+        return not self.errors
+
+
+# Intervalle de vérification du départ des requêtes en file (secondes)
+QUEUE_POLL = 0.05
+
+
+class FetchExecutor:
+    """Exécute des requêtes de données en parallèle avec une concurrence bornée.
+
+    Chaque requête dispose de ``timeout`` secondes par tentative, comptées
+    à partir de son exécution par un thread (l'attente en file n'est pas
+    décomptée), et est relancée jusqu'à ``retries`` fois avec un délai
+    exponentiel (``backoff``, ``2 * backoff``, ...) et une gigue aléatoire.
+    Les échecs définitifs sont collectés dans ``FetchResult.errors`` sans
+    interrompre les autres requêtes : l'appelant exploite les résultats
+    partiels.
+
+    Une requête expirée ne peut pas être interrompue : son thread termine en
+    arrière-plan mais son résultat est ignoré. Comme il occupe encore un
+    thread, une tentative restée en file plus de ``queue_timeout()``
+    secondes échoue aussi : des requêtes bloquées ne retiennent pas ``map``
+    au-delà de ce délai.
+    """
+
+    def __init__(self, max_workers=8, timeout=10.0, retries=2, backoff=0.5):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._pool = ThreadPoolExecutor(max_workers=max_workers,
+                                        thread_name_prefix="cac40-fetch")
+
+    def queue_timeout(self):
+        """Attente maximale d'une tentative en file : durée de toutes les tentatives et de leurs délais"""
+        backoffs = sum(self.backoff * 2 ** attempt for attempt in range(self.retries))
+        return self.timeout * (self.retries + 1) + backoffs + self.backoff * self.retries
+
+    @staticmethod
+    def _call(fn, key, delay, started):
+        if delay:
+            time.sleep(delay)
+        # Le délai de la tentative court à partir de son début effectif, pas de sa mise en file
+        started.append(time.monotonic())
+        return fn(key)
+
+    def map(self, fn, keys):
+        """Applique ``fn`` à chaque clé en parallèle et retourne un ``FetchResult``"""
+        outcome = FetchResult()
+        attempts = {}
+        pending = {}
+
+        def submit(key, delay=0.0):
+            attempts[key] = attempts.get(key, 0) + 1
+            started = []
+            future = self._pool.submit(self._call, fn, key, delay, started)
+            pending[future] = (key, started, time.monotonic() + delay + self.queue_timeout())
+
+        def retry_or_fail(key, error):
+            if attempts[key] <= self.retries:
+                delay = self.backoff * 2 ** (attempts[key] - 1)
+                submit(key, delay + random.uniform(0, self.backoff))
+            else:
+                outcome.errors[key] = error
+
+        for key in dict.fromkeys(keys):
+            submit(key)
+
+        while pending:
+            now = time.monotonic()
+            deadlines = [started[0] + self.timeout if started else queued
+                         for _, started, queued in pending.values()]
+            next_check = min(deadlines)
+            if not all(started for _, started, _ in pending.values()):
+                # Requêtes encore en file : leur départ n'est signalé par aucun événement
+                next_check = min(next_check, now + QUEUE_POLL)
+            done, _ = wait(list(pending), timeout=max(0.0, next_check - now),
+                           return_when=FIRST_COMPLETED)
+
+            for future in done:
+                key, _, _ = pending.pop(future)
+                try:
+                    outcome.results[key] = future.result()
+                except Exception as e:
+                    retry_or_fail(key, e)
+
+            now = time.monotonic()
+            for future, (key, started, queued) in list(pending.items()):
+                if started and now - started[0] > self.timeout:
+                    del pending[future]
+                    future.cancel()
+                    retry_or_fail(key, TimeoutError(f"{key}: délai de {self.timeout:g}s dépassé"))
+                elif not started and now > queued:
+                    # Threads retenus par des requêtes expirées : la tentative ne partira pas à temps
+                    del pending[future]
+                    future.cancel()
+                    outcome.errors[key] = TimeoutError(f"{key}: requête restée en file plus de "
+                                                       f"{self.queue_timeout():g}s")
+
+        return outcome
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_fetch_executor(universe_size=None):
+    """Retourne l'exécuteur de requêtes partagé par tout le processus.
+
+    Sans ``CAC40_FETCH_WORKERS``, le nombre de requêtes simultanées suit la
+    taille de l'univers suivi (de 8 à 32), fixée au premier appel.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = min(32, max(8, (universe_size or 0) // 10))
+            _executor = FetchExecutor(
+                max_workers=int(os.environ.get("CAC40_FETCH_WORKERS", workers)),
+                timeout=float(os.environ.get("CAC40_FETCH_TIMEOUT", "10")),
+                retries=int(os.environ.get("CAC40_FETCH_RETRIES", "2")),
+            )
+        return _executor
+
+
+def get_provider(name=None):
+    """Instancie le fournisseur demandé (par défaut via ``CAC40_PROVIDER``)"""
+    name = name or os.environ.get("CAC40_PROVIDER", "yfinance")
+    if name == "yfinance":
+        return YFinanceProvider()
+    if name == "synthetic":
+        return SyntheticProvider(latency=float(os.environ.get("CAC40_SYNTH_LATENCY", "0")))
+    if name == "file":
+        return FileProvider(os.environ.get("CAC40_DATA_DIR", "data"))
+    raise ValueError(f"Fournisseur de données inconnu: {name}")
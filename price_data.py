@@ -0,0 +1,236 @@
+# price_data.py
+"""Construction des tables de prix du dashboard.
+
+Les historiques OHLCV du fournisseur (un DataFrame par symbole) sont
+assemblés colonne par colonne en une table longue (une ligne par date et
+par symbole), sans passer par des dictionnaires ligne à ligne.
+
+La table suit un schéma compact (``HISTORICAL_SCHEMA``) : symbole et
+secteur catégoriels, prix en float32 lorsque la précision au centime est
+conservée, volume entier et index de dates dans le fuseau de Paris.
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from market_data import MARKET_TZ
+
+# Colonnes du fournisseur -> colonnes de la table historique
+HISTORICAL_COLUMNS = {
+    'Close': 'prix',
+    'Volume': 'volume',
+    'Open': 'ouverture',
+    'High': 'plus_haut',
+    'Low': 'plus_bas',
+}
+HISTORICAL_ORDER = ['symbole', 'prix', 'volume', 'secteur', 'ouverture', 'plus_haut', 'plus_bas']
+PRICE_COLUMNS = ['prix', 'ouverture', 'plus_haut', 'plus_bas']
+
+HISTORICAL_SCHEMA = {
+    'symbole': 'category',
+    'prix': 'float32',
+    'volume': 'int64',
+    'secteur': 'category',
+    'ouverture': 'float32',
+    'plus_haut': 'float32',
+    'plus_bas': 'float32',
+}
+
+# Erreur d'arrondi maximale tolérée pour stocker un prix en float32
+FLOAT32_TOLERANCE = 0.005
+
+
+def price_dtype(values):
+    """float32 si la conversion conserve les prix au demi-centime près, sinon float64"""
+    values = np.asarray(values, dtype='float64')
+    finite = values[np.isfinite(values)]
+    if finite.size == 0:
+        return 'float32'
+    error = np.abs(finite.astype('float32').astype('float64') - finite).max()
+    return 'float32' if error < FLOAT32_TOLERANCE else 'float64'
+
+
+def normalize_dates(index):
+    """Convertit un index de dates dans le fuseau de la place de Paris"""
+    index = pd.DatetimeIndex(index)
+    index = index.tz_localize(MARKET_TZ) if index.tz is None else index.tz_convert(MARKET_TZ)
+    return index.rename('date')
+
+
+def apply_historical_schema(data):
+    """Applique le schéma compact à une table historique longue indexée par date"""
+    data = data.copy()
+    data.index = normalize_dates(data.index)
+    for column, dtype in HISTORICAL_SCHEMA.items():
+        if column in PRICE_COLUMNS:
+            dtype = price_dtype(data[column])
+        elif dtype == 'int64':
+            data[column] = data[column].fillna(0).round()
+        data[column] = data[column].astype(dtype)
+    return data[HISTORICAL_ORDER]
+
+
+def memory_footprint_mb(data):
+    """Empreinte mémoire d'un DataFrame, en mégaoctets"""
+    return data.memory_usage(deep=True, index=True).sum() / 1024 ** 2
+
+
+def build_historical_frame(histories, secteurs):
+    """Assemble la table historique longue à partir des historiques par symbole.
+
+    ``histories`` associe chaque symbole à son DataFrame OHLCV et
+    ``secteurs`` chaque symbole à son secteur. La table retournée est
+    indexée par date et suit ``HISTORICAL_SCHEMA``.
+    """
+    frames = {symbol: hist[list(HISTORICAL_COLUMNS)]
+              for symbol, hist in histories.items()
+              if hist is not None and not hist.empty}
+    if not frames:
+        empty = pd.DataFrame({column: pd.Series(dtype=dtype)
+                              for column, dtype in HISTORICAL_SCHEMA.items()})
+        empty.index = pd.DatetimeIndex([], tz=MARKET_TZ, name='date')
+        return empty[HISTORICAL_ORDER]
+
+    data = pd.concat(frames, names=['symbole', 'date']).rename(columns=HISTORICAL_COLUMNS)
+    data = data.reset_index(level='symbole')
+
+    symbols = list(frames)
+    sector_names = sorted(set(secteurs[symbol] for symbol in symbols))
+    sector_codes = np.array([sector_names.index(secteurs[symbol]) for symbol in symbols])
+
+    data['symbole'] = pd.Categorical(data['symbole'], categories=symbols)
+    data['secteur'] = pd.Categorical.from_codes(sector_codes[data['symbole'].cat.codes],
+                                                categories=sector_names)
+    return apply_historical_schema(data)
+
+
+class PriceMatrix:
+    """Matrices alignées dates × symboles des clôtures, extrêmes et volumes.
+
+    Dérivée une seule fois de la table historique longue, elle sert toutes
+    les analyses transversales (corrélations, volatilités, agrégats
+    sectoriels) par simples tranches de tableaux NumPy. Les cases sans
+    cotation valent ``NaN``.
+    """
+
+    def __init__(self, dates, symbols, sectors, close, volume, high=None, low=None):
+        self.dates = dates
+        self.symbols = list(symbols)
+        self.sectors = list(sectors)
+        self.close = close
+        self.volume = volume
+        # Sans plus haut / plus bas, les clôtures en tiennent lieu
+        self.high = close if high is None else high
+        self.low = close if low is None else low
+        self.sector_names = sorted(set(self.sectors))
+        self.sector_codes = np.array([self.sector_names.index(s) for s in self.sectors], dtype='int64')
+
+    @classmethod
+    def from_long(cls, data):
+        """Construit la matrice à partir de la table historique (``HISTORICAL_SCHEMA``)"""
+        symbols = list(data['symbole'].cat.categories)
+        dates = data.index.unique().sort_values()
+        row = dates.get_indexer(data.index)
+        col = data['symbole'].cat.codes.to_numpy()
+
+        def matrix(column, dtype):
+            values = np.full((len(dates), len(symbols)), np.nan, dtype=dtype)
+            values[row, col] = data[column].to_numpy()
+            return values
+
+        close = matrix('prix', data['prix'].dtype)
+        volume = matrix('volume', 'float64')
+        high = matrix('plus_haut', data['plus_haut'].dtype)
+        low = matrix('plus_bas', data['plus_bas'].dtype)
+
+        sector_of = np.empty(len(symbols), dtype=object)
+        sector_of[col] = data['secteur'].astype(object).to_numpy()
+        return cls(dates, symbols, sector_of, close, volume, high, low)
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def empty(self):
+        return len(self.dates) == 0 or not self.symbols
+
+    @property
+    def nbytes(self):
+        """Empreinte mémoire des matrices et de l'index des dates, en octets"""
+        # Plus haut et plus bas peuvent n'être que les clôtures : comptées une fois
+        arrays = {id(values): values for values in (self.close, self.volume, self.high, self.low)}
+        return sum(values.nbytes for values in arrays.values()) + self.dates.nbytes
+
+    def _subset(self, rows=slice(None), cols=slice(None)):
+        symbols = np.asarray(self.symbols, dtype=object)[cols]
+        sectors = np.asarray(self.sectors, dtype=object)[cols]
+        return PriceMatrix(self.dates[rows], symbols, sectors,
+                           self.close[rows, cols], self.volume[rows, cols],
+                           self.high[rows, cols], self.low[rows, cols])
+
+    def window(self, start=None, end=None):
+        """Tranche de dates [start, end] (vue sur les mêmes tableaux)"""
+        lo = 0 if start is None else self.dates.searchsorted(start, side='left')
+        hi = len(self.dates) if end is None else self.dates.searchsorted(end, side='right')
+        return self._subset(rows=slice(lo, hi))
+
+    def last(self, offset):
+        """Dernière période, exprimée par un ``pd.DateOffset``"""
+        if self.empty:
+            return self
+        return self.window(start=(self.dates[-1] - offset).normalize())
+
+    def select(self, symbols):
+        """Sous-matrice restreinte aux symboles demandés, dans leur ordre"""
+        position = {symbol: i for i, symbol in enumerate(self.symbols)}
+        return self._subset(cols=[position[s] for s in symbols if s in position])
+
+    def frame(self, field='close'):
+        """DataFrame dates × symboles d'un des champs"""
+        return pd.DataFrame(getattr(self, field), index=self.dates, columns=self.symbols)
+
+    def correlation(self):
+        """Matrice de corrélation des clôtures entre symboles"""
+        values = self.close.astype('float64')
+        if np.isnan(values).any():
+            # Corrélations par paires sur les dates communes
+            return self.frame().astype('float64').corr()
+        return pd.DataFrame(np.corrcoef(values, rowvar=False),
+                            index=self.symbols, columns=self.symbols)
+
+    def last_close(self):
+        """Dernière clôture disponible de chaque symbole"""
+        values = self.close.astype('float64')
+        valid = ~np.isnan(values)
+        last_row = len(values) - 1 - np.argmax(valid[::-1], axis=0)
+        last = values[last_row, np.arange(values.shape[1])]
+        return np.where(valid.any(axis=0), last, np.nan)
+
+    def volatility_summary(self):
+        """Écart-type des clôtures, dernier prix et volume moyen par symbole"""
+        with warnings.catch_warnings():
+            # Colonnes entièrement vides : résultat NaN attendu
+            warnings.simplefilter('ignore', RuntimeWarning)
+            volatilite = np.nanstd(self.close.astype('float64'), axis=0, ddof=1)
+            volume_moyen = np.nanmean(self.volume, axis=0)
+        prix_actuel = self.last_close()
+        summary = pd.DataFrame({
+            'symbole': self.symbols,
+            'prix_actuel': prix_actuel,
+            'volatilite': volatilite,
+            'volatilite_pct': volatilite / prix_actuel * 100,
+            'volume_moyen': volume_moyen,
+        })
+        return summary.dropna()
+
+    def monthly_returns(self):
+        """Rendements mensuels (%) par symbole, calculés sur les clôtures de fin de mois"""
+        frame = self.frame().astype('float64')
+        monthly = frame.groupby(frame.index.tz_localize(None).to_period('M')).last()
+        return monthly.pct_change(fill_method=None).iloc[1:] * 100
+
+    def _sector_indicator(self):
+        indicator = np.zeros((len(self.symbols), len(self.sector_names)))
+        indicator[np.arange(len(self.symbols)), self.sector_codes] = 1.0
+        return indicator
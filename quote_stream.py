@@ -0,0 +1,329 @@
+# quote_stream.py
+"""Ingestion en continu des cotations.
+
+Un flux (générateur) de ticks met à jour en place l'état des cotations
+de chaque symbole. Les indicateurs dérivés (variation, niveau de l'indice,
+nombre de hausses et de baisses, moyennes sectorielles, volume et
+capitalisation totale) sont maintenus incrémentalement : chaque tick ne
+coûte que quelques opérations, quel que soit le nombre de titres suivis.
+
+Deux sources de ticks sont fournies :
+
+- ``replay_ticks`` relit un fichier CSV enregistré (``date, symbole, prix,
+  volume``), éventuellement au rythme des horodatages ;
+- ``synthetic_ticks`` produit une marche aléatoire déterministe autour des
+  derniers prix, sans accès réseau.
+"""
+import logging
+import math
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from index_calculator import IndexCalculator
+from market_data import MARKET_TZ
+from sector_index import SectorIndex
+
+logger = logging.getLogger(__name__)
+
+REPLAY_COLUMNS = ['date', 'symbole', 'prix', 'volume']
+
+
+class Tick:
+    """Transaction (ou barre) d'un symbole : dernier prix et volume échangé depuis le tick précédent"""
+    __slots__ = ('symbol', 'timestamp', 'price', 'volume')
+
+    def __init__(self, symbol, timestamp, price, volume=0):
+        self.symbol = symbol
+        self.timestamp = timestamp
+        self.price = price
+        self.volume = volume
+
+    def __repr__(self):
+        return f"Tick({self.symbol!r}, {self.timestamp!r}, {self.price!r}, {self.volume!r})"
+
+
+def _contribution(value):
+    """(valeur, 1) pour une variation finie, (0, 0) sinon"""
+    return (value, 1) if math.isfinite(value) else (0.0, 0)
+
+
+def _sign(value):
+    return 1 if value > 0 else -1 if value < 0 else 0
+
+
+class QuoteState:
+    """Cotations courantes par symbole et agrégats maintenus tick par tick.
+
+    L'état est initialisé à partir de la table des cotations courantes du
+    dashboard (``current_data``) : les colonnes statiques (nom, secteur,
+    poids, rendement) sont conservées telles quelles, les colonnes de prix
+    sont tenues dans des tableaux NumPy indexés par position de symbole.
+
+    Le niveau de l'indice est tenu par ``index`` (``IndexCalculator``) ;
+    à défaut, un indice base 100 à l'ouverture pondéré par ``poids_cac40``.
+    Les agrégats sectoriels complètent la table ``sector_data``
+    (``SectorIndex.aggregate``) de l'instantané initial ; à défaut, elle
+    est calculée sur les seuls titres cotés.
+    """
+
+    def __init__(self, current_data, index=None, sector_data=None):
+        self._static = current_data.reset_index(drop=True)
+        self.symbols = list(self._static['symbole'])
+        self.position = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+        def column(name):
+            return self._static[name].to_numpy(dtype='float64', copy=True)
+
+        self.open = column('ouverture')
+        self.last = column('prix_actuel')
+        self.high = column('plus_haut')
+        self.low = column('plus_bas')
+        self.volume = column('volume')
+        self.market_cap = column('market_cap')
+        self.weights = column('poids_cac40')
+        # Capitalisation proportionnelle au prix : nombre de titres implicite
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self._shares = np.where(self.last > 0, self.market_cap / self.last, 0.0)
+
+        sectors = list(self._static['secteur'])
+        self.sector_names = sorted(set(sectors))
+        self.sector_codes = np.array([self.sector_names.index(s) for s in sectors], dtype='int64')
+        if sector_data is None:
+            sector_data = SectorIndex(self.symbols, sectors).aggregate(self._static)
+        self._sector_data = sector_data.reset_index(drop=True)
+        # Ligne de la table sectorielle de chaque secteur coté
+        self._sector_rows = pd.Index(self._sector_data['secteur']).get_indexer(self.sector_names)
+
+        if index is None:
+            try:
+                index = IndexCalculator.from_weights(self.symbols, self.weights, self.open, 100.0)
+            except ValueError:
+                # Ni poids ni cours d'ouverture exploitables : niveau indéterminé
+                index = IndexCalculator(self.symbols, np.zeros(len(self.symbols)),
+                                        np.zeros(len(self.symbols)), math.nan)
+        self.index = index
+        self._units, self._index_prices = index.aligned(self.symbols)
+
+        self.updates = 0
+        self.last_update = None
+        self._recompute()
+
+    def _recompute(self):
+        """Recalcule tous les agrégats (initialisation uniquement)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.variation = (self.last - self.open) / self.open * 100
+        finite = np.isfinite(self.variation)
+        self.up = int((self.variation > 0).sum())
+        self.down = int((self.variation < 0).sum())
+        self.variation_sum = float(self.variation[finite].sum())
+        self.variation_count = int(finite.sum())
+        self.sector_sum = np.bincount(self.sector_codes, weights=np.where(finite, self.variation, 0.0),
+                                      minlength=len(self.sector_names))
+        self.sector_count = np.bincount(self.sector_codes, weights=finite.astype('float64'),
+                                        minlength=len(self.sector_names))
+        self.volume_total = float(np.nansum(self.volume))
+        self.market_cap_total = float(np.nansum(self.market_cap))
+        self.sector_volume = np.bincount(self.sector_codes, weights=np.nan_to_num(self.volume),
+                                         minlength=len(self.sector_names))
+        self.sector_market_cap = np.bincount(self.sector_codes, weights=np.nan_to_num(self.market_cap),
+                                             minlength=len(self.sector_names))
+        # Numérateur de l'indice (Σ titres × cours), au dernier cours et à l'ouverture
+        self._index_sum = float(self._units @ self._index_price(self.last))
+        self._index_open = float(self._units @ self._index_price(self.open))
+
+    def _index_price(self, prices):
+        """Cours retenus pour l'indice : cours de calage lorsque le cours manque"""
+        return np.where(np.isfinite(prices), prices, self._index_prices)
+
+    def apply(self, tick):
+        """Intègre un tick ; retourne ``False`` si le symbole n'est pas suivi"""
+        i = self.position.get(tick.symbol)
+        price = float(tick.price)
+        if i is None or not math.isfinite(price) or price <= 0:
+            return False
+
+        old_price = self.last[i] if math.isfinite(self.last[i]) else self._index_prices[i]
+        old_variation = self.variation[i]
+        self.last[i] = price
+        if not self.high[i] >= price:
+            self.high[i] = price
+        if not self.low[i] <= price:
+            self.low[i] = price
+        code = self.sector_codes[i]
+        if tick.volume:
+            # Volume inconnu à l'initialisation : cumulé à partir des ticks
+            self.volume[i] = np.nan_to_num(self.volume[i]) + tick.volume
+            self.volume_total += tick.volume
+            self.sector_volume[code] += tick.volume
+
+        open_price = self.open[i]
+        variation = (price - open_price) / open_price * 100 if open_price > 0 else math.nan
+        self.variation[i] = variation
+
+        old_sign, sign = _sign(old_variation), _sign(variation)
+        if old_sign != sign:
+            self.up += (sign > 0) - (old_sign > 0)
+            self.down += (sign < 0) - (old_sign < 0)
+
+        (old_value, old_n), (value, n) = _contribution(old_variation), _contribution(variation)
+        self.variation_sum += value - old_value
+        self.variation_count += n - old_n
+        self.sector_sum[code] += value - old_value
+        self.sector_count[code] += n - old_n
+
+        market_cap = self._shares[i] * price
+        delta = np.nan_to_num(market_cap) - np.nan_to_num(self.market_cap[i])
+        self.market_cap_total += delta
+        self.sector_market_cap[code] += delta
+        self.market_cap[i] = market_cap
+
+        self._index_sum += self._units[i] * (price - old_price)
+
+        self.updates += 1
+        self.last_update = tick.timestamp
+        return True
+
+    def apply_many(self, ticks):
+        """Intègre une suite de ticks ; retourne le nombre de ticks retenus"""
+        return sum(self.apply(tick) for tick in ticks)
+
+    def index_level(self):
+        """Niveau courant de l'indice (NaN sans diviseur)"""
+        if not self.index.divisor:
+            return math.nan
+        return self._index_sum / self.index.divisor
+
+    def index_variation(self):
+        """Variation (%) de l'indice depuis l'ouverture"""
+        if self._index_open == 0:
+            return math.nan
+        return (self._index_sum / self._index_open - 1) * 100
+
+    def sector_data(self):
+        """Agrégats par secteur, au format de ``SectorIndex.aggregate``"""
+        data = self._sector_data.copy()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = self.sector_sum / self.sector_count
+        rows = self._sector_rows
+        data.loc[rows, 'performance_moyenne'] = np.nan_to_num(means)
+        data.loc[rows, 'volume_total'] = self.sector_volume
+        data.loc[rows, 'market_cap_total'] = self.sector_market_cap
+        return data
+
+    def metrics(self):
+        """Indicateurs clés courants"""
+        return {
+            'variation_moyenne': (self.variation_sum / self.variation_count
+                                  if self.variation_count else math.nan),
+            'niveau_indice': self.index_level(),
+            'variation_indice': self.index_variation(),
+            'hausses': self.up,
+            'baisses': self.down,
+            'nombre': len(self.symbols),
+            'volume_total': self.volume_total,
+            'market_cap_total': self.market_cap_total,
+            'mises_a_jour': self.updates,
+        }
+
+    def snapshot(self):
+        """Table des cotations courantes, au format de ``current_data``"""
+        data = self._static.copy()
+        data['prix_actuel'] = self.last
+        data['variation_pct'] = self.variation
+        data['variation_abs'] = self.last - self.open
+        data['volume'] = self.volume
+        data['market_cap'] = self.market_cap
+        data['plus_haut'] = self.high
+        data['plus_bas'] = self.low
+        return data
+
+
+def replay_ticks(path, speed=0):
+    """Relit un fichier de ticks enregistré (CSV ``date, symbole, prix, volume``).
+
+    Avec ``speed`` > 0, les ticks sont restitués au rythme de leurs
+    horodatages, accéléré d'autant ; avec 0, aussi vite que possible.
+    """
+    data = pd.read_csv(path, parse_dates=['date'])
+    previous = None
+    for date, symbol, price, volume in data[REPLAY_COLUMNS].itertuples(index=False):
+        if speed > 0 and previous is not None:
+            delay = (date - previous).total_seconds() / speed
+            if delay > 0:
+                time.sleep(delay)
+        previous = date
+        yield Tick(symbol, date, price, volume)
+
+
+def synthetic_ticks(prices, interval=1.0, volatility=0.0005, seed=0, limit=None):
+    """Marche aléatoire autour des prix de départ ``{symbole: prix}``.
+
+    Chaque symbole reçoit un tick toutes les ``interval`` secondes
+    (``interval`` = 0 : sans attente). ``limit`` borne le nombre de ticks.
+    """
+    rng = np.random.default_rng(seed)
+    symbols = list(prices)
+    current = np.array([prices[s] for s in symbols], dtype='float64')
+    emitted = 0
+    while limit is None or emitted < limit:
+        current *= np.exp(rng.normal(0.0, volatility, len(current)))
+        volumes = rng.integers(10, 1000, len(current))
+        now = pd.Timestamp.now(tz=MARKET_TZ)
+        for symbol, price, volume in zip(symbols, current, volumes):
+            if limit is not None and emitted >= limit:
+                return
+            yield Tick(symbol, now, float(price), int(volume))
+            emitted += 1
+        if interval > 0:
+            time.sleep(interval)
+
+
+class QuoteStream:
+    """Consomme un flux de ticks dans un thread de fond et met à jour un ``QuoteState``"""
+
+    def __init__(self, state, feed):
+        self.state = state
+        self.feed = feed
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="cac40-quotes", daemon=True)
+        self.finished = False
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            for tick in self.feed:
+                with self._lock:
+                    self.state.apply(tick)
+        except Exception:
+            logger.exception("Interruption du flux de cotations")
+        finally:
+            self.finished = True
+
+    def snapshot(self):
+        """Copie cohérente des cotations, des agrégats sectoriels et des indicateurs"""
+        with self._lock:
+            return self.state.snapshot(), self.state.sector_data(), self.state.metrics()
+
+
+_streams = {}
+_streams_lock = threading.Lock()
+
+
+def get_quote_stream(key, seed, feed_factory):
+    """Retourne le flux partagé associé à ``key``, démarré au premier appel.
+
+    ``seed()`` fournit l'état initial et ``feed_factory(state)`` le
+    générateur de ticks ; ils ne sont appelés qu'à la création du flux.
+    """
+    with _streams_lock:
+        stream = _streams.get(key)
+        if stream is None:
+            state = seed()
+            stream = _streams[key] = QuoteStream(state, feed_factory(state)).start()
+        return stream
@@ -0,0 +1,108 @@
+# scheduler.py
+"""Rafraîchissement des cotations en arrière-plan.
+
+Un thread unique par processus recalcule les entrées « live » du cache
+partagé à cadence fixe, indépendamment des sessions. Les sessions ne font
+que relire le cache lors de leurs réexécutions partielles : aucune ne
+bloque de thread serveur en attendant le prochain rafraîchissement.
+
+Une tâche qui n'est plus réclamée par aucune session pendant
+``idle_timeout`` secondes est abandonnée, pour ne pas interroger le
+fournisseur quand personne ne consulte le dashboard.
+"""
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class _Job:
+    __slots__ = ('key', 'data_class', 'compute', 'interval', 'next_run', 'last_seen')
+
+    def __init__(self, key, data_class, compute, interval):
+        self.key = key
+        self.data_class = data_class
+        self.compute = compute
+        self.interval = interval
+        self.next_run = time.monotonic() + interval
+        self.last_seen = time.monotonic()
+
+
+class RefreshScheduler:
+    """Thread de fond qui rafraîchit des entrées du cache partagé à cadence fixe"""
+
+    def __init__(self, cache, idle_timeout=600):
+        self.cache = cache
+        self.idle_timeout = idle_timeout
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def register(self, key, data_class, compute, interval):
+        """Déclare (ou maintient en vie) le rafraîchissement de ``key`` toutes les ``interval`` secondes"""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None:
+                self._jobs[key] = _Job(key, data_class, compute, interval)
+                self._wakeup.set()
+            else:
+                job.compute = compute
+                job.last_seen = time.monotonic()
+                if interval != job.interval:
+                    job.interval = interval
+                    job.next_run = min(job.next_run, time.monotonic() + interval)
+                    self._wakeup.set()
+        self.start()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name="cac40-refresh", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+
+    def _due_jobs(self):
+        now = time.monotonic()
+        with self._lock:
+            for key in [k for k, job in self._jobs.items() if now - job.last_seen > self.idle_timeout]:
+                del self._jobs[key]
+            due = [job for job in self._jobs.values() if job.next_run <= now]
+            upcoming = min((job.next_run for job in self._jobs.values()), default=now + 60)
+        return due, max(0.0, upcoming - now)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            due, wait = self._due_jobs()
+            for job in due:
+                try:
+                    value = job.compute()
+                    # L'entrée reste valide jusqu'au rafraîchissement suivant, même s'il est lent
+                    self.cache.set(job.key, value, job.data_class, ttl=2 * job.interval)
+                except Exception:
+                    logger.exception("Échec du rafraîchissement de %s", job.key)
+                job.next_run = time.monotonic() + job.interval
+            if not due:
+                self._wakeup.wait(wait)
+                self._wakeup.clear()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_refresh_scheduler(cache):
+    """Retourne le planificateur partagé par toutes les sessions du processus"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RefreshScheduler(
+                cache, idle_timeout=float(os.environ.get("CAC40_REFRESH_IDLE_TIMEOUT", "600")))
+        return _scheduler
@@ -0,0 +1,179 @@
+# screener.py
+"""Screener vectorisé sur une table de caractéristiques par symbole.
+
+Les caractéristiques issues des historiques (volatilité réalisée, bêta,
+momentum) sont calculées une fois par séance sur la matrice de prix ;
+celles des cotations (cours, variation, capitalisation, rendement) y sont
+jointes à chaque instantané. Un filtrage évalue toutes ses conditions en
+un seul passage vectorisé sur la table, quel que soit leur nombre.
+
+Les conditions sont des expressions ``DataFrame.eval`` sur les colonnes
+de ``FEATURE_COLUMNS`` (par exemple ``"volatilite < 30 and beta < 1"``) ;
+les variables passées en paramètre sont référencées par ``@nom``. Une
+condition saisie par l'utilisateur (``query``) est d'abord vérifiée par
+``check_condition`` : seuls les noms de colonnes, les constantes
+numériques ou textuelles, les comparaisons, l'arithmétique et
+``and`` / ``or`` / ``not`` y sont admis. L'arithmétique est restreinte
+pour qu'une condition ne puisse pas bloquer le processus : pas de
+puissance, pas d'opération entre deux constantes ni sur du texte, et des
+constantes bornées par ``MAX_CONSTANT``.
+"""
+import ast
+import math
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from indicators import TRADING_DAYS
+from price_data import normalize_dates
+
+VOLATILITY_SESSIONS = 63
+BETA_SESSIONS = 252
+MOMENTUM_SESSIONS = {'momentum_1m': 21, 'momentum_3m': 63, 'momentum_12m': 252}
+
+QUOTE_FEATURES = ['nom_complet', 'secteur', 'prix_actuel', 'variation_pct', 'market_cap',
+                  'dividende_yield', 'poids_cac40']
+HISTORY_FEATURES = ['volatilite', 'beta'] + list(MOMENTUM_SESSIONS)
+FEATURE_COLUMNS = QUOTE_FEATURES + HISTORY_FEATURES
+TEXT_COLUMNS = ('nom_complet', 'secteur')
+MAX_CONSTANT = 1e15
+
+# Nœuds admis dans une condition saisie par l'utilisateur
+ALLOWED_NODES = (
+    ast.Expression, ast.Name, ast.Load, ast.Constant,
+    ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Mod,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+)
+FORBIDDEN_NODES = {
+    ast.Attribute: "accès à un attribut",
+    ast.Call: "appel de fonction",
+    ast.Subscript: "indexation",
+}
+
+
+class InvalidCondition(ValueError):
+    """Condition refusée par ``check_condition``"""
+
+
+def _is_constant(node):
+    while isinstance(node, ast.UnaryOp):
+        node = node.operand
+    return isinstance(node, ast.Constant)
+
+
+def _is_text(node):
+    return ((isinstance(node, ast.Constant) and isinstance(node.value, str)) or
+            (isinstance(node, ast.Name) and node.id in TEXT_COLUMNS))
+
+
+def check_condition(condition):
+    """Vérifie qu'une condition saisie ne contient que des constructions admises.
+
+    Lève ``InvalidCondition`` en précisant la raison du refus.
+    """
+    try:
+        tree = ast.parse(condition.strip(), mode='eval')
+    except SyntaxError as e:
+        raise InvalidCondition(f"syntaxe invalide ({e.msg})") from None
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id not in FEATURE_COLUMNS:
+            raise InvalidCondition(f"colonne inconnue « {node.id} »")
+        if isinstance(node, ast.Constant) and type(node.value) not in (int, float, str):
+            raise InvalidCondition(f"constante non admise « {node.value!r} »")
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float) and \
+                not abs(node.value) <= MAX_CONSTANT:
+            raise InvalidCondition(f"constante hors bornes « {node.value!r} » (|x| ≤ {MAX_CONSTANT:g})")
+        if isinstance(node, ast.BinOp):
+            if _is_text(node.left) or _is_text(node.right):
+                raise InvalidCondition("opération arithmétique sur du texte")
+            if _is_constant(node.left) and _is_constant(node.right):
+                raise InvalidCondition("opération entre deux constantes")
+        if not isinstance(node, ALLOWED_NODES):
+            reason = FORBIDDEN_NODES.get(type(node), f"construction « {type(node).__name__} »")
+            raise InvalidCondition(f"{reason} (seuls les noms de colonnes, les constantes numériques ou "
+                                   "textuelles, les comparaisons, l'arithmétique et and/or/not sont admis)")
+
+
+def history_features(matrix, market=None):
+    """Caractéristiques historiques de chaque symbole de la matrice de prix.
+
+    ``volatilite`` est la volatilité annualisée (%) des rendements
+    logarithmiques des 3 derniers mois, ``beta`` la sensibilité des
+    rendements quotidiens sur un an à ceux de ``market`` (série de
+    clôtures de l'indice ; à défaut, la moyenne de l'univers), et
+    ``momentum_*`` les performances (%) sur 1, 3 et 12 mois.
+    """
+    if matrix.empty:
+        return pd.DataFrame(columns=HISTORY_FEATURES, index=pd.Index([], name='symbole'))
+
+    close = matrix.close.astype('float64')
+    log_returns = np.diff(np.log(close), axis=0)
+    with warnings.catch_warnings():
+        # Symboles sans historique suffisant : NaN attendu
+        warnings.simplefilter('ignore', RuntimeWarning)
+        volatilite = (np.nanstd(log_returns[-VOLATILITY_SESSIONS:], axis=0, ddof=1)
+                      * math.sqrt(TRADING_DAYS) * 100)
+
+        returns = log_returns[-BETA_SESSIONS:]
+        if market is not None and not market.empty:
+            market = market.astype('float64')
+            market.index = normalize_dates(market.index).normalize()
+            aligned = market.groupby(level=0).last().reindex(matrix.dates.normalize()).to_numpy()
+            market_returns = np.diff(np.log(aligned))[-BETA_SESSIONS:]
+        else:
+            market_returns = np.nanmean(returns, axis=1)
+        valid = ~np.isnan(returns) & ~np.isnan(market_returns)[:, None]
+        count = valid.sum(axis=0)
+        x = np.where(valid, market_returns[:, None], 0.0)
+        y = np.where(valid, returns, 0.0)
+        x_mean = x.sum(axis=0) / count
+        y_mean = y.sum(axis=0) / count
+        covariance = ((x - x_mean) * (y - y_mean) * valid).sum(axis=0)
+        variance = (((x - x_mean) ** 2) * valid).sum(axis=0)
+        beta = covariance / variance
+
+        last = matrix.last_close()
+        features = {'volatilite': volatilite, 'beta': beta}
+        for name, sessions in MOMENTUM_SESSIONS.items():
+            past = close[-sessions - 1] if len(close) > sessions else np.full(close.shape[1], np.nan)
+            features[name] = (last / past - 1) * 100
+
+    return pd.DataFrame(features, index=pd.Index(matrix.symbols, name='symbole'))[HISTORY_FEATURES]
+
+
+class Screener:
+    """Table de caractéristiques par symbole et filtrage vectorisé"""
+
+    def __init__(self, features):
+        self.features = features
+
+    @classmethod
+    def from_snapshot(cls, current_data, historical):
+        """Joint les cotations courantes aux caractéristiques historiques"""
+        quotes = current_data.set_index('symbole')[QUOTE_FEATURES]
+        return cls(quotes.join(historical, how='left'))
+
+    def screen(self, conditions=(), sort_by=None, ascending=False, limit=None, query=None, **variables):
+        """Symboles satisfaisant toutes les ``conditions``, classés par ``sort_by``.
+
+        Les conditions sont combinées en une seule expression, évaluée en
+        un passage sur la table ; ``variables`` y sont accessibles par ``@nom``.
+        ``query`` est une condition saisie par l'utilisateur, vérifiée par
+        ``check_condition`` avant d'y être ajoutée.
+        """
+        result = self.features
+        if query and query.strip():
+            check_condition(query)
+            conditions = list(conditions) + [query]
+        conditions = [condition for condition in conditions if condition and condition.strip()]
+        if conditions:
+            expression = " and ".join(f"({condition})" for condition in conditions)
+            mask = result.eval(expression, local_dict=variables)
+            result = result[np.asarray(mask, dtype=bool)]
+        if sort_by is not None:
+            result = result.sort_values(sort_by, ascending=ascending, na_position='last')
+        if limit is not None:
+            result = result.head(limit)
+        return result
@@ -0,0 +1,75 @@
+# sector_index.py
+"""Index des titres par secteur pour les agrégats sectoriels.
+
+L'index est construit une fois pour l'univers de titres (symbole →
+position, secteur → positions). Les agrégats d'un instantané des
+cotations s'en déduisent en un seul passage groupé (``np.bincount``),
+sans filtrer la table secteur par secteur ni titre par titre.
+"""
+import numpy as np
+import pandas as pd
+
+SECTOR_COLUMNS = ['secteur', 'poids_cac40', 'market_cap_total', 'volume_total',
+                  'nombre_entreprises', 'nombre_cotees', 'performance_moyenne']
+
+
+class SectorIndex:
+    """Secteur et poids de chaque titre de l'univers, indexés par position"""
+
+    def __init__(self, symbols, sectors, weights=None):
+        self.symbols = pd.Index(list(symbols), name='symbole')
+        self.sector_names = sorted(set(sectors))
+        code_of = {name: k for k, name in enumerate(self.sector_names)}
+        self.codes = np.array([code_of[sector] for sector in sectors], dtype='int64')
+        # Sans poids d'univers, ceux de l'instantané (``poids_cac40``) sont sommés
+        self.weights = None if weights is None else np.asarray(weights, dtype='float64')
+
+    @classmethod
+    def from_universe(cls, entreprises):
+        """Index de l'univers du dashboard (``define_entreprises``)"""
+        weights = [info['poids_cac40'] for info in entreprises.values()]
+        return cls(entreprises, [info['secteur'] for info in entreprises.values()],
+                   None if None in weights else weights)
+
+    def _bincount(self, codes, weights=None):
+        return np.bincount(codes, weights=weights, minlength=len(self.sector_names))
+
+    def locate(self, data):
+        """Positions dans l'univers des lignes de ``data`` (-1 pour un symbole inconnu)"""
+        return self.symbols.get_indexer(data['symbole'])
+
+    def aggregate(self, data):
+        """Agrégats par secteur d'un instantané des cotations (``current_data``).
+
+        Nombre d'entreprises et poids (s'ils sont fixés par l'univers) portent
+        sur tout l'univers ; les autres agrégats sur les seuls titres cotés.
+        """
+        position = self.locate(data)
+        known = position >= 0
+        codes = self.codes[position[known]]
+
+        def column(name):
+            return data[name].to_numpy(dtype='float64')[known]
+
+        variation = column('variation_pct')
+        finite = np.isfinite(variation)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            performance = (self._bincount(codes[finite], variation[finite]) /
+                           self._bincount(codes[finite]))
+
+        return pd.DataFrame({
+            'secteur': self.sector_names,
+            'poids_cac40': (self._bincount(codes, np.nan_to_num(column('poids_cac40')))
+                            if self.weights is None else self._bincount(self.codes, self.weights)),
+            'market_cap_total': self._bincount(codes, np.nan_to_num(column('market_cap'))),
+            'volume_total': self._bincount(codes, np.nan_to_num(column('volume'))),
+            'nombre_entreprises': self._bincount(self.codes).astype('int64'),
+            'nombre_cotees': self._bincount(codes).astype('int64'),
+            'performance_moyenne': np.nan_to_num(performance),
+        }, columns=SECTOR_COLUMNS)
+
+    def select(self, data, sector):
+        """Lignes de ``data`` appartenant à ``sector``"""
+        position = self.locate(data)
+        k = self.sector_names.index(sector)
+        return data[(position >= 0) & (self.codes[position] == k)]
@@ -0,0 +1,59 @@
+# conftest.py
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Modules du dashboard importables depuis la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_data import PriceMatrix  # noqa: E402
+
+
+@pytest.fixture
+def current_data():
+    """Cotations courantes de cinq titres, au format du dashboard"""
+    symbols = ["AI.PA", "MC.PA", "OR.PA", "SAN.PA", "TTE.PA"]
+    prices = np.array([170.0, 700.0, 420.0, 90.0, 60.0])
+    return pd.DataFrame({
+        'symbole': symbols,
+        'nom_complet': symbols,
+        'secteur': ["Chimie", "Luxe", "Luxe", "Santé", "Énergie"],
+        'prix_actuel': prices,
+        'variation_pct': 0.0,
+        'variation_abs': 0.0,
+        'volume': [1e6, 5e5, 3e5, np.nan, 2e6],
+        'market_cap': [9e10, 3.5e11, 2.2e11, 1.1e11, 1.4e11],
+        'dividende_yield': 0.0,
+        'poids_cac40': [10.0, 30.0, 20.0, 15.0, 25.0],
+        'ouverture': prices,
+        'plus_haut': prices,
+        'plus_bas': prices,
+    })
+
+
+@pytest.fixture
+def price_matrix():
+    """Matrice de prix de quatre titres sur 300 séances"""
+    rows, symbols = 300, 4
+    rng = np.random.default_rng(1)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (rows, symbols)), axis=0))
+    # Un titre coté plus tard que les autres
+    close[:120, -1] = np.nan
+    dates = pd.bdate_range("2022-01-03", periods=rows, tz="Europe/Paris")
+    return PriceMatrix(dates, [f"S{j}" for j in range(symbols)], ["A", "A", "B", "B"][:symbols],
+                       close, np.ones_like(close), close * 1.01, close * 0.99)
+
+
+@pytest.fixture
+def head():
+    """Matrice des ``rows`` premières séances, dernière clôture éventuellement provisoire"""
+    def head(matrix, rows, last_close=None):
+        close, high, low = (values[:rows].copy() for values in (matrix.close, matrix.high, matrix.low))
+        if last_close is not None:
+            close[-1] = high[-1] = low[-1] = last_close
+        return PriceMatrix(matrix.dates[:rows], matrix.symbols, matrix.sectors, close,
+                           matrix.volume[:rows], high, low)
+    return head
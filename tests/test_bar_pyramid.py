@@ -0,0 +1,37 @@
+# test_bar_pyramid.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from bar_pyramid import TIERS, BarPyramid, resolution
+
+
+def tiers(pyramid):
+    return {name: pyramid.tier(name) for name in TIERS}
+
+
+@pytest.mark.parametrize('rows', [250, 253])
+def test_advance_matches_rebuild(price_matrix, head, rows):
+    matrix = price_matrix
+    pyramid = BarPyramid()
+    # Séance en cours intégrée avec un cours provisoire, puis révisée et complétée
+    pyramid.advance(head(matrix, rows, last_close=80.0))
+    pyramid.advance(head(matrix, rows))
+    pyramid.advance(head(matrix, 280, last_close=150.0))
+    pyramid.advance(matrix)
+
+    rebuilt = BarPyramid()
+    rebuilt.advance(matrix)
+    for name, tier in tiers(pyramid).items():
+        expected = rebuilt.tier(name)
+        pd.testing.assert_index_equal(tier.dates, expected.dates)
+        for field in ('close', 'high', 'low', 'volume'):
+            np.testing.assert_allclose(getattr(tier, field), getattr(expected, field))
+    pd.testing.assert_frame_equal(pyramid.sector_mean('mois'), rebuilt.sector_mean('mois'))
+
+
+
+@pytest.mark.parametrize('budget, expected', [(300, 'jour'), (100, 'semaine'), (30, 'mois'), (5, 'mois')])
+def test_resolution_picks_finest_tier_within_budget(price_matrix, budget, expected):
+    # 300 séances : une soixantaine de semaines, une quinzaine de mois
+    assert resolution(price_matrix.dates, budget) == expected
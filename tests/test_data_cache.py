@@ -0,0 +1,96 @@
+# test_data_cache.py
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import data_cache
+from data_cache import SharedDataCache
+
+
+class Clock:
+    """Horloge monotone pilotée par le test"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(data_cache, 'time', clock)
+    return clock
+
+
+def block(kib):
+    return np.zeros(kib * 1024, dtype='uint8')
+
+
+def test_entries_expire_per_data_class(clock):
+    cache = SharedDataCache(ttls={'quotes': 60, 'fondamentaux': 3600})
+    cache.set('cotations', 1, 'quotes')
+    cache.set('infos', 2, 'fondamentaux')
+
+    clock.now += 59
+    assert cache.get('cotations') == 1
+    clock.now += 1
+    assert cache.get('cotations') is None
+    assert cache.get('infos') == 2
+    assert cache.stats()['entries'] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SharedDataCache(max_bytes=3 * 1024, max_entries=10)
+    for key in 'abc':
+        cache.set(key, block(1), 'quotes')
+    cache.get('a')
+    cache.set('d', block(1), 'quotes')
+
+    assert cache.get('b') is None
+    assert [key for key in 'acd' if cache.get(key) is not None] == ['a', 'c', 'd']
+    assert cache.stats()['evictions'] == 1
+
+    small = SharedDataCache(max_entries=2)
+    for key in 'xyz':
+        small.set(key, key, 'quotes')
+    assert small.get('x') is None and small.stats()['entries'] == 2
+
+
+def test_replacing_a_key_updates_byte_count():
+    cache = SharedDataCache()
+    cache.set('a', block(4), 'quotes')
+    cache.set('a', block(1), 'quotes')
+    assert cache.stats()['bytes'] == 1024
+    cache.invalidate('a')
+    assert cache.stats()['bytes'] == 0
+
+
+def test_concurrent_get_or_compute_computes_once():
+    cache = SharedDataCache()
+    calls = []
+    barrier = threading.Barrier(8)
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return 'valeur'
+
+    results = []
+
+    def session():
+        barrier.wait()
+        results.append(cache.get_or_compute('cle', 'quotes', compute))
+
+    threads = [threading.Thread(target=session) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ['valeur'] * 8
+    assert cache.stats()['misses'] == 1 and cache.stats()['hits'] == 7
@@ -0,0 +1,48 @@
+# test_fetch_executor.py
+import time
+
+from market_data import FetchExecutor
+
+
+def test_queued_requests_are_not_timed_out():
+    # 12 requêtes de 0,4 s sur 4 threads : 1,2 s au total, mais 0,4 s chacune
+    executor = FetchExecutor(max_workers=4, timeout=1.0, retries=0)
+
+    def fetch(key):
+        time.sleep(0.4)
+        return key
+
+    outcome = executor.map(fetch, range(12))
+
+    assert outcome.errors == {}
+    assert sorted(outcome.results) == list(range(12))
+
+
+def test_slow_request_times_out():
+    executor = FetchExecutor(max_workers=2, timeout=0.2, retries=0)
+
+    def fetch(key):
+        time.sleep(1.0 if key == 'lent' else 0.01)
+        return key
+
+    outcome = executor.map(fetch, ['lent', 'rapide'])
+
+    assert list(outcome.results) == ['rapide']
+    assert isinstance(outcome.errors['lent'], TimeoutError)
+
+
+def test_saturated_pool_fails_queued_attempts():
+    # Deux requêtes bloquées occupent les deux threads : leurs relances ne peuvent pas partir
+    executor = FetchExecutor(max_workers=2, timeout=0.2, retries=1, backoff=0.05)
+
+    def fetch(key):
+        time.sleep(3.0)
+        return key
+
+    start = time.monotonic()
+    outcome = executor.map(fetch, ['a', 'b'])
+
+    assert time.monotonic() - start < 2 * executor.queue_timeout()
+    assert outcome.results == {}
+    assert all(isinstance(error, TimeoutError) for error in outcome.errors.values())
+    assert sorted(outcome.errors) == ['a', 'b']
@@ -0,0 +1,45 @@
+# test_figure_cache.py
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from figure_cache import FigureCache, SerializedFigure
+
+
+def line(n):
+    return go.Figure(go.Scatter(x=list(range(n)), y=list(range(n))))
+
+
+def test_hit_reuses_serialized_figure():
+    cache = FigureCache()
+    builds = []
+
+    def build():
+        builds.append(1)
+        return line(50)
+
+    first = cache.get_or_build('ligne', (1,), build, periode='1A')
+    second = cache.get_or_build('ligne', (1,), build, periode='1A')
+
+    assert isinstance(first, SerializedFigure)
+    assert second is first
+    assert len(builds) == 1
+    assert first.to_dict() is first.to_dict()
+    assert pio.to_json(first, validate=False) == line(50).to_json(validate=False)
+
+
+def test_size_is_serialized_payload():
+    cache = FigureCache()
+    fig = cache.get_or_build('ligne', (1,), lambda: line(200))
+
+    assert cache.stats()['bytes'] == fig.nbytes == len(line(200).to_json(validate=False))
+
+
+def test_eviction_by_bytes():
+    size = SerializedFigure(line(100)).nbytes
+    cache = FigureCache(max_bytes=2 * size)
+    for version in range(3):
+        cache.get_or_build('ligne', (version,), lambda: line(100))
+
+    stats = cache.stats()
+    assert stats['entries'] == 2
+    assert stats['bytes'] == 2 * size
@@ -0,0 +1,85 @@
+# test_fundamentals.py
+import json
+import threading
+import time
+
+import pytest
+
+import fundamentals
+from fundamentals import RETRY_SECONDS, FundamentalsStore
+from market_data import FetchExecutor
+
+
+class Clock:
+    """Horloge murale pilotée par le test"""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self):
+        return self.now
+
+
+class FailingProvider:
+    name = 'test'
+
+    def __init__(self):
+        self.calls = 0
+
+    def info(self, symbol):
+        self.calls += 1
+        raise ConnectionError("indisponible")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(fundamentals, 'time', clock)
+    return clock
+
+
+def wait_revalidation(store):
+    deadline = time.monotonic() + 5
+    while store._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_failed_fetch_is_retried_after_backoff(tmp_path, clock):
+    provider = FailingProvider()
+    store = FundamentalsStore(provider, FetchExecutor(max_workers=1, retries=0), root=str(tmp_path))
+
+    for _ in range(20):
+        assert store.get_many(['MC.PA']) == {'MC.PA': {}}
+        wait_revalidation(store)
+    assert provider.calls == 1
+
+    clock.now += RETRY_SECONDS + 1
+    store.get_many(['MC.PA'])
+    wait_revalidation(store)
+    store.get_many(['MC.PA'])
+    wait_revalidation(store)
+    assert provider.calls == 2
+
+
+def test_concurrent_saves(tmp_path):
+    store = FundamentalsStore(FailingProvider(), FetchExecutor(), root=str(tmp_path))
+    store._entries = {f"S{i}.PA": {'date': 0, 'valeurs': {'beta': i}} for i in range(40)}
+    errors = []
+
+    def save():
+        try:
+            for _ in range(25):
+                store._save()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with open(store.path, encoding='utf-8') as f:
+        assert len(json.load(f)) == 40
+    assert [p.name for p in (tmp_path / 'test').iterdir()] == ['fondamentaux.json']
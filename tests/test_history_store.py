@@ -0,0 +1,53 @@
+# test_history_store.py
+import json
+import threading
+
+import pandas as pd
+
+from history_store import HistoryStore, get_history_store
+from market_data import SyntheticProvider
+
+
+class FailingRefresh(SyntheticProvider):
+    """Téléchargements complets servis, compléments incrémentaux en échec"""
+
+    def download(self, symbols, period="1y", interval="1d", start=None):
+        if start is not None:
+            raise ConnectionError("service indisponible")
+        return super().download(symbols, period=period, interval=interval)
+
+
+def test_failed_refresh_serves_stored_series(tmp_path):
+    store = HistoryStore(FailingRefresh(), root=str(tmp_path))
+    first = store.get_many(["MC.PA", "OR.PA"], period="1y")
+    manifest = dict(store._manifest)
+
+    # Séries stockées considérées anciennes : un complément est demandé
+    for entry in store._manifest.values():
+        entry['maj'] = (pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=1)).isoformat()
+    stale = {key: entry['maj'] for key, entry in store._manifest.items()}
+    second = store.get_many(["MC.PA", "OR.PA"], period="1y")
+
+    assert set(second) == {"MC.PA", "OR.PA"}
+    pd.testing.assert_frame_equal(second["MC.PA"], first["MC.PA"])
+    assert {key: entry['maj'] for key, entry in store._manifest.items()} == stale
+    assert set(store._manifest) == set(manifest)
+
+
+def test_sessions_share_the_store_and_its_manifest(tmp_path, monkeypatch):
+    monkeypatch.setenv("CAC40_CACHE_DIR", str(tmp_path))
+    provider = SyntheticProvider()
+    assert get_history_store(provider) is get_history_store(SyntheticProvider())
+
+    symbols = [f"S{i}.PA" for i in range(8)]
+    threads = [threading.Thread(target=get_history_store(provider).get_many, args=([symbol],))
+               for symbol in symbols]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with open(tmp_path / "synthetic" / "manifest.json", encoding='utf-8') as f:
+        manifest = json.load(f)
+    assert set(manifest) == {f"{symbol}|1d" for symbol in symbols}
+    assert not list((tmp_path / "synthetic").rglob("*.tmp"))
@@ -0,0 +1,46 @@
+# test_index_calculator.py
+import math
+
+import numpy as np
+import pytest
+
+from index_calculator import IndexCalculator, index_weights
+from quote_stream import QuoteState
+
+
+def test_from_weights_sets_level():
+    calculator = IndexCalculator.from_weights(["A", "B"], [60.0, 40.0], [10.0, 20.0], 8000.0)
+    assert calculator.level([10.0, 20.0]) == pytest.approx(8000.0)
+    assert calculator.level([11.0, 20.0]) == pytest.approx(8000.0 * 1.06)
+
+
+def test_from_weights_without_usable_weights():
+    with pytest.raises(ValueError):
+        IndexCalculator.from_weights(["A", "B"], [0.0, 0.0], [10.0, 20.0], 100.0)
+    with pytest.raises(ValueError):
+        IndexCalculator.from_weights(["A", "B"], [50.0, 50.0], [np.nan, np.nan], 100.0)
+
+
+def test_quote_state_without_weights_has_nan_level(current_data):
+    data = current_data
+    data['poids_cac40'] = np.nan
+    metrics = QuoteState(data).metrics()
+    assert math.isnan(metrics['niveau_indice'])
+    assert metrics['hausses'] == 0
+
+
+def test_index_weights_float_adjusted_and_capped():
+    weights = index_weights([400.0, 100.0, 100.0, 100.0, 100.0, 100.0, 100.0, 100.0],
+                            [0.5, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0])
+    assert weights.sum() == pytest.approx(100.0)
+    # 200 flottants sur 900 : 22 %, ramenés à 15 %, l'excédent réparti sur les autres
+    assert weights[0] == pytest.approx(15.0)
+    assert weights[1:] == pytest.approx(np.full(7, 85.0 / 7))
+
+
+def test_index_weights_fall_back_to_equal_weights():
+    assert index_weights([0.0, 0.0, 0.0, 0.0]) == pytest.approx(np.full(4, 25.0))
+    assert index_weights([np.nan, np.nan]) == pytest.approx(np.full(2, 50.0))
+    # Poids exploitables par le calage de l'indice
+    calculator = IndexCalculator.from_weights(["A", "B"], index_weights([0.0, 0.0]), [10.0, 20.0], 100.0)
+    assert calculator.level([11.0, 20.0]) == pytest.approx(105.0)
@@ -0,0 +1,27 @@
+# test_indicators.py
+import pandas as pd
+
+from indicators import INDICATORS, IndicatorEngine, matrix_indicators
+
+
+def expected(matrix):
+    values = matrix_indicators(matrix)
+    return pd.DataFrame({name: values[name].iloc[-1] for name in INDICATORS}).rename_axis('symbole')
+
+
+def test_seed_matches_vectorized(price_matrix):
+    matrix = price_matrix
+    engine = IndicatorEngine()
+    engine.advance(matrix)
+    pd.testing.assert_frame_equal(engine.latest(), expected(matrix), rtol=1e-9)
+
+
+def test_advance_revises_partial_bar(price_matrix, head):
+    matrix = price_matrix
+    engine = IndicatorEngine()
+    # Séance en cours intégrée avec un cours provisoire, puis révisée et complétée
+    engine.advance(head(matrix, 250, last_close=80.0))
+    engine.advance(head(matrix, 250))
+    engine.advance(head(matrix, 280, last_close=150.0))
+    engine.advance(matrix)
+    pd.testing.assert_frame_equal(engine.latest(), expected(matrix), rtol=1e-9)
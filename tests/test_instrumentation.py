@@ -0,0 +1,49 @@
+# test_instrumentation.py
+import logging
+import socket
+import threading
+
+import instrumentation
+
+
+def test_serve_metrics_port_taken(monkeypatch, caplog):
+    monkeypatch.setattr(instrumentation, '_server', None)
+    with socket.socket() as taken:
+        taken.bind(('', 0))
+        taken.listen()
+        port = taken.getsockname()[1]
+
+        assert instrumentation.serve_metrics(port) is None
+        assert instrumentation.serve_metrics(port) is None
+
+    # Échec journalisé une seule fois, démarrage non retenté
+    assert len([r for r in caplog.records if r.name == 'instrumentation']) == 1
+    assert instrumentation._server is False
+
+
+def test_write_prometheus_concurrent_sessions(tmp_path):
+    metrics = instrumentation.Metrics()
+    metrics.count('requetes', 3)
+    path = str(tmp_path / 'mesures.prom')
+    results = []
+
+    def export():
+        results.extend(metrics.write_prometheus(path) for _ in range(50))
+
+    threads = [threading.Thread(target=export) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(results) and len(results) == 400
+    assert [p.name for p in tmp_path.iterdir()] == ['mesures.prom']
+    with open(path, encoding='utf-8') as f:
+        assert f.read() == metrics.prometheus()
+
+
+def test_write_prometheus_failure_is_logged(tmp_path, caplog):
+    (tmp_path / 'fichier').write_text("")
+    with caplog.at_level(logging.ERROR, logger='instrumentation'):
+        assert instrumentation.Metrics().write_prometheus(str(tmp_path / 'fichier' / 'mesures.prom')) is False
+    assert len(caplog.records) == 1
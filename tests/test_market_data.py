@@ -0,0 +1,16 @@
+# test_market_data.py
+import pandas as pd
+
+from market_data import FileProvider
+
+
+def test_download_skips_unreadable_symbol(tmp_path):
+    pd.DataFrame({'Date': ['2024-01-02', '2024-01-03'], 'Open': [1.0, 2.0], 'High': [1.0, 2.0],
+                  'Low': [1.0, 2.0], 'Close': [1.0, 2.0], 'Volume': [10, 20]}
+                 ).to_csv(tmp_path / "OK.PA.csv", index=False)
+    (tmp_path / "KO.PA.csv").write_text("date,close\n2024-01-02,1.0\n")
+
+    histories = FileProvider(str(tmp_path)).download(["KO.PA", "OK.PA"], period="1y")
+
+    assert list(histories) == ["OK.PA"]
+    assert histories["OK.PA"]['Close'].tolist() == [1.0, 2.0]
@@ -0,0 +1,15 @@
+# test_price_data.py
+import numpy as np
+import pandas as pd
+
+from data_cache import estimate_size
+from price_data import PriceMatrix
+
+
+def test_cache_size_of_price_matrix():
+    dates = pd.date_range("2020-01-01", periods=500, tz="Europe/Paris")
+    close = np.ones((500, 40))
+    matrix = PriceMatrix(dates, [f"S{i}" for i in range(40)], ["A"] * 40, close, close.copy())
+
+    # Clôtures et volumes ; plus haut et plus bas sont les clôtures
+    assert estimate_size(matrix) == 2 * close.nbytes + dates.nbytes
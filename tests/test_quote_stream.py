@@ -0,0 +1,18 @@
+# test_quote_stream.py
+import pandas as pd
+
+from quote_stream import QuoteState, synthetic_ticks
+from sector_index import SectorIndex
+
+
+def test_sector_data_follows_ticks(current_data):
+    data = current_data
+    # Univers plus large que les titres cotés : secteur sans cotation conservé
+    universe = SectorIndex(list(data['symbole']) + ["BN.PA"], list(data['secteur']) + ["Alimentation"])
+    state = QuoteState(data, sector_data=universe.aggregate(data))
+
+    prices = dict(zip(data['symbole'], data['prix_actuel']))
+    state.apply_many(synthetic_ticks(prices, interval=0, volatility=0.01, limit=200))
+
+    expected = universe.aggregate(state.snapshot())
+    pd.testing.assert_frame_equal(state.sector_data(), expected)
@@ -0,0 +1,39 @@
+# test_screener.py
+import pandas as pd
+import pytest
+
+from screener import InvalidCondition, Screener, check_condition
+
+
+@pytest.fixture
+def screener(current_data):
+    historical = pd.DataFrame({'volatilite': [18.0, 25.0, 22.0, 15.0, 30.0],
+                               'beta': [0.8, 1.2, 1.0, 0.6, 1.1]},
+                              index=pd.Index(current_data['symbole'], name='symbole'))
+    return Screener.from_snapshot(current_data, historical)
+
+
+def test_query_is_combined_with_conditions(screener):
+    result = screener.screen(["volatilite <= @volatilite_max"], sort_by='beta',
+                             query="beta < 1 and not secteur == 'Santé'", volatilite_max=20)
+    assert list(result.index) == ["AI.PA"]
+
+
+@pytest.mark.parametrize('query, reason', [
+    ("prix_actuel.__class__.__mro__[-1].__subclasses__()", "appel de fonction"),
+    ("prix_actuel.__class__ == 1", "accès à un attribut"),
+    ("secteur[0] == 'L'", "indexation"),
+    ("__import__ == 1", "colonne inconnue"),
+    ("beta < @limite", "syntaxe invalide"),
+    ("beta > 9**9**9", "construction « Pow »"),
+    ("secteur == 'a' * 10**8", "sur du texte"),
+    ("beta > 2 * 3", "entre deux constantes"),
+    ("market_cap > 1e300", "hors bornes"),
+])
+def test_query_rejects_unsafe_constructs(screener, query, reason):
+    with pytest.raises(InvalidCondition, match=reason):
+        screener.screen(query=query)
+
+
+def test_check_condition_accepts_arithmetic():
+    check_condition("market_cap / 1e9 > 50 or (momentum_12m - momentum_3m) * 2 >= -10")
@@ -0,0 +1,115 @@
+# universe.py
+"""Registre des univers de titres suivis par le dashboard.
+
+Un univers est décrit par un fichier JSON versionné de ``data/universes`` :
+
+    {"nom": "cac40", "libelle": "CAC 40", "version": "2025-01-01",
+     "membres": [{"symbole": "MC.PA", "nom_complet": "...", "secteur": "...",
+                  "entree": "2024-12-23", "sortie": null, "poids": 12.5,
+                  "flottant": 0.5}, ...]}
+
+``entree`` et ``sortie`` bornent l'appartenance à l'indice (absentes :
+membre depuis toujours, jusqu'à nouvel ordre). ``poids`` est facultatif :
+si un membre n'en a pas, les poids de tous les membres sont déduits des
+capitalisations boursières courantes, corrigées du facteur de flottant
+``flottant`` (part des titres librement négociables, 1 par défaut).
+
+Une liste de suivi reprend les membres d'un autre univers :
+
+    {"nom": "luxe", "libelle": "Luxe", "version": "...", "base": "cac40",
+     "symboles": ["MC.PA", "RMS.PA"]}
+
+L'univers chargé par défaut est donné par ``CAC40_UNIVERSE`` (nom d'un
+fichier du registre ou chemin), ``cac40`` sinon.
+"""
+import json
+import os
+
+import pandas as pd
+
+UNIVERSE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'universes')
+
+MEMBER_DEFAULTS = {
+    'sous_secteur': '',
+    'pays': 'France',
+    'description': '',
+    'entree': None,
+    'sortie': None,
+    'poids': None,
+    'flottant': 1.0,
+}
+
+
+def universe_path(name):
+    """Chemin du fichier d'un univers : chemin existant, ou nom dans le registre"""
+    if os.path.exists(name):
+        return name
+    return os.path.join(UNIVERSE_DIR, f"{name}.json")
+
+
+class Universe:
+    """Membres d'un univers de titres et leurs dates d'appartenance"""
+
+    def __init__(self, name, label, version, members):
+        self.name = name
+        self.label = label
+        self.version = version
+        self.members = [dict(MEMBER_DEFAULTS, **member) for member in members]
+
+    @classmethod
+    def load(cls, name=None):
+        """Charge un univers du registre (par défaut ``CAC40_UNIVERSE``)"""
+        name = name or os.environ.get("CAC40_UNIVERSE", "cac40")
+        with open(universe_path(name), encoding='utf-8') as f:
+            spec = json.load(f)
+
+        members = spec.get('membres', [])
+        if 'base' in spec:
+            base = {member['symbole']: member for member in cls.load(spec['base']).members}
+            unknown = [symbol for symbol in spec['symboles'] if symbol not in base]
+            if unknown:
+                raise ValueError(f"Symboles absents de l'univers {spec['base']}: {', '.join(unknown)}")
+            members = [base[symbol] for symbol in spec['symboles']]
+        return cls(spec['nom'], spec.get('libelle', spec['nom']), spec.get('version'), members)
+
+    def __len__(self):
+        return len(self.members)
+
+    def members_at(self, date=None):
+        """Membres de l'univers à une date (aujourd'hui par défaut)"""
+        date = pd.Timestamp(date or pd.Timestamp.now().normalize())
+        return [member for member in self.members
+                if (member['entree'] is None or pd.Timestamp(member['entree']) <= date)
+                and (member['sortie'] is None or date < pd.Timestamp(member['sortie']))]
+
+    def entreprises(self, date=None):
+        """Membres à une date, au format ``{symbole: informations}`` du dashboard.
+
+        ``poids_cac40`` vaut ``None`` pour tous les membres dès que l'un
+        d'eux n'a pas de poids : il est alors déduit des capitalisations.
+        """
+        members = self.members_at(date)
+        weighted = all(member['poids'] is not None for member in members)
+        return {
+            member['symbole']: {
+                'nom_complet': member['nom_complet'],
+                'secteur': member['secteur'],
+                'sous_secteur': member['sous_secteur'],
+                'pays': member['pays'],
+                'poids_cac40': member['poids'] if weighted else None,
+                'flottant': member['flottant'],
+                'description': member['description'],
+            }
+            for member in members
+        }
+
+
+def synthetic_universe(size, sectors=None):
+    """Univers fictif de ``size`` titres, pour les mesures de montée en charge"""
+    sectors = sectors or ['Luxe', 'Énergie', 'Santé', 'Industrie', 'Consommation',
+                          'Finance', 'Chimie', 'Technologie']
+    return Universe(f"synthetique{size}", f"Univers synthétique ({size} titres)", None, [
+        {'symbole': f"SYM{i:03d}.PA", 'nom_complet': f"Société {i:03d}",
+         'secteur': sectors[i % len(sectors)]}
+        for i in range(size)
+    ])